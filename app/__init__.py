@@ -1,33 +1,87 @@
 # app/__init__.py
+import click
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from config import Config
-import logging
+from .routing import RoutingSession
 
-db = SQLAlchemy()   # Datenbank initialisieren
-migrate = Migrate() # Migrations-Tool initialisieren
+db = SQLAlchemy(session_options={"class_": RoutingSession})   # Datenbank initialisieren, Statements je Shard verteilt
 
-def create_app():
+def create_app(config_class=Config, **config_overrides):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
+    app.config.update(config_overrides)
 
-    # Initialisiere Datenbank und Migration
+    # Initialisiere Datenbank, mit Pool-Optionen und SQLite-Pragmas aus dem Engine-Profil
+    # und den Shards der Benutzerdaten sowie den Lesereplikaten als zusätzliche Binds
+    from .dialects import check_dialects
+    from .engine import init_engine_options, init_engines
+    from .replicas import init_replica_binds, init_replicas
+    from .sharding import init_shard_binds, init_sharding
+    init_engine_options(app)
+    init_shard_binds(app)
+    init_replica_binds(app)
+    check_dialects(app.config)
     db.init_app(app)
-    migrate.init_app(app, db)
+    init_engines(app)
+    init_sharding(app)
+    init_replicas(app)
 
-    # Konfiguriere Logging
-    logging.basicConfig(level=logging.DEBUG)
+    # Migrationen (Alembic) nur für die Flask-CLI laden, Webserver und Worker brauchen sie nicht
+    init_migrations(app)
+
+    # Cache für Dashboard-Daten
+    from .cache import init_cache
+    init_cache(app)
+
+    # ID <-> Name der Kategorien
+    from .categories import init_categories
+    init_categories(app)
+
+    # Begrenzter Pool für Passwort-Hashes
+    from .passwords import init_hasher
+    init_hasher(app)
+
+    # Laufzeitmessung pro Request und /metrics
+    from .metrics import init_metrics
+    init_metrics(app)
+
+    # Jinja-Bytecode-Cache und Filter für gestreamte Seiten
+    from .templating import init_templates
+    init_templates(app)
+
+    # ETag/Last-Modified aus der data_version des Benutzers
+    from .conditional import init_conditional
+    init_conditional(app)
+
+    # Logging über eine Queue, geschrieben wird im Hintergrund-Thread
+    from .log import init_logging
+    init_logging(app)
 
     # Modelle und Routen importieren, nachdem die App und DB initialisiert sind
     from .routes import main as main_blueprint
     app.register_blueprint(main_blueprint)
+    from .analytics_api import analytics as analytics_blueprint
+    app.register_blueprint(analytics_blueprint)
 
     # Fehlerhandler registrieren
     register_error_handlers(app)
 
+    # CLI-Befehle registrieren
+    from .cli import register_commands
+    register_commands(app)
+
     return app
 
+def init_migrations(app):
+    enabled = app.config["MIGRATIONS_ENABLED"]
+    if enabled is None:
+        # Unter der Flask-CLI wird die App innerhalb eines Click-Kontexts erzeugt
+        enabled = click.get_current_context(silent=True) is not None
+    if enabled:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
 def register_error_handlers(app):
     from flask import render_template
 
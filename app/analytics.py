@@ -0,0 +1,165 @@
+# app/analytics.py
+# Auswertungen (Cashflow, Kategorien, Vorjahresvergleich) über die Monatssummen.
+#
+# Die Gruppierung passiert in SQL über ``monthly_total``, das beim Schreiben
+# gepflegt wird; die Nachbearbeitung (kumulierte Summen, gleitende
+# Durchschnitte, Anteile) läuft als NumPy-Vektoroperation. Summiert wird exakt
+# in ganzen Cent (int64); erst die Ausgabe rechnet in Euro um.
+from datetime import date, datetime
+
+import numpy as np
+from sqlalchemy import func, select
+
+from . import db
+from .categories import category_name
+from .models import MonthlyTotal
+from .monthly_totals import apply_deltas, monthly_deltas, rebuild_monthly_totals  # noqa: F401
+
+
+def month_index(months):
+    # Monate als fortlaufende Ganzzahlen (Jahr * 12 + Monat - 1)
+    return np.fromiter((m.year * 12 + m.month - 1 for m in months), dtype=np.int64, count=len(months))
+
+
+def month_label(index):
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def as_month(value):
+    if isinstance(value, str):
+        value = datetime.strptime(value, "%Y-%m-%d" if len(value) > 7 else "%Y-%m").date()
+    return value
+
+
+def euros(cents):
+    # Ganze Cent -> Euro; c / 100 ergibt immer die kürzeste Dezimaldarstellung
+    return (np.asarray(cents) / 100).tolist()
+
+
+def rolling_mean(values, window):
+    # Gleitender Durchschnitt über die letzten ``window`` Monate (am Anfang entsprechend weniger)
+    sums = np.cumsum(values)
+    sums[window:] = sums[window:] - sums[:-window]
+    counts = np.minimum(np.arange(1, len(values) + 1), window)
+    # Auf ganze Cent gerundet, damit die Ausgabe keine Bruchteile von Cent enthält
+    return np.rint(sums / counts).astype(np.int64)
+
+
+def grouped_by_month(user_id, start=None, end=None):
+    query = (
+        select(MonthlyTotal.month, MonthlyTotal.transaction_type, func.sum(MonthlyTotal.total_cents))
+        .where(MonthlyTotal.user_id == user_id)
+        .group_by(MonthlyTotal.month, MonthlyTotal.transaction_type)
+    )
+    if start is not None:
+        query = query.where(MonthlyTotal.month >= start)
+    if end is not None:
+        query = query.where(MonthlyTotal.month <= end)
+    return db.session.execute(query).all()
+
+
+def income_expense_grid(rows, first=None, last=None):
+    """Verteilt gruppierte Zeilen auf ein lückenloses Monatsraster."""
+    months = month_index([as_month(row[0]) for row in rows])
+    totals = np.fromiter((row[2] for row in rows), dtype=np.int64, count=len(rows))
+    is_income = np.fromiter((row[1] == "income" for row in rows), dtype=bool, count=len(rows))
+    first = months.min() if first is None else first
+    last = months.max() if last is None else last
+
+    income = np.zeros(last - first + 1, dtype=np.int64)
+    expense = np.zeros(last - first + 1, dtype=np.int64)
+    np.add.at(income, months[is_income] - first, totals[is_income])
+    np.add.at(expense, months[~is_income] - first, totals[~is_income])
+    return first, income, expense
+
+
+def cash_flow(user_id, start=None, end=None, window=3):
+    """Einnahmen, Ausgaben, Saldo, kumulierter Saldo und gleitender Durchschnitt je Monat."""
+    start, end = as_month(start), as_month(end)
+    rows = grouped_by_month(user_id, start, end)
+    if not rows:
+        return []
+    first, income, expense = income_expense_grid(
+        rows,
+        month_index([start])[0] if start else None,
+        month_index([end])[0] if end else None,
+    )
+    net = income - expense
+    cumulative = np.cumsum(net)
+    rolling = rolling_mean(net, window)
+
+    return [
+        {"month": month_label(first + i), "income": inc, "expense": exp, "net": n,
+         "cumulative_net": cum, "rolling_net": roll}
+        for i, (inc, exp, n, cum, roll) in enumerate(zip(
+            euros(income), euros(expense), euros(net), euros(cumulative), euros(rolling),
+        ))
+    ]
+
+
+def top_categories(user_id, start=None, end=None, transaction_type="expense", limit=10):
+    """Kategorien nach Summe, mit Anteil und kumuliertem Anteil in Prozent."""
+    start, end = as_month(start), as_month(end)
+    total = func.sum(MonthlyTotal.total_cents)
+    query = (
+        select(MonthlyTotal.category_id, total, func.sum(MonthlyTotal.transaction_count))
+        .where(MonthlyTotal.user_id == user_id, MonthlyTotal.transaction_type == transaction_type)
+        .group_by(MonthlyTotal.category_id)
+        .order_by(total.desc())
+    )
+    if start is not None:
+        query = query.where(MonthlyTotal.month >= start)
+    if end is not None:
+        query = query.where(MonthlyTotal.month <= end)
+    rows = db.session.execute(query).all()
+    if not rows:
+        return []
+
+    totals = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+    grand_total = totals.sum()
+    shares = totals / grand_total * 100 if grand_total else np.zeros_like(totals)
+    cumulative = np.cumsum(shares)
+
+    return [
+        {"category": category_name(row[0]), "total": t, "count": row[2], "share": s, "cumulative_share": c}
+        for row, t, s, c in zip(
+            rows[:limit], euros(totals), shares.round(2).tolist(), cumulative.round(2).tolist()
+        )
+    ]
+
+
+def year_over_year(user_id, year):
+    """Monatliche Einnahmen/Ausgaben von ``year`` im Vergleich zum Vorjahr."""
+    rows = grouped_by_month(user_id, date(year - 1, 1, 1), date(year, 12, 1))
+    first = (year - 1) * 12
+    if rows:
+        _, income, expense = income_expense_grid(rows, first, first + 23)
+    else:
+        income = expense = np.zeros(24, dtype=np.int64)
+    income, expense = income.reshape(2, 12), expense.reshape(2, 12)
+
+    def change(values):
+        previous, current = values
+        delta = current - previous
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percent = np.where(previous != 0, delta / previous * 100, np.nan)
+        return delta, percent
+
+    income_delta, income_pct = change(income)
+    expense_delta, expense_pct = change(expense)
+
+    def clean(values):
+        return [None if np.isnan(v) else round(float(v), 2) for v in values]
+
+    return {
+        "year": year,
+        "months": [f"{m:02d}" for m in range(1, 13)],
+        "income": {"previous": euros(income[0]), "current": euros(income[1]),
+                   "change": euros(income_delta), "change_percent": clean(income_pct)},
+        "expense": {"previous": euros(expense[0]), "current": euros(expense[1]),
+                    "change": euros(expense_delta), "change_percent": clean(expense_pct)},
+        "totals": {
+            "income": euros(income.sum(axis=1)),
+            "expense": euros(expense.sum(axis=1)),
+        },
+    }
@@ -0,0 +1,89 @@
+# app/analytics_api.py
+from datetime import date
+
+from flask import Blueprint, abort, jsonify, make_response, request, session
+
+from .conditional import conditional
+from .replicas import read_only
+
+analytics = Blueprint('analytics', __name__, url_prefix='/api/analytics')
+
+
+def reports():
+    # NumPy erst beim ersten Auswertungs-Request laden, nicht beim App-Start
+    from . import analytics as module
+    return module
+
+
+def forecasts():
+    from . import forecast as module
+    return module
+
+
+@analytics.before_request
+def require_login():
+    if "user_id" not in session:
+        return jsonify(error="Nicht angemeldet"), 401
+
+
+def invalid_argument():
+    # Nur für geprüfte Query-Parameter; andere Fehler der Auswertung bleiben ein 500
+    abort(make_response(jsonify(error="Ungültiger Parameter"), 400))
+
+
+def month_args():
+    # ?start=2024-01&end=2024-12 (Monate, jeweils inklusive)
+    as_month = reports().as_month
+    try:
+        return as_month(request.args.get("start")), as_month(request.args.get("end"))
+    except ValueError:
+        invalid_argument()
+
+
+# Einnahmen und Ausgaben je Monat
+@analytics.route("/cash-flow")
+@read_only
+@conditional
+def cash_flow():
+    start, end = month_args()
+    window = request.args.get("window", 3, type=int)
+    if window < 1:
+        invalid_argument()
+    return jsonify(months=reports().cash_flow(session["user_id"], start, end, window))
+
+
+# Kategorien nach Summe
+@analytics.route("/categories")
+@read_only
+@conditional
+def categories():
+    start, end = month_args()
+    transaction_type = request.args.get("type", "expense")
+    if transaction_type not in ("income", "expense"):
+        invalid_argument()
+    limit = request.args.get("limit", 10, type=int)
+    return jsonify(categories=reports().top_categories(session["user_id"], start, end, transaction_type, limit))
+
+
+# Vorjahresvergleich
+@analytics.route("/year-over-year")
+@read_only
+@conditional
+def year_over_year():
+    year = request.args.get("year", date.today().year, type=int)
+    # Das Vorjahr muss sich noch als date darstellen lassen
+    if not date.min.year < year <= date.max.year:
+        invalid_argument()
+    return jsonify(reports().year_over_year(session["user_id"], year))
+
+
+# Kontostandsprognose aus den Daueraufträgen (3 bis 24 Monate)
+@analytics.route("/forecast")
+@read_only
+@conditional
+def forecast():
+    module = forecasts()
+    months = request.args.get("months", 12, type=int)
+    if not module.MIN_MONTHS <= months <= module.MAX_MONTHS:
+        invalid_argument()
+    return jsonify(module.cached_forecast(session["user_id"], months))
@@ -0,0 +1,136 @@
+# app/budgets.py
+# Ausgaben je Budgetzeitraum als inkrementell gepflegte Rollup-Tabelle.
+from collections import defaultdict, namedtuple
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from sqlalchemy import and_, case, or_, select
+
+from . import db
+from .dialects import dialect_insert
+from .models import Budget, BudgetRollup, Transaction, bump_data_version, bump_all_data_versions
+from .money import Money
+
+PERIODS = ("wöchentlich", "monatlich", "jährlich")
+
+BudgetStatus = namedtuple("BudgetStatus", ["budget", "spent", "remaining", "percent_used"])
+
+
+def period_start(day, period):
+    if isinstance(day, datetime):
+        day = day.date()
+    if period == "wöchentlich":
+        return day - timedelta(days=day.weekday())
+    if period == "monatlich":
+        return day.replace(day=1)
+    if period == "jährlich":
+        return day.replace(month=1, day=1)
+    raise ValueError(f"Unbekannter Zeitraum: {period!r}")
+
+
+@lru_cache(maxsize=4096)
+def period_starts(day):
+    return tuple((period, period_start(day, period)) for period in PERIODS)
+
+
+def rollup_deltas(rows, sign=1):
+    """Summiert Ausgaben je (user_id, category_id, period, period_start).
+
+    ``rows`` sind Tupel (user_id, category_id, transaction_type, amount_cents, date);
+    Einnahmen zählen nicht.
+    """
+    deltas = defaultdict(int)
+    for user_id, category_id, transaction_type, amount, day in rows:
+        if transaction_type != "expense":
+            continue
+        if isinstance(day, datetime):
+            day = day.date()
+        for period, start in period_starts(day):
+            deltas[(user_id, category_id, period, start)] += sign * amount
+    return deltas
+
+
+def apply_deltas(deltas):
+    # Ein einziges executemany-Upsert für alle betroffenen Rollups, kein Commit
+    if not deltas:
+        return
+    table = BudgetRollup.__table__
+    insert = dialect_insert(table)
+    upsert = insert.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.category_id, table.c.period, table.c.period_start],
+        set_={"spent_cents": table.c.spent_cents + insert.excluded.spent_cents},
+    )
+    db.session.execute(upsert, [
+        {"user_id": user_id, "category_id": category_id, "period": period, "period_start": start, "spent_cents": spent}
+        for (user_id, category_id, period, start), spent in deltas.items()
+    ])
+
+
+def budget_statuses(user_id, budgets, today=None):
+    """Ausgegeben / übrig / % verbraucht je Budget für den aktuellen Zeitraum.
+
+    Eine einzige Abfrage über den Primärschlüssel der Rollup-Tabelle.
+    """
+    if not budgets:
+        return []
+    today = today or date.today()
+    starts = {period: period_start(today, period) for period in {b.period for b in budgets}}
+    rows = db.session.execute(
+        select(BudgetRollup.category_id, BudgetRollup.period, BudgetRollup.spent_cents).where(
+            BudgetRollup.user_id == user_id,
+            or_(*(and_(BudgetRollup.period == period, BudgetRollup.period_start == start)
+                  for period, start in starts.items())),
+        )
+    ).all()
+    spent_by_key = {(row.category_id, row.period): row.spent_cents for row in rows}
+    return [make_status(budget, spent_by_key.get((budget.category_id, budget.period), 0)) for budget in budgets]
+
+
+def user_budget_statuses(user_id, today=None):
+    """Wie ``budget_statuses``, lädt Budgets und Rollups aber in einer Abfrage (LEFT JOIN)."""
+    today = today or date.today()
+    current_start = case({period: period_start(today, period) for period in PERIODS}, value=Budget.period)
+    rows = db.session.execute(
+        select(Budget, BudgetRollup.spent_cents)
+        .outerjoin(BudgetRollup, and_(
+            BudgetRollup.user_id == Budget.user_id,
+            BudgetRollup.category_id == Budget.category_id,
+            BudgetRollup.period == Budget.period,
+            BudgetRollup.period_start == current_start,
+        ))
+        .where(Budget.user_id == user_id)
+        .order_by(Budget.id)
+    ).all()
+    return [make_status(budget, spent_cents or 0) for budget, spent_cents in rows]
+
+
+def make_status(budget, spent_cents):
+    spent = Money(spent_cents, budget.amount.currency)
+    percent = spent.cents / budget.amount.cents * 100 if budget.amount else 0.0
+    return BudgetStatus(budget, spent, budget.amount - spent, percent)
+
+
+def rebuild_rollups(user_id=None, chunk_size=10000):
+    """Berechnet die Rollups aus den Transaktionen neu (Reparatur)."""
+    table = Transaction.__table__
+    rollups = BudgetRollup.__table__
+    delete = rollups.delete()
+    query = select(table.c.user_id, table.c.category_id, table.c.transaction_type,
+                   table.c.amount_cents, table.c.date).where(table.c.transaction_type == "expense")
+    if user_id is not None:
+        delete = delete.where(rollups.c.user_id == user_id)
+        query = query.where(table.c.user_id == user_id)
+
+    db.session.execute(delete)
+    result = db.session.execute(query.execution_options(stream_results=True, yield_per=chunk_size))
+    deltas = defaultdict(int)
+    for partition in result.partitions():
+        for key, spent in rollup_deltas(partition).items():
+            deltas[key] += spent
+    apply_deltas(deltas)
+    if user_id is not None:
+        bump_data_version(user_id)
+    else:
+        bump_all_data_versions()
+    db.session.commit()
+    return len(deltas)
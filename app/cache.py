@@ -0,0 +1,209 @@
+# app/cache.py
+# Austauschbarer Cache für Dashboard-Daten: In-Process-LRU mit TTL oder ein
+# lokaler memcached-kompatibler Server über Unix-Socket/TCP.
+import hashlib
+import hmac
+import pickle
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.errors = 0
+
+    def incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def as_dict(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "errors": self.errors,
+        }
+
+
+class NullCache:
+    backend = "none"
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    def get(self, key):
+        self.stats.incr("misses")
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def info(self):
+        return {"backend": self.backend, **self.stats.as_dict()}
+
+
+class LRUCache:
+    """Threadsicherer LRU-Cache mit fester Größe und Ablaufzeit pro Eintrag."""
+
+    backend = "lru"
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    return value
+                del self._entries[key]
+                self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def info(self):
+        return {"backend": self.backend, "entries": len(self), "max_entries": self.max_entries,
+                **self.stats.as_dict()}
+
+
+class SocketCache:
+    """Client für einen lokalen memcached (Textprotokoll).
+
+    ``address`` ist ``unix:/pfad/zum/socket`` oder ``host:port``. Jeder Thread
+    hält eine eigene Verbindung. Fehler der Gegenstelle zählen als Miss, damit
+    ein ausgefallener Cache-Server die Anwendung nicht mitreißt.
+
+    Werte werden mit ``secret`` signiert (HMAC-SHA256) und nur mit gültiger
+    Signatur entpickelt; andere Prozesse am selben Socket können so keine
+    Objekte einschleusen.
+    """
+
+    backend = "socket"
+    MAX_KEY_LENGTH = 250
+
+    def __init__(self, address, secret, ttl=300, timeout=0.25):
+        self.address = address
+        self._secret = secret.encode() if isinstance(secret, str) else secret
+        self.ttl = ttl
+        self.timeout = timeout
+        self.stats = CacheStats()
+        self._local = threading.local()
+
+    def _connect(self):
+        if self.address.startswith("unix:"):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            target = self.address[len("unix:"):]
+        else:
+            host, port = self.address.rsplit(":", 1)
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            target = (host, int(port))
+        sock.settimeout(self.timeout)
+        sock.connect(target)
+        return sock.makefile("rwb")
+
+    def _stream(self):
+        stream = getattr(self._local, "stream", None)
+        if stream is None:
+            stream = self._local.stream = self._connect()
+        return stream
+
+    def _reset(self):
+        stream = getattr(self._local, "stream", None)
+        self._local.stream = None
+        if stream is not None:
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+    def _key(self, key):
+        # Das Textprotokoll trennt mit Leerzeichen und Zeilenenden: solche Schlüssel würden Befehle einschleusen
+        raw = key.encode()
+        if not raw or len(raw) > self.MAX_KEY_LENGTH or any(byte <= 32 or byte == 127 for byte in raw):
+            raise ValueError(f"Ungültiger Cache-Schlüssel: {key!r}")
+        return raw
+
+    def _sign(self, payload):
+        return hmac.new(self._secret, payload, hashlib.sha256).digest()
+
+    def get(self, key):
+        raw = self._key(key)
+        try:
+            stream = self._stream()
+            stream.write(b"get " + raw + b"\r\n")
+            stream.flush()
+            header = stream.readline()
+            if header.startswith(b"VALUE "):
+                size = int(header.split()[3])
+                payload = stream.read(size + 2)[:-2]
+                stream.readline()  # END
+                signature, payload = payload[:32], payload[32:]
+                if hmac.compare_digest(signature, self._sign(payload)):
+                    self.stats.incr("hits")
+                    return pickle.loads(payload)
+                # Nicht von uns geschrieben: nie entpickeln
+                self.stats.incr("errors")
+                self.stats.incr("misses")
+                return None
+            if header != b"END\r\n":
+                raise OSError(f"Unerwartete Antwort: {header!r}")
+        except (OSError, ValueError, pickle.UnpicklingError):
+            self._reset()
+            self.stats.incr("errors")
+        self.stats.incr("misses")
+        return None
+
+    def set(self, key, value):
+        raw = self._key(key)
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        payload = self._sign(payload) + payload
+        try:
+            stream = self._stream()
+            stream.write(b"set %s 0 %d %d\r\n" % (raw, self.ttl, len(payload)))
+            stream.write(payload + b"\r\n")
+            stream.flush()
+            if stream.readline() != b"STORED\r\n":
+                raise OSError("Wert wurde nicht gespeichert")
+        except OSError:
+            self._reset()
+            self.stats.incr("errors")
+
+    def info(self):
+        return {"backend": self.backend, "address": self.address, **self.stats.as_dict()}
+
+
+def init_cache(app):
+    backend = app.config["CACHE_BACKEND"]
+    if backend == "lru":
+        cache = LRUCache(app.config["CACHE_MAX_ENTRIES"], app.config["CACHE_TTL"])
+    elif backend == "socket":
+        cache = SocketCache(app.config["CACHE_SOCKET"], app.config["SECRET_KEY"], app.config["CACHE_TTL"])
+    elif backend == "none":
+        cache = NullCache()
+    else:
+        raise ValueError(f"Unbekanntes Cache-Backend: {backend!r}")
+    app.extensions["cache"] = cache
+    return cache
@@ -0,0 +1,224 @@
+# app/categories.py
+# Kategorien als Dimensionstabelle: jeder Name steht je Benutzer genau einmal
+# in ``category``; Transaktionen, Daueraufträge, Budgets und die Aggregate
+# speichern nur die Integer-ID. Vergleiche, Joins und Indizes laufen damit über
+# Zahlen statt über bis zu 100 Zeichen lange Strings.
+#
+# Beim Schreiben werden Namen "interniert" (``category_ids``): bekannte IDs
+# kommen aus dem Cache, fehlende werden per Upsert angelegt. Zum Anzeigen
+# übersetzt ``category_name`` eine ID zurück; ein Fehlschlag lädt das (kleine)
+# Vokabular des Benutzers komplett nach. IDs gelten nur innerhalb eines Shards
+# (app/sharding.py), der Cache führt sie daher je Shard.
+#
+# Kategorien werden nie umbenannt, ein Umzug in einen anderen Shard vergibt
+# aber neue IDs und löscht die alten. Jeder Eintrag merkt sich daher die
+# ``data_version`` des Benutzers, zu der er geladen wurde; weicht sie ab,
+# wird er verworfen (``check_version``, einmal pro Request bzw. Job).
+# ``move_user`` leert die Einträge des Benutzers im eigenen Prozess sofort.
+import threading
+from collections import OrderedDict
+
+from flask import current_app, g, has_app_context, has_request_context, session
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from . import db
+from .dialects import insert_ignoring_duplicates
+from .models import Category, UserState
+
+
+class CategoryCache:
+    """Threadsicherer Cache ID <-> Name, verdrängt wird je Benutzer (LRU)."""
+
+    def __init__(self, max_users=10000):
+        self.max_users = max_users
+        self._users = OrderedDict()  # (Shard, user_id) -> {Name: ID}
+        self._versions = {}  # (Shard, user_id) -> data_version beim Laden (None: unbekannt)
+        self._names = {}  # (Shard, ID) -> Name
+        self._lock = threading.Lock()
+
+    def get_id(self, user_id, name, shard=None):
+        with self._lock:
+            ids = self._users.get((shard, user_id))
+            if ids is None:
+                return None
+            self._users.move_to_end((shard, user_id))
+            return ids.get(name)
+
+    def get_name(self, category_id, shard=None):
+        return self._names.get((shard, category_id))
+
+    def add(self, user_id, pairs, shard=None, version=None):
+        # pairs: (Name, ID); Einträge einer anderen Version werden dabei ersetzt
+        with self._lock:
+            key = (shard, user_id)
+            if key in self._users and self._versions.get(key) != version:
+                self._drop(key)
+            ids = self._users.setdefault(key, {})
+            self._versions[key] = version
+            self._users.move_to_end(key)
+            for name, category_id in pairs:
+                ids[name] = category_id
+                self._names[shard, category_id] = name
+            while len(self._users) > self.max_users:
+                self._drop(next(iter(self._users)))
+
+    def _drop(self, key):
+        ids = self._users.pop(key)
+        self._versions.pop(key, None)
+        for category_id in ids.values():
+            self._names.pop((key[0], category_id), None)
+
+    def check(self, user_id, version, shard=None):
+        """Verwirft die Einträge des Benutzers, wenn sie zu einer anderen ``version`` gehören."""
+        with self._lock:
+            key = (shard, user_id)
+            if key in self._users and self._versions.get(key) != version:
+                self._drop(key)
+
+    def advance(self, user_id, version, shard=None):
+        # Eigener Schreibzugriff hat die Version von version - 1 auf version gehoben: die IDs bleiben gültig
+        with self._lock:
+            key = (shard, user_id)
+            if key in self._users and self._versions.get(key) == version - 1:
+                self._versions[key] = version
+
+    def evict(self, user_id):
+        """Verwirft die Einträge des Benutzers in allen Shards."""
+        with self._lock:
+            for key in [key for key in self._users if key[1] == user_id]:
+                self._drop(key)
+
+    def __len__(self):
+        return len(self._names)
+
+
+def init_categories(app):
+    cache = CategoryCache(app.config["CATEGORY_CACHE_USERS"])
+    app.extensions["categories"] = cache
+
+    # Geprüft wird je Request; in Tests teilen sich Requests sonst den App-Kontext
+    app.teardown_request(lambda error=None: forget_checked_versions())
+
+    return cache
+
+
+def cache():
+    return current_app.extensions["categories"]
+
+
+def current_shard():
+    # Der für die Session gewählte Shard (None ohne Sharding)
+    return db.session.info.get("shard")
+
+
+def normalize(name):
+    # Leerraum am Rand und mehrfache Leerzeichen ergeben keine eigene Kategorie
+    return " ".join((name or "").split())
+
+
+def load_version(user_id):
+    if has_request_context() and session.get("user_id") == user_id:
+        # Dieselbe Zeile, die conditional für den ETag lädt
+        from .conditional import user_state
+        return user_state(user_id).data_version
+    return db.session.execute(select(UserState.data_version).where(UserState.user_id == user_id)).scalar() or 0
+
+
+def check_version(user_id):
+    """Prüft den Cache gegen die data_version des Benutzers und liefert sie.
+
+    Höchstens einmal je Benutzer und Request bzw. Job (``forget_checked_versions``).
+    """
+    versions = g.setdefault("category_versions", {})
+    if user_id not in versions:
+        versions[user_id] = load_version(user_id)
+        cache().check(user_id, versions[user_id], current_shard())
+    return versions[user_id]
+
+
+def forget_checked_versions():
+    # Am Ende eines Requests bzw. vor jedem Job: danach wird wieder geprüft
+    g.pop("category_versions", None)
+
+
+# Neu angelegte Kategorien kommen erst nach dem Commit in den Cache, sonst
+# blieben nach einem Rollback IDs stehen, die es nicht gibt.
+# Danach rücken die Einträge mit eigenen Schreibzugriffen (``bump_data_version``) mit,
+# nur fremde Änderungen der data_version verwerfen sie.
+@event.listens_for(Session, "after_commit")
+def publish_new_categories(session):
+    for categories, user_id, rows, shard, version in session.info.pop("new_categories", ()):
+        categories.add(user_id, rows, shard, version)
+    bumped = session.info.pop("bumped_versions", ())
+    if bumped and has_app_context():
+        for shard, user_id, version in bumped:
+            cache().advance(user_id, version, shard)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_new_categories(session):
+    session.info.pop("new_categories", None)
+    session.info.pop("bumped_versions", None)
+
+
+def load_user(user_id):
+    """Alle Kategorien eines Benutzers als {Name: ID} (eine Abfrage)."""
+    version = check_version(user_id)
+    rows = db.session.execute(select(Category.name, Category.id).where(Category.user_id == user_id)).all()
+    if not db.session.info.get("new_categories"):
+        cache().add(user_id, rows, current_shard(), version)
+    return dict(rows)
+
+
+def category_ids(user_id, names):
+    """{Name: ID} für ``names``; fehlende Kategorien werden angelegt, kein Commit.
+
+    Die Namen werden normalisiert, die Schlüssel im Ergebnis sind die
+    normalisierten Namen.
+    """
+    names = {normalize(name) for name in names}
+    if "" in names:
+        raise ValueError("Kategorie fehlt")
+    categories, shard, version = cache(), current_shard(), check_version(user_id)
+    found = {name: categories.get_id(user_id, name, shard) for name in names}
+    missing = [name for name, category_id in found.items() if category_id is None]
+    if missing:
+        db.session.execute(insert_ignoring_duplicates(Category.__table__), [
+            {"user_id": user_id, "name": name, "transaction_count": 0} for name in missing
+        ])
+        rows = db.session.execute(
+            select(Category.name, Category.id).where(Category.user_id == user_id, Category.name.in_(missing))
+        ).all()
+        db.session.info.setdefault("new_categories", []).append((categories, user_id, rows, shard, version))
+        found.update(rows)
+    return found
+
+
+def category_id(user_id, name):
+    return category_ids(user_id, [name])[normalize(name)]
+
+
+def find_category_id(user_id, name):
+    """ID einer vorhandenen Kategorie oder None; legt nichts an."""
+    name = normalize(name)
+    check_version(user_id)
+    category_id = cache().get_id(user_id, name, current_shard())
+    if category_id is None:
+        category_id = load_user(user_id).get(name)
+    return category_id
+
+
+def category_name(category_id):
+    """Name zur ID; bei einem Fehlschlag wird das Vokabular des Besitzers geladen."""
+    if category_id is None:
+        return None
+    # Seiten zeigen die Kategorien des angemeldeten Benutzers
+    if has_request_context() and session.get("user_id") is not None:
+        check_version(session["user_id"])
+    name = cache().get_name(category_id, current_shard())
+    if name is None:
+        user_id = db.session.execute(select(Category.user_id).where(Category.id == category_id)).scalar()
+        if user_id is not None:
+            name = {i: n for n, i in load_user(user_id).items()}.get(category_id)
+    return name
@@ -0,0 +1,321 @@
+# app/cli.py
+import click
+from flask import current_app
+
+from .models import User
+
+
+def find_user(user):
+    # Benutzer per ID oder Email auflösen; seine Daten liegen danach im gewählten Shard
+    from .sharding import use_shard
+
+    query = User.query.filter_by(id=int(user)) if user.isdigit() else User.query.filter_by(email=user)
+    found = query.first()
+    if found is None:
+        raise click.ClickException(f"Benutzer nicht gefunden: {user}")
+    use_shard(found.id)
+    return found
+
+
+background_option = click.option("--background", is_flag=True, help="Als Job an 'flask worker' übergeben")
+
+
+def enqueue_job(kind, payload):
+    from . import db
+    from .jobs import enqueue
+
+    # Mit Benutzer: der Worker wählt dessen Shard und wartet, solange er umzieht
+    job = enqueue(kind, payload, user_id=payload.get("user_id"))
+    db.session.commit()
+    click.echo(f"Job {job.id} eingereiht.")
+
+
+@click.command("import-transactions")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--user", "user", required=True, help="Benutzer-ID oder Email")
+@click.option("--format", "fmt", type=click.Choice(["csv", "ofx"]), default=None,
+              help="Dateiformat (Standard: anhand der Dateiendung)")
+@click.option("--batch-size", type=int, default=None, help="Zeilen pro INSERT-Batch")
+@click.option("--rejects", type=click.Path(dir_okay=False), default=None,
+              help="CSV-Datei für fehlerhafte Zeilen")
+def import_transactions_command(path, user, fmt, batch_size, rejects):
+    """Importiert Transaktionen aus einer CSV- oder OFX-Datei."""
+    from .importer import import_transactions, iter_rows, open_reject_writer
+
+    owner = find_user(user)
+    fmt = fmt or ("ofx" if path.lower().endswith((".ofx", ".qfx")) else "csv")
+    batch_size = batch_size or current_app.config["IMPORT_BATCH_SIZE"]
+
+    def report(stats):
+        click.echo(
+            f"Batch {stats.number}: {stats.rows} Zeilen in {stats.seconds:.3f}s "
+            f"({stats.rows / max(stats.seconds, 1e-9):,.0f} Zeilen/s), gesamt {stats.total_rows}"
+        )
+
+    reject_handle = open(rejects, "w", newline="", encoding="utf-8") if rejects else None
+    try:
+        reject_writer = open_reject_writer(reject_handle, fmt) if reject_handle else None
+        with open(path, newline="", encoding="utf-8-sig") as stream:
+            result = import_transactions(
+                owner.id, iter_rows(stream, fmt), batch_size, reject_writer, on_batch=report
+            )
+    finally:
+        if reject_handle:
+            reject_handle.close()
+
+    click.echo(
+        f"{result.imported} Transaktionen importiert, {result.rejected} abgelehnt, "
+        f"{result.seconds:.2f}s ({result.imported / max(result.seconds, 1e-9):,.0f} Zeilen/s)"
+    )
+
+
+@click.command("export-transactions")
+@click.option("--user", "user", required=True, help="Benutzer-ID oder Email")
+@click.option("--format", "fmt", type=click.Choice(["csv", "ndjson"]), default="csv")
+@click.option("--start", type=click.DateTime(["%Y-%m-%d"]), default=None, help="Erster Tag (inklusive)")
+@click.option("--end", type=click.DateTime(["%Y-%m-%d"]), default=None, help="Letzter Tag (inklusive)")
+@click.option("--output", type=click.File("w", encoding="utf-8", lazy=True), default="-",
+              help="Zieldatei (Standard: stdout)")
+def export_transactions_command(user, fmt, start, end, output):
+    """Exportiert die Transaktionen eines Benutzers als CSV oder NDJSON."""
+    from .exporter import export_chunks
+
+    owner = find_user(user)
+    for chunk in export_chunks(fmt, owner.id, start, end, current_app.config["EXPORT_CHUNK_SIZE"]):
+        output.write(chunk)
+
+
+@click.group("recurring")
+def recurring_group():
+    """Daueraufträge verwalten."""
+
+
+@recurring_group.command("run")
+@click.option("--workers", type=int, default=1, help="Anzahl Prozesse (aufgeteilt nach user_id)")
+@click.option("--chunk-size", type=int, default=None, help="Daueraufträge pro DB-Transaktion")
+@background_option
+def recurring_run_command(workers, chunk_size, background):
+    """Bucht alle fälligen Ausführungen von Daueraufträgen."""
+    from datetime import datetime
+    from .recurring import run_all_databases, run_shard
+
+    if background:
+        return enqueue_job("recurring", {})
+    chunk_size = chunk_size or current_app.config["RECURRING_CHUNK_SIZE"]
+    now = datetime.utcnow()
+    if workers <= 1:
+        results = [run_all_databases(now, chunk_size)]
+    else:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        database_uri = current_app.config["SQLALCHEMY_DATABASE_URI"]
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [
+                pool.submit(run_shard, database_uri, shard, workers, now, chunk_size)
+                for shard in range(workers)
+            ]
+            results = [future.result() for future in futures]
+
+    for shard, result in enumerate(results):
+        click.echo(
+            f"Shard {shard}: {result.rules} Daueraufträge, {result.created} Buchungen "
+            f"in {result.chunks} Chunks, {result.seconds:.2f}s"
+        )
+
+
+@click.group("budgets")
+def budgets_group():
+    """Budgets verwalten."""
+
+
+@budgets_group.command("rebuild-rollups")
+@click.option("--user", "user", default=None, help="Nur diesen Benutzer (ID oder Email)")
+@background_option
+def rebuild_rollups_command(user, background):
+    """Berechnet die Ausgaben-Rollups der Budgets aus den Transaktionen neu."""
+    from .budgets import rebuild_rollups
+    from .sharding import per_shard
+
+    user_id = find_user(user).id if user else None
+    if background:
+        return enqueue_job("rebuild", {"target": "budgets", "user_id": user_id})
+    count = per_shard(rebuild_rollups, user_id)
+    click.echo(f"{count} Rollups neu berechnet.")
+
+
+@click.group("analytics")
+def analytics_group():
+    """Auswertungen verwalten."""
+
+
+@analytics_group.command("rebuild")
+@click.option("--user", "user", default=None, help="Nur diesen Benutzer (ID oder Email)")
+@background_option
+def rebuild_analytics_command(user, background):
+    """Berechnet die Monatssummen für Auswertungen aus den Transaktionen neu."""
+    from .monthly_totals import rebuild_monthly_totals
+    from .sharding import per_shard
+
+    user_id = find_user(user).id if user else None
+    if background:
+        return enqueue_job("rebuild", {"target": "monthly_totals", "user_id": user_id})
+    count = per_shard(rebuild_monthly_totals, user_id)
+    click.echo(f"{count} Monatssummen neu berechnet.")
+
+
+@click.group("search")
+def search_group():
+    """Suchindex verwalten."""
+
+
+@search_group.command("rebuild-index")
+@click.option("--user", "user", default=None, help="Nur diesen Benutzer (ID oder Email)")
+@background_option
+def rebuild_search_index_command(user, background):
+    """Berechnet das Kategorie-Vokabular für die Suche aus den Transaktionen neu."""
+    from .search import rebuild_search_index
+    from .sharding import per_shard
+
+    user_id = find_user(user).id if user else None
+    if background:
+        return enqueue_job("rebuild", {"target": "search", "user_id": user_id})
+    count = per_shard(rebuild_search_index, user_id)
+    click.echo(f"{count} Kategorien indexiert.")
+
+
+@click.group("savings")
+def savings_group():
+    """Sparziele verwalten."""
+
+
+@savings_group.command("rebuild")
+@click.option("--user", "user", default=None, help="Nur diesen Benutzer (ID oder Email)")
+@background_option
+def rebuild_savings_command(user, background):
+    """Berechnet den Stand aller Sparziele aus den Einzahlungen neu."""
+    from .savings import rebuild_savings
+    from .sharding import per_shard
+
+    user_id = find_user(user).id if user else None
+    if background:
+        return enqueue_job("rebuild", {"target": "savings", "user_id": user_id})
+    count = per_shard(rebuild_savings, user_id)
+    click.echo(f"{count} Sparziele neu berechnet.")
+
+
+@click.command("worker")
+@click.option("--threads", type=int, default=None, help="Anzahl Worker-Threads in diesem Prozess")
+@click.option("--burst", is_flag=True, help="Beenden, sobald die Queue leer ist")
+@click.option("--poll-interval", type=float, default=None, help="Sekunden zwischen Abfragen einer leeren Queue")
+def worker_command(threads, burst, poll_interval):
+    """Arbeitet Hintergrund-Jobs ab; mehrere Prozesse dürfen parallel laufen."""
+    from .jobs import run_worker
+
+    config = current_app.config
+    threads = threads or config["WORKER_THREADS"]
+    click.echo(f"Worker gestartet ({threads} Threads).")
+    processed = run_worker(current_app._get_current_object(), threads, burst,
+                           poll_interval or config["WORKER_POLL_INTERVAL"])
+    click.echo(f"{processed} Jobs abgearbeitet.")
+
+
+@click.group("jobs")
+def jobs_group():
+    """Hintergrund-Jobs verwalten."""
+
+
+@jobs_group.command("prune")
+def jobs_prune_command():
+    """Löscht abgeschlossene Jobs nach JOB_RESULT_TTL samt Uploads und Exportdateien."""
+    from .jobs import prune_jobs
+
+    click.echo(f"{prune_jobs()} Jobs gelöscht.")
+
+
+@click.group("shards")
+def shards_group():
+    """Shards der Benutzerdaten verwalten."""
+
+
+@shards_group.command("init")
+def shards_init_command():
+    """Legt in jedem Shard die Tabellen der Benutzerdaten an."""
+    from .sharding import init_shard_schema
+
+    names = init_shard_schema()
+    if not names:
+        raise click.ClickException("Kein Sharding konfiguriert (SHARD_DATABASE_URIS).")
+    click.echo(f"{len(names)} Shards eingerichtet: {', '.join(names)}")
+
+
+@shards_group.command("status")
+def shards_status_command():
+    """Zeigt, wie viele Benutzer jedem Shard zugeordnet sind."""
+    from .sharding import shard_counts
+
+    for name, count in shard_counts().items():
+        click.echo(f"{name}: {count} Benutzer")
+
+
+@shards_group.command("move")
+@click.option("--user", "user", required=True, help="Benutzer-ID oder Email")
+@click.option("--to", "target", required=True, help="Ziel-Shard, z.B. shard1")
+@click.option("--wait", type=float, default=None,
+              help="Sekunden zwischen Sperren und Kopieren (Standard: SHARD_MAP_TTL)")
+@click.option("--jobs-timeout", type=float, default=None,
+              help="Höchstens so lange auf laufende Jobs des Benutzers warten (Standard: JOB_LEASE_SECONDS)")
+def shards_move_command(user, target, wait, jobs_timeout):
+    """Verschiebt alle Daten eines Benutzers im laufenden Betrieb in einen anderen Shard."""
+    from .sharding import JobsStillRunning, assignment, move_user
+
+    owner = find_user(user)
+    source = assignment(owner.id).shard
+    try:
+        counts = move_user(owner.id, target, wait, current_app.config["IMPORT_BATCH_SIZE"], jobs_timeout)
+    except (ValueError, JobsStillRunning) as e:
+        raise click.ClickException(str(e))
+    if not counts:
+        click.echo(f"Benutzer {owner.id} liegt bereits in {target}.")
+        return
+    click.echo(f"Benutzer {owner.id}: {sum(counts.values())} Zeilen von {source} nach {target} verschoben.")
+
+
+@click.group("replicas")
+def replicas_group():
+    """Lesereplikate verwalten."""
+
+
+@replicas_group.command("sync")
+@click.option("--interval", type=float, default=None,
+              help="Immer wieder kopieren, alle N Sekunden (simuliert die Verzögerung echter Replikate)")
+def replicas_sync_command(interval):
+    """Kopiert die primären SQLite-Datenbanken in ihre Replikate (lokaler Ersatz für Replikation)."""
+    import time
+    from .replicas import sync_sqlite_replicas
+
+    if "replicas" not in current_app.extensions:
+        raise click.ClickException("Keine Replikate konfiguriert (DATABASE_REPLICAS).")
+    while True:
+        try:
+            copies = sync_sqlite_replicas()
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"{copies} Replikate aktualisiert.")
+        if interval is None:
+            return
+        time.sleep(interval)
+
+
+def register_commands(app):
+    app.cli.add_command(import_transactions_command)
+    app.cli.add_command(export_transactions_command)
+    app.cli.add_command(recurring_group)
+    app.cli.add_command(budgets_group)
+    app.cli.add_command(analytics_group)
+    app.cli.add_command(search_group)
+    app.cli.add_command(savings_group)
+    app.cli.add_command(worker_command)
+    app.cli.add_command(jobs_group)
+    app.cli.add_command(shards_group)
+    app.cli.add_command(replicas_group)
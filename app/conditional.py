@@ -0,0 +1,146 @@
+# app/conditional.py
+# Bedingte GETs für Seiten und JSON-Antworten, die nur von den Daten eines
+# Benutzers abhängen.
+#
+# Jeder Schreibzugriff erhöht ``user_state.data_version`` und setzt ``updated_at``
+# (``bump_data_version``). Daraus, dem Pfad samt Query-String, dem Datum und
+# dem Stand des Codes entsteht ein starker ETag. Passt ``If-None-Match`` (oder
+# ``If-Modified-Since``), antwortet ``conditional`` mit 304, bevor die View
+# läuft: die einzige Abfrage ist dann ``user_state`` über den Primärschlüssel
+# (ohne Sharding zusammen mit dem Benutzer, damit gelöschte Benutzer auffallen).
+# Last-Modified ist nie älter als der Tagesbeginn und das Deployment, denn
+# auch ein neuer Tag (Budgetzeiträume, Prognose) oder neuer Code ändern die Seite.
+import functools
+import hashlib
+import os
+from collections import namedtuple
+from datetime import date, datetime, time, timezone
+
+from flask import current_app, g, make_response, request, session
+from sqlalchemy import select
+
+from . import db
+from .models import User, UserState
+
+# Antworten gehören einem Benutzer: Browser dürfen sie speichern, müssen aber jedes Mal nachfragen
+CACHE_CONTROL = "private, no-cache"
+
+State = namedtuple("State", ["id", "data_version", "updated_at", "exists"])
+
+
+def user_state(user_id):
+    """(id, data_version, updated_at, exists) des Benutzers, höchstens einmal pro Request geladen."""
+    if "user_state" not in g:
+        g.user_state = load_state(user_id)
+    return g.user_state
+
+
+def load_state(user_id):
+    if current_app.extensions.get("shards"):
+        # user liegt in der Haupt-Datenbank, user_state im Shard des Benutzers: zwei Abfragen
+        exists = db.session.execute(select(User.id).where(User.id == user_id)).first() is not None
+        row = db.session.execute(
+            select(UserState.data_version, UserState.updated_at).where(UserState.user_id == user_id)
+        ).first()
+    else:
+        row = db.session.execute(
+            select(User.id, UserState.data_version, UserState.updated_at)
+            .outerjoin(UserState, UserState.user_id == User.id)
+            .where(User.id == user_id)
+        ).first()
+        exists, row = row is not None, row and row[1:]
+    # Noch nie geschrieben: Version 0, kein Änderungszeitpunkt
+    if row is None or row[0] is None:
+        return State(user_id, 0, None, exists)
+    return State(user_id, *row, exists)
+
+
+def scan_code(app):
+    # (Hash, jüngste Änderung in UTC) über alle .py- und .html-Dateien des Pakets, einmal pro Prozess
+    if "code_stamp" not in app.extensions:
+        package = os.path.dirname(os.path.abspath(__file__))
+        mtimes = sorted(
+            (os.path.relpath(os.path.join(root, name), package), os.stat(os.path.join(root, name)).st_mtime_ns)
+            for root, _, files in os.walk(package) for name in files if name.endswith((".py", ".html"))
+        )
+        newest = datetime.fromtimestamp(max(mtime for _, mtime in mtimes) / 1e9, timezone.utc)
+        app.extensions["code_stamp"] = (
+            hashlib.blake2b(repr(mtimes).encode(), digest_size=8).hexdigest(), newest.replace(tzinfo=None),
+        )
+    return app.extensions["code_stamp"]
+
+
+def code_version(app):
+    # Neue Templates oder neuer Code ändern die Seiten auch ohne Schreibzugriff. Alle
+    # Worker eines Deployments kommen auf denselben Wert, solange ETAG_SALT nicht gesetzt ist.
+    salt = app.config["ETAG_SALT"]
+    return scan_code(app)[0] if salt is None else salt
+
+
+def etag_for(state):
+    key = "{}:{}:{}:{}:{}".format(
+        code_version(current_app), state.id, state.data_version, date.today().isoformat(), request.full_path,
+    )
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def start_of_today():
+    # Wie im ETag gilt der lokale Tag; updated_at ist UTC
+    return datetime.combine(date.today(), time()).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def last_modified(state):
+    # Wie der ETag hängt auch Last-Modified am Tag und am Code: sonst bekäme ein Client, der
+    # nur If-Modified-Since schickt, am nächsten Tag oder nach einem Deployment weiter 304
+    if state.updated_at is None:
+        return None
+    modified = max(state.updated_at, start_of_today(), scan_code(current_app)[1]).replace(microsecond=0)
+    # Nur ganze Sekunden: liegt die letzte Änderung in der laufenden Sekunde, könnte
+    # eine weitere Änderung denselben Wert bekommen, dann gibt es keinen Last-Modified
+    return modified if modified < datetime.utcnow().replace(microsecond=0) else None
+
+
+def not_modified(etag, modified):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    since = request.if_modified_since
+    return modified is not None and since is not None and modified <= since.replace(tzinfo=None)
+
+
+def add_validators(response, etag, modified):
+    response.set_etag(etag)
+    if modified is not None:
+        response.last_modified = modified
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    response.vary.add("Cookie")
+    return response
+
+
+def init_conditional(app):
+    # Der Benutzer gilt nur für einen Request; in Tests teilen sich Requests sonst den App-Kontext
+    @app.teardown_request
+    def forget_user_state(error=None):
+        g.pop("user_state", None)
+
+
+def conditional(view):
+    """Beantwortet bedingte GETs eines angemeldeten Benutzers mit 304, ohne die View auszuführen."""
+    @functools.wraps(view)
+    def wrapped(*args, **kwargs):
+        user_id = session.get("user_id")
+        # Ausstehende Flash-Nachrichten gehören in die Seite, also immer neu ausliefern
+        if user_id is None or session.get("_flashes") or request.method != "GET":
+            return view(*args, **kwargs)
+        state = user_state(user_id)
+        # Unbekannte Benutzer bekommen weder 304 noch Validatoren, die View meldet sie ab
+        if not state.exists:
+            return view(*args, **kwargs)
+        etag, modified = etag_for(state), last_modified(state)
+        if not_modified(etag, modified):
+            return add_validators(current_app.response_class(status=304), etag, modified)
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            add_validators(response, etag, modified)
+        return response
+
+    return wrapped
@@ -0,0 +1,44 @@
+# app/dialects.py
+# Dialektspezifische SQL-Bausteine (ON CONFLICT, Datumsfunktionen) für SQLite und Postgres.
+from sqlalchemy import Date, cast, func
+from sqlalchemy.engine import make_url
+
+from . import db
+
+SUPPORTED_DIALECTS = ("sqlite", "postgresql")
+
+
+def check_dialects(config):
+    # Vor db.init_app aufrufen: andere Datenbanken fielen sonst erst beim ersten Schreibzugriff auf
+    binds = config.get("SQLALCHEMY_BINDS") or {}
+    uris = {None: config["SQLALCHEMY_DATABASE_URI"]}
+    uris.update((name, bind["url"] if isinstance(bind, dict) else bind) for name, bind in binds.items())
+    for name, uri in uris.items():
+        backend = make_url(uri).get_backend_name()
+        if backend not in SUPPORTED_DIALECTS:
+            raise ValueError(
+                f"Datenbank {name or 'main'}: {backend} wird nicht unterstützt (nur {', '.join(SUPPORTED_DIALECTS)})"
+            )
+
+
+def dialect_insert(table, bind=None):
+    # Ohne ``bind`` gilt der Dialekt der Session (bzw. des gewählten Shards)
+    dialect = (bind or db.session.get_bind()).dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f"ON CONFLICT wird für {dialect} nicht unterstützt")
+    return insert(table)
+
+
+def insert_ignoring_duplicates(table):
+    return dialect_insert(table).on_conflict_do_nothing()
+
+
+def month_start(column):
+    # Erster Tag des Monats, im selben Format, in dem ``db.Date`` gespeichert wird
+    if db.session.get_bind().dialect.name == "sqlite":
+        return func.strftime("%Y-%m-01", column)
+    return cast(func.date_trunc("month", column), Date)
@@ -0,0 +1,75 @@
+# app/engine.py
+# Engine-Profile: SQLite mit WAL und Pragmas, Server-Datenbanken mit Connection-Pool.
+#
+# Das Profil kommt aus DB_PROFILE ('auto' wählt anhand der URI). Die
+# Pool-Optionen müssen vor ``db.init_app`` in SQLALCHEMY_ENGINE_OPTIONS
+# stehen, die SQLite-Pragmas werden pro neuer Verbindung im connect-Event gesetzt.
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from . import db
+
+PROFILES = ("auto", "sqlite", "server", "none")
+
+
+def resolve_profile(config):
+    profile = config["DB_PROFILE"]
+    if profile not in PROFILES:
+        raise ValueError(f"Unbekanntes Engine-Profil: {profile!r}")
+    if profile == "auto":
+        backend = make_url(config["SQLALCHEMY_DATABASE_URI"]).get_backend_name()
+        return "sqlite" if backend == "sqlite" else "server"
+    return profile
+
+
+def engine_options(config):
+    """Pool-Einstellungen für das Server-Profil; explizite Optionen gewinnen."""
+    options = {}
+    if resolve_profile(config) == "server":
+        options = {
+            "pool_size": config["DB_POOL_SIZE"],
+            "max_overflow": config["DB_MAX_OVERFLOW"],
+            "pool_timeout": config["DB_POOL_TIMEOUT"],
+            "pool_recycle": config["DB_POOL_RECYCLE"],
+            "pool_pre_ping": config["DB_POOL_PRE_PING"],
+        }
+    options.update(config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    return options
+
+
+def sqlite_pragmas(config):
+    return (
+        ("journal_mode", config["SQLITE_JOURNAL_MODE"]),
+        ("synchronous", config["SQLITE_SYNCHRONOUS"]),
+        ("busy_timeout", config["SQLITE_BUSY_TIMEOUT_MS"]),
+        # Negativ bedeutet KiB statt Seiten
+        ("cache_size", -config["SQLITE_CACHE_SIZE_KB"]),
+        ("mmap_size", config["SQLITE_MMAP_SIZE"]),
+    )
+
+
+def watch_sqlite(engine, pragmas):
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def init_engine_options(app):
+    # Vor db.init_app aufrufen
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config)
+
+
+def init_engines(app):
+    # Nach db.init_app aufrufen
+    if resolve_profile(app.config) != "sqlite":
+        return
+    pragmas = sqlite_pragmas(app.config)
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite":
+                watch_sqlite(engine, pragmas)
@@ -0,0 +1,109 @@
+# app/exporter.py
+# Streaming-Export der Transaktionen eines Benutzers als CSV oder NDJSON.
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from . import db
+from .categories import category_name
+from .models import Transaction
+from .money import format_cents
+from .search import conditions
+
+# Beträge werden als exakte Dezimalzahl aus den Cent-Werten geschrieben, Kategorien mit Namen
+EXPORT_COLUMNS = ["id", "date", "amount", "currency", "category", "transaction_type", "frequency"]
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+
+def parse_day(value):
+    if not value:
+        return None
+    return datetime.strptime(value, "%Y-%m-%d")
+
+
+def iter_transaction_rows(user_id, start=None, end=None, chunk_size=1000, newest_first=False, filters=None):
+    """Liefert die Transaktionen als Tupel, ohne die Ergebnismenge komplett zu laden.
+
+    ``stream_results`` nutzt einen serverseitigen Cursor (sofern der Treiber
+    das kann), ``yield_per`` holt die Zeilen in Blöcken von ``chunk_size``.
+    ``end`` ist inklusive, es zählt der ganze Tag.
+    ``newest_first`` kehrt die Reihenfolge für die Listenansicht um,
+    ``filters`` (siehe ``app.search``) schränkt die Zeilen weiter ein.
+    """
+    table = Transaction.__table__
+    query = select(
+        table.c.id, table.c.date, table.c.amount_cents, table.c.currency,
+        table.c.category_id, table.c.transaction_type, table.c.frequency,
+    ).where(table.c.user_id == user_id)
+    if start is not None:
+        query = query.where(table.c.date >= start)
+    if end is not None:
+        query = query.where(table.c.date < end + timedelta(days=1))
+    if filters is not None:
+        query = query.where(*conditions(user_id, filters))
+    order = (table.c.date.desc(), table.c.id.desc()) if newest_first else (table.c.date, table.c.id)
+    query = query.order_by(*order).execution_options(
+        stream_results=True, yield_per=chunk_size
+    )
+    result = db.session.execute(query)
+    try:
+        for partition in result.partitions():
+            yield from partition
+    finally:
+        result.close()
+
+
+def csv_chunks(rows, chunk_size=1000):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # Kopfzeile sofort senden, noch bevor die Abfrage läuft
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+    pending = 0
+    for row in rows:
+        writer.writerow((row.id, row.date.isoformat(), format_cents(row.amount_cents), row.currency,
+                         category_name(row.category_id), row.transaction_type, row.frequency))
+        pending += 1
+        if pending >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue()
+
+
+def ndjson_chunks(rows, chunk_size=1000):
+    lines = []
+    for row in rows:
+        record = {
+            "id": row.id,
+            "date": row.date.isoformat(),
+            "amount": format_cents(row.amount_cents),
+            "currency": row.currency,
+            "category": category_name(row.category_id),
+            "transaction_type": row.transaction_type,
+            "frequency": row.frequency,
+        }
+        lines.append(json.dumps(record, ensure_ascii=False))
+        if len(lines) >= chunk_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def export_chunks(fmt, user_id, start=None, end=None, chunk_size=1000):
+    rows = iter_transaction_rows(user_id, start, end, chunk_size)
+    if fmt == "ndjson":
+        return ndjson_chunks(rows, chunk_size)
+    return csv_chunks(rows, chunk_size)
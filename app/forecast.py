@@ -0,0 +1,150 @@
+# app/forecast.py
+# Kontostandsprognose aus den Daueraufträgen.
+#
+# Alle aktiven Daueraufträge eines Benutzers werden auf einmal in Arrays von
+# Ausführungsdaten expandiert (NumPy, ohne Schleife über Regeln oder Tage) und
+# per ``np.add.at`` auf ein Tagesraster verteilt; ``cumsum`` ergibt daraus den
+# Kontostand je Tag. Gerechnet wird in ganzen Cent (int64).
+#
+# Das Ergebnis wird im App-Cache unter der ``data_version`` des Benutzers
+# abgelegt und gilt damit bis zum nächsten Schreibzugriff.
+from datetime import date
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from flask import current_app
+from sqlalchemy import case, func, select
+
+from . import db
+from .analytics import euros
+from .conditional import user_state
+from .models import MonthlyTotal, RecurringRule
+
+MIN_MONTHS = 3
+MAX_MONTHS = 24
+
+WEEKLY, MONTHLY, YEARLY = range(3)
+FREQUENCY_CODES = {"wöchentlich": WEEKLY, "monatlich": MONTHLY, "jährlich": YEARLY}
+EPOCH = date(1970, 1, 1).toordinal()
+
+
+def occurrence_days(start, frequency, first_index, end):
+    """Alle Ausführungen ab Nr. ``first_index`` bis einschließlich ``end``.
+
+    ``start`` (datetime64[D]), ``frequency`` (Codes) und ``first_index`` sind
+    Arrays mit einem Eintrag je Regel. Liefert (Regel-Index, Tag) als Arrays.
+    Wie ``recurring.occurrence_date`` wird jede Ausführung vom Startdatum aus
+    berechnet; der 31. wird in kürzeren Monaten zum Monatsletzten.
+    """
+    # Intern als Ganzzahlen (Tage bzw. Monate seit 1970), das ist deutlich schneller als datetime64
+    start_day = start.astype(np.int64)
+    start_month = start.astype("datetime64[M]")
+    day_of_month = start_day - start_month.astype("datetime64[D]").astype(np.int64)
+    start_month = start_month.astype(np.int64)
+    end_day = np.datetime64(end, "D").astype(np.int64)
+    end_month = np.datetime64(end, "M").astype(np.int64)
+    last_index = np.select(
+        [frequency == WEEKLY, frequency == MONTHLY],
+        [(end_day - start_day) // 7, end_month - start_month],
+        (end_month - start_month) // 12,
+    )
+    counts = np.clip(last_index - first_index + 1, 0, None)
+
+    # Für jede Ausführung: zu welcher Regel sie gehört und welche Nummer sie hat
+    rule = np.repeat(np.arange(len(start)), counts)
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    index = first_index[rule] + np.arange(len(rule)) - offsets
+
+    days = np.empty(len(rule), dtype=np.int64)
+    weekly = frequency[rule] == WEEKLY
+    days[weekly] = start_day[rule[weekly]] + 7 * index[weekly]
+
+    monthly = ~weekly
+    by_month = rule[monthly]
+    month = start_month[by_month] + np.where(frequency[by_month] == YEARLY, 12, 1) * index[monthly]
+    if len(month):
+        # Erster Tag jedes Monats im benötigten Bereich, daraus auch die Monatslänge
+        first_month = month.min()
+        first_days = np.arange(first_month, month.max() + 2).astype("datetime64[M]").astype("datetime64[D]")
+        first_days = first_days.astype(np.int64)
+        month_start = first_days[month - first_month]
+        month_length = first_days[month - first_month + 1] - month_start
+        days[monthly] = month_start + np.minimum(day_of_month[by_month], month_length - 1)
+
+    keep = days <= end_day
+    return rule[keep], days[keep].astype("datetime64[D]")
+
+
+def project(start_balance, rules, today, end):
+    """Kontostand je Tag von ``today`` bis ``end`` (Cent, int64).
+
+    ``rules``: (Startdatum, Häufigkeit, bereits erzeugte Ausführungen,
+    vorzeichenbehafteter Betrag in Cent). Überfällige, noch nicht gebuchte
+    Ausführungen zählen am ersten Tag.
+    """
+    length = (end - today).days + 1
+    net = np.zeros(length, dtype=np.int64)
+    rules = [rule for rule in rules if rule[1] in FREQUENCY_CODES]
+    if rules:
+        count = len(rules)
+        start = np.fromiter((r[0].toordinal() - EPOCH for r in rules), dtype=np.int64, count=count)
+        start = start.astype("datetime64[D]")
+        frequency = np.fromiter((FREQUENCY_CODES[r[1]] for r in rules), dtype=np.int64, count=count)
+        first_index = np.fromiter((r[2] for r in rules), dtype=np.int64, count=count)
+        amounts = np.fromiter((r[3] for r in rules), dtype=np.int64, count=count)
+        rule, days = occurrence_days(start, frequency, first_index, end)
+        offsets = np.maximum((days - np.datetime64(today, "D")).astype(np.int64), 0)
+        np.add.at(net, offsets, amounts[rule])
+    return net, start_balance + np.cumsum(net)
+
+
+def current_balance(user_id):
+    # Einnahmen minus Ausgaben über alle Monatssummen
+    signed = case((MonthlyTotal.transaction_type == "income", MonthlyTotal.total_cents),
+                  else_=-MonthlyTotal.total_cents)
+    query = select(func.coalesce(func.sum(signed), 0)).where(MonthlyTotal.user_id == user_id)
+    return db.session.execute(query).scalar()
+
+
+def user_rules(user_id):
+    signed = case((RecurringRule.transaction_type == "income", RecurringRule.amount_cents),
+                  else_=-RecurringRule.amount_cents)
+    query = select(RecurringRule.start_date, RecurringRule.frequency, RecurringRule.occurrences, signed).where(
+        RecurringRule.user_id == user_id, RecurringRule.active.is_(True),
+    )
+    return [(start.date(), frequency, occurrences, cents)
+            for start, frequency, occurrences, cents in db.session.execute(query)]
+
+
+def forecast(user_id, months=12, today=None):
+    """Prognose über ``months`` Monate: Kontostand und Saldo je Tag, dazu der Tiefststand."""
+    today = today or date.today()
+    end = today + relativedelta(months=months)
+    start_balance = current_balance(user_id)
+    net, balance = project(start_balance, user_rules(user_id), today, end)
+    days = np.datetime_as_string(np.arange(np.datetime64(today, "D"), np.datetime64(end, "D") + 1))
+    lowest = int(np.argmin(balance))
+    return {
+        "start": today.isoformat(),
+        "end": end.isoformat(),
+        "start_balance": euros(start_balance),
+        "end_balance": euros(balance[-1]),
+        "lowest": {"date": str(days[lowest]), "balance": euros(balance[lowest])},
+        "days": [
+            {"date": day, "net": n, "balance": b}
+            for day, n, b in zip(days.tolist(), euros(net), euros(balance))
+        ],
+    }
+
+
+def cached_forecast(user_id, months=12):
+    # data_version ändert sich bei jedem Schreibzugriff (auch durch den Scheduler)
+    version = user_state(user_id).data_version
+    today = date.today()
+    key = f"forecast:{user_id}:{version}:{today.isoformat()}:{months}"
+    cache = current_app.extensions["cache"]
+    data = cache.get(key)
+    if data is None:
+        data = forecast(user_id, months, today)
+        cache.set(key, data)
+    return data
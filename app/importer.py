@@ -0,0 +1,205 @@
+# app/importer.py
+# Streaming-Import von Kontoauszügen (CSV/OFX) mit gebündelten Core-Inserts.
+import csv
+import re
+import time
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+
+from . import db
+from .categories import category_ids, normalize
+from .rollups import record_values
+from .models import Transaction, bump_data_version
+from .money import DEFAULT_CURRENCY, parse_cents
+
+# Kennzahlen eines eingefügten Batches, z.B. für Fortschrittsausgaben
+BatchStats = namedtuple("BatchStats", ["number", "rows", "seconds", "total_rows"])
+ImportResult = namedtuple("ImportResult", ["imported", "rejected", "batches", "seconds"])
+
+TYPE_ALIASES = {
+    "income": "income",
+    "einnahme": "income",
+    "credit": "income",
+    "expense": "expense",
+    "ausgabe": "expense",
+    "debit": "expense",
+}
+FREQUENCIES = {"einmalig", "wöchentlich", "monatlich", "jährlich"}
+GERMAN_DATE = re.compile(r"(\d{1,2})\.(\d{1,2})\.(\d{4})")
+OFX_DATE = re.compile(r"(\d{4})(\d{2})(\d{2})(\d{6})?(\.\d+)?(\[.*\])?")
+
+
+class RowError(ValueError):
+    pass
+
+
+def parse_amount(value):
+    # Betrag in ganzen Cent, ohne Umweg über float
+    try:
+        return parse_cents(value or "")
+    except ValueError:
+        raise RowError(f"Ungültiger Betrag: {value!r}")
+
+
+# Kontoauszüge wiederholen dieselben Datumsangaben tausendfach, daher gecacht
+@lru_cache(maxsize=8192)
+def parse_date(value):
+    value = (value or "").strip()
+    try:
+        # OFX-Datumsangaben haben oft Uhrzeit und Zeitzone angehängt: 20240131120000[-5:EST]
+        match = OFX_DATE.fullmatch(value)
+        if match:
+            return datetime(int(match[1]), int(match[2]), int(match[3]))
+        match = GERMAN_DATE.fullmatch(value)
+        if match:
+            return datetime(int(match[3]), int(match[2]), int(match[1]))
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise RowError(f"Ungültiges Datum: {value!r}")
+
+
+def validate_row(raw, user_id):
+    """Wandelt eine Rohzeile in Spaltenwerte für ``transaction`` um (die Kategorie noch als Name)."""
+    amount = parse_amount(raw.get("amount"))
+    category = normalize(raw.get("category"))
+    if not category:
+        raise RowError("Kategorie fehlt")
+    if len(category) > 100:
+        raise RowError("Kategorie ist länger als 100 Zeichen")
+
+    raw_type = (raw.get("transaction_type") or "").strip().lower()
+    if raw_type:
+        if raw_type not in TYPE_ALIASES:
+            raise RowError(f"Unbekannter Typ: {raw_type!r}")
+        transaction_type = TYPE_ALIASES[raw_type]
+    else:
+        # Ohne Typspalte entscheidet das Vorzeichen
+        transaction_type = "expense" if amount < 0 else "income"
+
+    frequency = (raw.get("frequency") or "einmalig").strip().lower()
+    if frequency not in FREQUENCIES:
+        raise RowError(f"Unbekannte Wiederholung: {frequency!r}")
+    # Kontoauszüge und Exporte enthalten jede Ausführung eines Dauerauftrags als eigene Zeile;
+    # ein Dauerauftrag je Zeile würde sie ein zweites Mal buchen. Importierte Zeilen sind daher
+    # Einzelbuchungen, Daueraufträge entstehen nur über das Formular
+    frequency = "einmalig"
+
+    # Summen über mehrere Währungen wären falsch, daher nur die Standardwährung
+    currency = (raw.get("currency") or DEFAULT_CURRENCY).strip().upper()
+    if currency != DEFAULT_CURRENCY:
+        raise RowError(f"Nicht unterstützte Währung: {currency!r}")
+
+    return {
+        "user_id": user_id,
+        "amount_cents": abs(amount),
+        "currency": currency,
+        "category": category,
+        "transaction_type": transaction_type,
+        "frequency": frequency,
+        "date": parse_date(raw.get("date")),
+    }
+
+
+def iter_csv_rows(stream):
+    # DictReader liest zeilenweise, die Datei wird nie komplett geladen
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield {(k or "").strip().lower(): v for k, v in row.items()}
+
+
+OFX_TAG = re.compile(r"<(/?)(\w+)>([^<\r\n]*)")
+
+
+def iter_ofx_rows(stream):
+    """Liest <STMTTRN>-Blöcke aus OFX (SGML- und XML-Variante) zeilenweise."""
+    current = None
+    for line in stream:
+        for closing, tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if closing and current is not None:
+                    yield {
+                        "date": current.get("DTPOSTED"),
+                        "amount": current.get("TRNAMT"),
+                        "category": current.get("NAME") or current.get("MEMO") or "Import",
+                    }
+                    current = None
+                elif not closing:
+                    current = {}
+            elif current is not None and not closing and value.strip():
+                current[tag] = value.strip()
+
+
+def iter_rows(stream, fmt):
+    if fmt == "ofx":
+        return iter_ofx_rows(stream)
+    return iter_csv_rows(stream)
+
+
+def import_transactions(user_id, rows, batch_size=5000, reject_writer=None, on_batch=None):
+    """Fügt validierte Zeilen in Batches per executemany ein.
+
+    Jeder Batch wird mit einem einzigen INSERT-Statement und einem Commit
+    geschrieben. Fehlerhafte Zeilen landen (mit Zeilennummer und Fehler) im
+    ``reject_writer``, sofern angegeben.
+    """
+    started = time.perf_counter()
+    insert = Transaction.__table__.insert()
+    imported = rejected = batches = 0
+
+    def validated():
+        nonlocal rejected
+        for line_no, raw in enumerate(rows, start=1):
+            try:
+                yield validate_row(raw, user_id)
+            except RowError as e:
+                rejected += 1
+                if reject_writer is not None:
+                    reject_writer.writerow({**raw, "line": line_no, "error": str(e)})
+
+    values = validated()
+    while True:
+        batch = list(islice(values, batch_size))
+        if not batch:
+            break
+        batch_started = time.perf_counter()
+        # Kategorienamen einmal pro Batch in IDs übersetzen
+        ids = category_ids(user_id, {row["category"] for row in batch})
+        for row in batch:
+            row["category_id"] = ids[row.pop("category")]
+        db.session.execute(insert, batch)
+        record_values(batch)
+        bump_data_version(user_id)
+        db.session.commit()
+        batches += 1
+        imported += len(batch)
+        if on_batch is not None:
+            on_batch(BatchStats(batches, len(batch), time.perf_counter() - batch_started, imported))
+
+    return ImportResult(imported, rejected, batches, time.perf_counter() - started)
+
+
+class RejectSample:
+    """Behält nur die ersten ``limit`` abgelehnten Zeilen zur Anzeige."""
+
+    def __init__(self, limit=5):
+        self.limit = limit
+        self.rows = []
+
+    def writerow(self, row):
+        if len(self.rows) < self.limit:
+            self.rows.append(row)
+
+
+def reject_fieldnames(fmt):
+    if fmt == "ofx":
+        return ["line", "error", "date", "amount", "category"]
+    return ["line", "error", "date", "amount", "category", "transaction_type", "frequency", "currency"]
+
+
+def open_reject_writer(handle, fmt):
+    writer = csv.DictWriter(handle, fieldnames=reject_fieldnames(fmt), extrasaction="ignore")
+    writer.writeheader()
+    return writer
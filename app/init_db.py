@@ -1,4 +1,8 @@
-from app import db, app
+# app/init_db.py
+# Legt alle Tabellen ohne Migrationen an: python -m app.init_db
+from app import create_app, db
+
+app = create_app()
 
 with app.app_context():
     db.create_all()
@@ -0,0 +1,323 @@
+# app/jobs.py
+# Hintergrund-Jobs ohne externen Broker: die Tabelle ``job`` ist die Queue.
+#
+# Ein Request legt den Job an (``enqueue``) und antwortet sofort mit 202; ein
+# Worker (``flask worker``) holt sich Jobs mit einem einzigen UPDATE ... RETURNING
+# (``claim``). Der Worker hält den Job nur für eine Lease-Dauer; meldet er sich
+# nicht rechtzeitig (Fortschritt verlängert die Lease), darf ein anderer Worker
+# den Job übernehmen. So laufen mehrere Worker-Prozesse gefahrlos parallel, auch
+# gegen SQLite (Schreibzugriffe sind dort ohnehin serialisiert).
+import logging
+import os
+import socket
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, or_, select
+
+from . import db
+from .categories import check_version, forget_checked_versions
+from .models import Job
+from .sharding import MOVING, per_shard, select_shard, use_shard
+
+logger = logging.getLogger(__name__)
+
+JobHandler = namedtuple("JobHandler", ["run", "max_attempts"])
+HANDLERS = {}
+
+
+class LeaseLost(RuntimeError):
+    """Die Lease ist abgelaufen und ein anderer Worker hat den Job übernommen."""
+
+
+def job_handler(kind, max_attempts=3):
+    """Registriert ``run(job, report)`` für ``kind``; das Ergebnis muss JSON-fähig sein.
+
+    Nicht idempotente Jobs (z.B. ein Import) bekommen ``max_attempts=1``.
+    """
+    def register(run):
+        HANDLERS[kind] = JobHandler(run, max_attempts)
+        return run
+    return register
+
+
+def enqueue(kind, payload=None, user_id=None):
+    """Legt einen Job an und gibt die Zeile zurück (ein INSERT ... RETURNING); kein Commit."""
+    table = Job.__table__
+    return db.session.execute(
+        table.insert()
+        .values(kind=kind, payload=payload or {}, user_id=user_id, max_attempts=HANDLERS[kind].max_attempts)
+        .returning(*table.c)
+    ).one()
+
+
+def spool_path(name):
+    # Dateien, die zwischen Request und Worker übergeben werden (Uploads, Exporte)
+    directory = current_app.config["JOB_SPOOL_DIR"] or os.path.join(current_app.instance_path, "jobs")
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, name)
+
+
+def worker_name(index=0):
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+def claim(worker, now=None):
+    """Übernimmt atomar den nächsten fälligen Job (oder None) und committet."""
+    now = now or datetime.utcnow()
+    table = Job.__table__
+    expired = and_(table.c.status == "running", table.c.lease_expires_at < now)
+
+    # Jobs, deren Worker verschwunden ist und die keine Versuche mehr haben, gelten als gescheitert
+    db.session.execute(
+        table.update()
+        .where(expired, table.c.attempts >= table.c.max_attempts)
+        .values(status="failed", error="Lease abgelaufen", finished_at=now, lease_expires_at=None)
+    )
+    claimable = or_(and_(table.c.status == "queued", table.c.run_after <= now),
+                    and_(expired, table.c.attempts < table.c.max_attempts))
+    candidate = (
+        select(table.c.id).where(claimable).order_by(table.c.run_after, table.c.id).limit(1)
+        # Auf Postgres überspringen parallele Worker gesperrte Zeilen; SQLite ignoriert das
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    # Die Bedingung steht auch im äußeren WHERE: hat ein anderer Worker den Job
+    # inzwischen übernommen, ändert das UPDATE nichts
+    job = db.session.execute(
+        table.update()
+        .where(table.c.id == candidate, claimable)
+        .values(status="running", locked_by=worker, attempts=table.c.attempts + 1,
+                lease_expires_at=now + timedelta(seconds=current_app.config["JOB_LEASE_SECONDS"]))
+        .returning(*table.c)
+    ).first()
+    db.session.commit()
+    return job
+
+
+def progress_reporter(job, worker):
+    table = Job.__table__
+    lease = timedelta(seconds=current_app.config["JOB_LEASE_SECONDS"])
+
+    def report(done, total=None):
+        """Speichert den Fortschritt und verlängert die Lease.
+
+        Committet; Handler rufen es daher nur zwischen ihren DB-Transaktionen auf.
+        """
+        values = {"progress": done, "lease_expires_at": datetime.utcnow() + lease}
+        if total is not None:
+            values["total"] = total
+        updated = db.session.execute(
+            table.update().where(table.c.id == job.id, table.c.locked_by == worker, table.c.status == "running")
+            .values(**values)
+        ).rowcount
+        db.session.commit()
+        if not updated:
+            raise LeaseLost(job.id)
+
+    return report
+
+
+def retry_delay(attempts):
+    # Exponentielles Backoff: 2, 4, 8, ... Sekunden, höchstens 5 Minuten
+    return timedelta(seconds=min(2 ** attempts, 300))
+
+
+def run_job(job, worker):
+    """Führt einen übernommenen Job aus und hält das Ergebnis fest."""
+    table = Job.__table__
+    owned = and_(table.c.id == job.id, table.c.locked_by == worker, table.c.status == "running")
+    select_shard(None)
+    if job.user_id is not None and use_shard(job.user_id).state == MOVING:
+        # Während eines Umzugs nichts schreiben; später erneut, ohne einen Versuch zu verbrauchen
+        db.session.execute(table.update().where(owned).values(
+            status="queued", attempts=table.c.attempts - 1, locked_by=None, lease_expires_at=None,
+            run_after=datetime.utcnow() + timedelta(seconds=current_app.config["SHARD_MAP_TTL"])))
+        db.session.commit()
+        return
+    # Kategorien-Cache gegen die aktuelle data_version prüfen (der Benutzer kann umgezogen sein)
+    forget_checked_versions()
+    if job.user_id is not None:
+        check_version(job.user_id)
+    started = time.perf_counter()
+    try:
+        result = HANDLERS[job.kind].run(job, progress_reporter(job, worker))
+    except LeaseLost:
+        db.session.rollback()
+        logger.warning("Job %s: Lease verloren, Ergebnis verworfen", job.id)
+        return
+    except Exception as e:
+        db.session.rollback()
+        now = datetime.utcnow()
+        if job.attempts < job.max_attempts:
+            values = {"status": "queued", "run_after": now + retry_delay(job.attempts)}
+        else:
+            values = {"status": "failed", "finished_at": now}
+        db.session.execute(table.update().where(owned).values(
+            error=f"{type(e).__name__}: {e}", locked_by=None, lease_expires_at=None, **values))
+        db.session.commit()
+        logger.error("Job %s (%s) fehlgeschlagen, Versuch %d von %d: %s",
+                     job.id, job.kind, job.attempts, job.max_attempts, e)
+        return
+
+    db.session.execute(table.update().where(owned).values(
+        status="done", result=result, error=None, finished_at=datetime.utcnow(), lease_expires_at=None))
+    db.session.commit()
+    logger.info("Job %s (%s) erledigt in %.2fs", job.id, job.kind, time.perf_counter() - started)
+
+
+def spool_files(job):
+    # Dateien eines Jobs im Spool-Verzeichnis: Upload eines Imports, Ergebnis eines Exports
+    if job.kind == "import" and job.payload.get("path"):
+        yield job.payload["path"]
+    if job.kind == "export" and job.result and job.result.get("file"):
+        yield spool_path(job.result["file"])
+
+
+def prune_jobs(now=None):
+    """Löscht abgeschlossene Jobs, die länger als JOB_RESULT_TTL fertig sind, samt Dateien; liefert die Anzahl."""
+    now = now or datetime.utcnow()
+    table = Job.__table__
+    expired = db.session.execute(
+        select(table.c.id, table.c.kind, table.c.payload, table.c.result).where(
+            table.c.status.in_(("done", "failed")),
+            table.c.finished_at < now - timedelta(seconds=current_app.config["JOB_RESULT_TTL"]),
+        )
+    ).all()
+    for job in expired:
+        for path in spool_files(job):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    if expired:
+        db.session.execute(table.delete().where(table.c.id.in_([job.id for job in expired])))
+    db.session.commit()
+    return len(expired)
+
+
+# Wie oft ein wartender Worker abgelaufene Jobs aufräumt (Sekunden)
+PRUNE_INTERVAL = 60
+
+
+def work(worker, stop=None, burst=False, poll_interval=1.0):
+    """Arbeitet Jobs ab, bis ``stop`` gesetzt ist (oder die Queue leer ist, bei ``burst``)."""
+    stop = stop or threading.Event()
+    processed = 0
+    pruned_at = None
+    while not stop.is_set():
+        job = claim(worker)
+        if job is None:
+            # Leerlauf: alte Ergebnisse und Uploads aufräumen
+            if pruned_at is None or time.monotonic() - pruned_at >= PRUNE_INTERVAL:
+                prune_jobs()
+                pruned_at = time.monotonic()
+            if burst:
+                break
+            stop.wait(poll_interval)
+            continue
+        run_job(job, worker)
+        processed += 1
+    return processed
+
+
+def run_worker(app, threads=1, burst=False, poll_interval=1.0):
+    """Worker-Pool: ``threads`` Threads mit je eigenem App-Kontext (und damit eigener Session)."""
+    stop = threading.Event()
+    counts = [0] * threads
+
+    def loop(index):
+        with app.app_context():
+            counts[index] = work(worker_name(index), stop, burst, poll_interval)
+
+    if threads == 1:
+        try:
+            loop(0)
+        except KeyboardInterrupt:
+            stop.set()
+        return sum(counts)
+
+    pool = [threading.Thread(target=loop, args=(i,), name=f"job-worker-{i}", daemon=True) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    try:
+        while any(thread.is_alive() for thread in pool):
+            for thread in pool:
+                thread.join(0.5)
+    except KeyboardInterrupt:
+        # Laufende Jobs noch zu Ende bringen, danach keine neuen mehr holen
+        stop.set()
+        for thread in pool:
+            thread.join()
+    return sum(counts)
+
+
+# --- Handler -------------------------------------------------------------------
+
+@job_handler("import", max_attempts=1)
+def import_job(job, report):
+    # Jeder Batch wird sofort committet; ein zweiter Versuch würde Zeilen doppelt buchen
+    from .importer import RejectSample, import_transactions, iter_rows
+
+    path = job.payload["path"]
+    rejects = RejectSample()
+    try:
+        with open(path, newline="", encoding="utf-8-sig") as stream:
+            result = import_transactions(
+                job.user_id, iter_rows(stream, job.payload["format"]), current_app.config["IMPORT_BATCH_SIZE"],
+                rejects, on_batch=lambda stats: report(stats.total_rows),
+            )
+    finally:
+        # Nur ein Versuch: auch nach einem Fehler wird die Datei nicht mehr gebraucht
+        os.remove(path)
+    return {"imported": result.imported, "rejected": result.rejected, "rejects": rejects.rows}
+
+
+@job_handler("export")
+def export_job(job, report):
+    from .exporter import FORMATS, export_chunks, parse_day
+
+    fmt = job.payload["format"]
+    path = spool_path(f"export-{job.id}.{FORMATS[fmt][1]}")
+    chunks = 0
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        for chunk in export_chunks(fmt, job.user_id, parse_day(job.payload.get("start")),
+                                   parse_day(job.payload.get("end")), current_app.config["EXPORT_CHUNK_SIZE"]):
+            handle.write(chunk)
+            chunks += 1
+    report(chunks)
+    return {"file": os.path.basename(path), "format": fmt}
+
+
+@job_handler("recurring")
+def recurring_job(job, report):
+    # Idempotent: der eindeutige Index auf (recurring_rule_id, date) verhindert doppelte Buchungen
+    from .recurring import run_all_databases
+
+    result = run_all_databases(chunk_size=current_app.config["RECURRING_CHUNK_SIZE"])
+    return {"rules": result.rules, "created": result.created, "chunks": result.chunks}
+
+
+def rebuild_functions():
+    from .budgets import rebuild_rollups
+    from .monthly_totals import rebuild_monthly_totals
+    from .savings import rebuild_savings
+    from .search import rebuild_search_index
+
+    return {
+        "budgets": rebuild_rollups,
+        "monthly_totals": rebuild_monthly_totals,
+        "search": rebuild_search_index,
+        "savings": rebuild_savings,
+    }
+
+
+@job_handler("rebuild")
+def rebuild_job(job, report):
+    # Neuaufbau eines Aggregats; überschreibt alles und darf daher wiederholt werden
+    count = per_shard(rebuild_functions()[job.payload["target"]], job.payload.get("user_id"))
+    report(count)
+    return {"target": job.payload["target"], "count": count}
@@ -0,0 +1,92 @@
+# app/log.py
+# Logging-Konfiguration aus der Config: Level, Text- oder JSON-Ausgabe und
+# Sampling. Request-Threads legen Records nur in eine Queue; geschrieben wird
+# in einem eigenen Listener-Thread, damit langsames I/O keine Requests bremst.
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Ein JSON-Objekt pro Zeile, z.B. für Loki oder journald."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Lässt von DEBUG/INFO nur den Anteil ``rate`` durch; Warnungen und Fehler immer."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class _QueueHandler(QueueHandler):
+    # Markiert die von uns installierten Handler, damit ein zweites create_app sie ersetzt
+    moneymap = True
+
+
+def build_formatter(fmt):
+    if fmt == "json":
+        return JsonFormatter()
+    if fmt == "text":
+        return logging.Formatter(TEXT_FORMAT)
+    raise ValueError(f"Unbekanntes Log-Format: {fmt!r}")
+
+
+def stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def init_logging(app):
+    global _listener
+    level = logging.getLevelName(app.config["LOG_LEVEL"].upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Unbekanntes Log-Level: {app.config['LOG_LEVEL']!r}")
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(build_formatter(app.config["LOG_FORMAT"]))
+
+    handler = _QueueHandler(queue.SimpleQueue())
+    if app.config["LOG_SAMPLE_RATE"] < 1:
+        handler.addFilter(SamplingFilter(app.config["LOG_SAMPLE_RATE"]))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        if getattr(existing, "moneymap", False):
+            root.removeHandler(existing)
+    stop_listener()
+
+    root.addHandler(handler)
+    root.setLevel(level)
+    _listener = QueueListener(handler.queue, output)
+    _listener.start()
+    return handler
+
+
+atexit.register(stop_listener)
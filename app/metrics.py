@@ -0,0 +1,175 @@
+# app/metrics.py
+# Laufzeitmessung pro Request (Gesamtzeit, DB-Zeit, Anzahl SQL-Statements)
+# als In-Memory-Histogramme, abrufbar im Prometheus-Textformat unter /metrics.
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from . import db
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    """Prometheus-Histogramm mit festen Grenzen, je Label-Kombination eine Reihe."""
+
+    def __init__(self, name, help_text, buckets, labels):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.labels = tuple(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        # Zählt nicht kumulativ, die Summenbildung passiert erst beim Export
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, count) in sorted(self.snapshot().items()):
+            labels = ",".join(f'{k}="{escape(v)}"' for k, v in zip(self.labels, label_values))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RequestMetrics:
+    def __init__(self, slow_request_ms=500, slow_query_ms=100):
+        self.slow_request = slow_request_ms / 1000
+        self.slow_query = slow_query_ms / 1000
+        self.request_seconds = Histogram(
+            "moneymap_request_duration_seconds", "Gesamtdauer eines Requests",
+            LATENCY_BUCKETS, ("endpoint", "method", "status"))
+        self.db_seconds = Histogram(
+            "moneymap_request_db_seconds", "Zeit in SQL-Statements pro Request",
+            LATENCY_BUCKETS, ("endpoint",))
+        self.query_count = Histogram(
+            "moneymap_request_queries", "SQL-Statements pro Request",
+            QUERY_COUNT_BUCKETS, ("endpoint",))
+        self.slow_requests = 0
+        self.slow_queries = 0
+        self._lock = threading.Lock()
+
+    # --- SQLAlchemy-Events ------------------------------------------------
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context.metrics_started = time.perf_counter()
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context.metrics_started
+        if has_request_context():
+            g.metrics_db_seconds = g.get("metrics_db_seconds", 0.0) + elapsed
+            g.metrics_queries = g.get("metrics_queries", 0) + 1
+        if elapsed >= self.slow_query:
+            with self._lock:
+                self.slow_queries += 1
+            logger.warning("Langsame Abfrage (%.1f ms): %s", elapsed * 1000, statement)
+
+    def watch(self, engine):
+        event.listen(engine, "before_cursor_execute", self.before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self.after_cursor_execute)
+
+    # --- Flask-Hooks --------------------------------------------------------
+
+    def before_request(self):
+        g.metrics_started = time.perf_counter()
+
+    def after_request(self, response):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        endpoint = request.endpoint or "unbekannt"
+        db_seconds = g.pop("metrics_db_seconds", 0.0)
+        queries = g.pop("metrics_queries", 0)
+
+        self.request_seconds.observe(elapsed, endpoint, request.method, str(response.status_code))
+        self.db_seconds.observe(db_seconds, endpoint)
+        self.query_count.observe(queries, endpoint)
+        if elapsed >= self.slow_request:
+            with self._lock:
+                self.slow_requests += 1
+            logger.warning("Langsamer Request %s %s: %.1f ms, davon DB %.1f ms in %d Abfragen",
+                           request.method, request.path, elapsed * 1000, db_seconds * 1000, queries)
+        return response
+
+    def render(self):
+        lines = []
+        for histogram in (self.request_seconds, self.db_seconds, self.query_count):
+            lines.extend(histogram.render())
+        lines += [
+            "# HELP moneymap_slow_requests_total Requests über der Schwelle METRICS_SLOW_REQUEST_MS",
+            "# TYPE moneymap_slow_requests_total counter",
+            f"moneymap_slow_requests_total {self.slow_requests}",
+            "# HELP moneymap_slow_queries_total Abfragen über der Schwelle METRICS_SLOW_QUERY_MS",
+            "# TYPE moneymap_slow_queries_total counter",
+            f"moneymap_slow_queries_total {self.slow_queries}",
+        ]
+        replicas = current_app.extensions.get("replicas")
+        if replicas is not None:
+            lines += ["# HELP moneymap_db_reads_total Lesende Statements nach Ziel (primär oder Replikat)",
+                      "# TYPE moneymap_db_reads_total counter",
+                      f'moneymap_db_reads_total{{target="primary"}} {replicas.stats.primary}',
+                      f'moneymap_db_reads_total{{target="replica"}} {replicas.stats.replica}',
+                      "# HELP moneymap_db_read_offload_ratio Anteil der Lesezugriffe, die Replikate beantwortet haben",
+                      "# TYPE moneymap_db_read_offload_ratio gauge",
+                      f"moneymap_db_read_offload_ratio {replicas.stats.offload_ratio():.4f}"]
+        cache = current_app.extensions.get("cache")
+        if cache is not None:
+            lines += ["# HELP moneymap_cache_events_total Treffer, Fehlschläge usw. des Dashboard-Caches",
+                      "# TYPE moneymap_cache_events_total counter"]
+            lines += [f'moneymap_cache_events_total{{event="{name}"}} {value}'
+                      for name, value in cache.stats.as_dict().items()]
+            info = cache.info()
+            if "entries" in info:
+                lines += ["# HELP moneymap_cache_entries Einträge im Dashboard-Cache dieses Prozesses",
+                          "# TYPE moneymap_cache_entries gauge",
+                          f'moneymap_cache_entries{{backend="{info["backend"]}"}} {info["entries"]}']
+        return "\n".join(lines) + "\n"
+
+
+def metrics_endpoint():
+    return Response(current_app.extensions["metrics"].render(),
+                    mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
+def init_metrics(app):
+    if not app.config["METRICS_ENABLED"]:
+        return None
+    metrics = RequestMetrics(app.config["METRICS_SLOW_REQUEST_MS"], app.config["METRICS_SLOW_QUERY_MS"])
+    with app.app_context():
+        for engine in db.engines.values():
+            metrics.watch(engine)
+    app.before_request(metrics.before_request)
+    app.after_request(metrics.after_request)
+    app.add_url_rule("/metrics", "metrics", metrics_endpoint)
+    app.extensions["metrics"] = metrics
+    return metrics
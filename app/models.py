@@ -1,6 +1,9 @@
 # app/models.py
 from . import db
+from .dialects import dialect_insert
+from .money import Money, DEFAULT_CURRENCY
 from datetime import datetime
+from sqlalchemy import literal, select, true, union
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -10,27 +13,236 @@ class User(db.Model):
     transactions = db.relationship('Transaction', backref='user', lazy=True)
     budgets = db.relationship('Budget', backref='user', lazy=True)
     savings_goals = db.relationship('SavingsGoal', backref='user', lazy=True)
+    recurring_rules = db.relationship('RecurringRule', backref='user', lazy=True)
 
-class Transaction(db.Model):
+class UserState(db.Model):
+    # Liegt bei den Daten des Benutzers (im selben Shard), damit ein Schreibzugriff nur dort schreibt.
+    # data_version wird bei jeder Änderung erhöht (Cache-Schlüssel und ETag), updated_at ist der
+    # Zeitpunkt dieser Änderung (Last-Modified); ohne Zeile gilt Version 0
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+class ShardAssignment(db.Model):
+    # Verzeichnis Benutzer -> Shard (app/sharding.py), nur in der Haupt-Datenbank;
+    # state 'moving', solange 'flask shards move' die Daten kopiert
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    shard = db.Column(db.String(50), nullable=False)
+    state = db.Column(db.String(20), nullable=False, default='active', server_default='active')
+
+class Categorized:
+    # Lesezugriff auf den Kategorienamen; die Zeile selbst speichert nur category_id
+    @property
+    def category(self):
+        from .categories import category_name
+        return category_name(self.category_id)
+
+class Category(db.Model):
+    # Kategorien je Benutzer, einmal gespeichert und überall per ID referenziert (app/categories.py);
+    # transaction_count wird beim Schreiben gepflegt und ist das Vokabular für die Suche (app/search.py)
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ux_category_user_id_name', user_id, name, unique=True),
+    )
+
+class Transaction(Categorized, db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    amount = db.Column(db.Float, nullable=False)
-    category = db.Column(db.String(100), nullable=False)
+    # Beträge in ganzen Cent; ``amount`` fasst Cent und Währung als Money zusammen
+    amount_cents = db.Column(db.Integer, nullable=False)
+    currency = db.Column(db.String(3), nullable=False, default=DEFAULT_CURRENCY, server_default=DEFAULT_CURRENCY)
+    amount = db.composite(Money, amount_cents, currency)
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
     transaction_type = db.Column(db.String(50), nullable=False)
     frequency = db.Column(db.String(50), nullable=True)
     date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # Gesetzt, wenn die Transaktion zu einem Dauerauftrag gehört
+    recurring_rule_id = db.Column(db.Integer, db.ForeignKey('recurring_rule.id'), nullable=True)
+
+    __table_args__ = (
+        # Transaktionsliste: WHERE user_id = ? ORDER BY date DESC, id DESC
+        db.Index('ix_transaction_user_id_date_id', user_id, date.desc(), id),
+        # Suche/Filter (app/search.py): feste Kategorie, Einnahme/Ausgabe, Betragsgrenzen
+        db.Index('ix_transaction_user_id_category_id_date', user_id, category_id, date),
+        db.Index('ix_transaction_user_id_type_date', user_id, transaction_type, date),
+        db.Index('ix_transaction_user_id_amount_cents', user_id, amount_cents),
+        # Jede Ausführung eines Dauerauftrags existiert höchstens einmal
+        db.Index('ux_transaction_recurring_rule_id_date', recurring_rule_id, date, unique=True),
+    )
 
-class Budget(db.Model):
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'amount': str(self.amount),
+            'amount_cents': self.amount_cents,
+            'currency': self.currency,
+            'category': self.category,
+            'category_id': self.category_id,
+            'transaction_type': self.transaction_type,
+            'frequency': self.frequency,
+            'date': self.date.isoformat(),
+        }
+
+class RecurringRule(Categorized, db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    category = db.Column(db.String(100), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    amount_cents = db.Column(db.Integer, nullable=False)
+    currency = db.Column(db.String(3), nullable=False, default=DEFAULT_CURRENCY, server_default=DEFAULT_CURRENCY)
+    amount = db.composite(Money, amount_cents, currency)
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
+    transaction_type = db.Column(db.String(50), nullable=False)
+    frequency = db.Column(db.String(50), nullable=False)
+    start_date = db.Column(db.DateTime, nullable=False)
+    # Anzahl bereits erzeugter Ausführungen inkl. der ursprünglichen Transaktion
+    occurrences = db.Column(db.Integer, nullable=False, default=1)
+    next_due_at = db.Column(db.DateTime, nullable=False)
+    active = db.Column(db.Boolean, nullable=False, default=True)
+
+    __table_args__ = (
+        # Scheduler: WHERE active AND next_due_at <= ? ORDER BY next_due_at
+        db.Index('ix_recurring_rule_active_next_due_at', active, next_due_at),
+        db.Index('ix_recurring_rule_user_id', user_id),
+    )
+
+class Budget(Categorized, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
+    amount_cents = db.Column(db.Integer, nullable=False)
+    currency = db.Column(db.String(3), nullable=False, default=DEFAULT_CURRENCY, server_default=DEFAULT_CURRENCY)
+    amount = db.composite(Money, amount_cents, currency)
     period = db.Column(db.String(50), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+    __table_args__ = (
+        db.Index('ix_budget_user_id_category_id', user_id, category_id),
+    )
+
+class BudgetRollup(db.Model):
+    # Summe der Ausgaben je Kategorie und Budgetzeitraum, gepflegt beim Schreiben
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), primary_key=True)
+    period = db.Column(db.String(50), primary_key=True)
+    period_start = db.Column(db.Date, primary_key=True)
+    spent_cents = db.Column(db.Integer, nullable=False, default=0)
+
+class MonthlyTotal(db.Model):
+    # Summe und Anzahl der Transaktionen je Monat, Kategorie und Typ (für Auswertungen)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), primary_key=True)
+    transaction_type = db.Column(db.String(50), primary_key=True)
+    total_cents = db.Column(db.Integer, nullable=False, default=0)
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+
 class SavingsGoal(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(150), nullable=False)
-    target_amount = db.Column(db.Float, nullable=False)
-    current_amount = db.Column(db.Float, nullable=False, default=0.0)
+    target_cents = db.Column(db.Integer, nullable=False)
+    current_cents = db.Column(db.Integer, nullable=False, default=0)
+    currency = db.Column(db.String(3), nullable=False, default=DEFAULT_CURRENCY, server_default=DEFAULT_CURRENCY)
+    target_amount = db.composite(Money, target_cents, currency)
+    current_amount = db.composite(Money, current_cents, currency)
     date_created = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # current_cents und first_contribution_at werden mit jeder Einzahlung fortgeschrieben (app/savings.py)
+    first_contribution_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_savings_goal_user_id', user_id),
+    )
+
+class SavingsContribution(db.Model):
+    # Einzahlungen auf ein Sparziel: manuell oder aus einer Transaktion
+    id = db.Column(db.Integer, primary_key=True)
+    goal_id = db.Column(db.Integer, db.ForeignKey('savings_goal.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    amount_cents = db.Column(db.Integer, nullable=False)
+    currency = db.Column(db.String(3), nullable=False, default=DEFAULT_CURRENCY, server_default=DEFAULT_CURRENCY)
+    amount = db.composite(Money, amount_cents, currency)
+    date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    transaction_id = db.Column(db.Integer, db.ForeignKey('transaction.id'), nullable=True)
+
+    __table_args__ = (
+        # Neuaufbau (SUM/MIN je Ziel) und Liste je Ziel
+        db.Index('ix_savings_contribution_goal_id_date', goal_id, date),
+        # Eine Transaktion zählt höchstens einmal
+        db.Index('ux_savings_contribution_transaction_id', transaction_id, unique=True),
+    )
+
+class Job(db.Model):
+    # Hintergrund-Jobs (app/jobs.py); die Tabelle ist die Queue, Worker holen sich Jobs per Lease
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    # queued -> running -> done | failed (bei Fehlern mit Restversuchen wieder queued)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(100), nullable=True)
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        # Worker: WHERE status = 'queued' AND run_after <= ? ORDER BY run_after, id
+        db.Index('ix_job_status_run_after', status, run_after),
+        db.Index('ix_job_user_id', user_id),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'attempts': self.attempts,
+            'progress': self.progress,
+            'total': self.total,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+def data_version_upsert(bind=None):
+    # Legt user_state mit den Parametern an oder erhöht die vorhandene Version um eins
+    insert = dialect_insert(UserState.__table__, bind)
+    return insert.on_conflict_do_update(
+        index_elements=[UserState.user_id],
+        set_={"data_version": UserState.data_version + 1, "updated_at": insert.excluded.updated_at},
+    )
+
+def bump_data_version(*user_ids):
+    # Im selben DB-Transaktionskontext wie die Änderung aufrufen; kein Commit. Die neuen
+    # Versionen stehen bis zum Commit in session.info (für den Kategorien-Cache)
+    now = datetime.utcnow()
+    rows = db.session.execute(
+        data_version_upsert().returning(UserState.user_id, UserState.data_version, sort_by_parameter_order=True),
+        [{"user_id": user_id, "data_version": 1, "updated_at": now} for user_id in user_ids],
+    ).all()
+    shard = db.session.info.get("shard")
+    db.session.info.setdefault("bumped_versions", []).extend((shard, *row) for row in rows)
+
+def bump_all_data_versions():
+    # Nach einem Neuaufbau über alle Benutzer mit Daten (im gewählten Shard); kein Commit
+    owners = union(select(Category.user_id), select(SavingsGoal.user_id)).subquery()
+    insert = dialect_insert(UserState.__table__)
+    db.session.execute(
+        insert.from_select(
+            ["user_id", "data_version", "updated_at"],
+            # SQLite braucht bei INSERT ... SELECT mit ON CONFLICT ein WHERE
+            select(owners.c.user_id, literal(1), literal(datetime.utcnow())).where(true()),
+        ).on_conflict_do_update(
+            index_elements=[UserState.user_id],
+            set_={"data_version": UserState.data_version + 1, "updated_at": insert.excluded.updated_at},
+        )
+    )
@@ -0,0 +1,113 @@
+# app/money.py
+# Geldbeträge als ganze Cent-Beträge mit Währung.
+import re
+from decimal import Decimal, ROUND_HALF_UP
+from functools import total_ordering
+
+DEFAULT_CURRENCY = "EUR"
+
+SIMPLE_AMOUNT = re.compile(r"(-?)(\d+)(?:\.(\d{1,2}))?")
+
+# Cent-Beträge müssen in eine 64-Bit-Spalte passen (SQLite INTEGER, BIGINT)
+MIN_CENTS, MAX_CENTS = -2 ** 63, 2 ** 63 - 1
+
+
+def parse_cents(value):
+    """Wandelt "12,34", "-1.234,56" oder "12.345" exakt in Cent um (kaufmännisch gerundet)."""
+    text = str(value).strip().replace(" ", "").replace("€", "")
+    if "," in text and "." in text:
+        text = text.replace(".", "").replace(",", ".")
+    elif "," in text:
+        text = text.replace(",", ".")
+
+    # Schneller Weg für die üblichen Beträge mit höchstens zwei Nachkommastellen
+    match = SIMPLE_AMOUNT.fullmatch(text)
+    if match:
+        cents = int(match[2]) * 100 + int((match[3] or "0").ljust(2, "0"))
+        cents = -cents if match[1] else cents
+    else:
+        try:
+            amount = Decimal(text)
+            if not amount.is_finite():
+                raise ValueError(f"Ungültiger Betrag: {value!r}")
+            # "1e30" überschreitet die Genauigkeit des Kontexts: InvalidOperation ist kein ValueError
+            cents = int((amount * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+        except ArithmeticError:
+            raise ValueError(f"Ungültiger Betrag: {value!r}")
+    if not MIN_CENTS <= cents <= MAX_CENTS:
+        raise ValueError(f"Betrag zu groß: {value!r}")
+    return cents
+
+
+def format_cents(cents):
+    sign = "-" if cents < 0 else ""
+    units, rest = divmod(abs(cents), 100)
+    return f"{sign}{units}.{rest:02d}"
+
+
+@total_ordering
+class Money:
+    """Unveränderlicher Geldbetrag; wird per ``db.composite`` auf (Cent, Währung) abgebildet."""
+
+    __slots__ = ("cents", "currency")
+
+    def __init__(self, cents, currency=DEFAULT_CURRENCY):
+        if not isinstance(cents, int):
+            raise TypeError("Money erwartet ganze Cent-Beträge")
+        object.__setattr__(self, "cents", cents)
+        object.__setattr__(self, "currency", currency or DEFAULT_CURRENCY)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Money ist unveränderlich")
+
+    def __reduce__(self):
+        return (Money, (self.cents, self.currency))
+
+    @classmethod
+    def parse(cls, value, currency=DEFAULT_CURRENCY):
+        return cls(parse_cents(value), currency)
+
+    def __composite_values__(self):
+        return self.cents, self.currency
+
+    def _check(self, other):
+        if not isinstance(other, Money):
+            raise TypeError(f"Money und {type(other).__name__} lassen sich nicht verrechnen")
+        if other.currency != self.currency:
+            raise ValueError(f"Währungen passen nicht: {self.currency} / {other.currency}")
+        return other
+
+    def __eq__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.cents == other.cents and self.currency == other.currency
+
+    def __lt__(self, other):
+        return self.cents < self._check(other).cents
+
+    def __hash__(self):
+        return hash((self.cents, self.currency))
+
+    def __add__(self, other):
+        return Money(self.cents + self._check(other).cents, self.currency)
+
+    def __sub__(self, other):
+        return Money(self.cents - self._check(other).cents, self.currency)
+
+    def __neg__(self):
+        return Money(-self.cents, self.currency)
+
+    def __abs__(self):
+        return Money(abs(self.cents), self.currency)
+
+    def __bool__(self):
+        return self.cents != 0
+
+    def to_decimal(self):
+        return Decimal(self.cents).scaleb(-2)
+
+    def __str__(self):
+        return format_cents(self.cents)
+
+    def __repr__(self):
+        return f"Money({format_cents(self.cents)} {self.currency})"
@@ -0,0 +1,74 @@
+# app/monthly_totals.py
+# Pflege der Monatssummen (``monthly_total``) beim Schreiben und als Neuaufbau.
+#
+# Liegt getrennt von den Auswertungen, damit der Schreibpfad (Routen, Import,
+# Daueraufträge) ohne NumPy auskommt; ``app.analytics`` wird erst beim ersten
+# Auswertungs-Request geladen.
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import func, select
+
+from . import db
+from .dialects import dialect_insert, month_start
+from .models import MonthlyTotal, Transaction, bump_all_data_versions, bump_data_version
+
+
+def monthly_deltas(rows, sign=1):
+    """Summiert (Betrag, Anzahl) je (user_id, month, category_id, transaction_type).
+
+    ``rows`` sind Tupel (user_id, category_id, transaction_type, amount_cents, date).
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for user_id, category_id, transaction_type, amount, day in rows:
+        delta = deltas[(user_id, date(day.year, day.month, 1), category_id, transaction_type)]
+        delta[0] += sign * amount
+        delta[1] += sign
+    return deltas
+
+
+def apply_deltas(deltas):
+    # Ein einziges executemany-Upsert für alle betroffenen Monatssummen, kein Commit
+    if not deltas:
+        return
+    table = MonthlyTotal.__table__
+    insert = dialect_insert(table)
+    upsert = insert.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.month, table.c.category_id, table.c.transaction_type],
+        set_={
+            "total_cents": table.c.total_cents + insert.excluded.total_cents,
+            "transaction_count": table.c.transaction_count + insert.excluded.transaction_count,
+        },
+    )
+    db.session.execute(upsert, [
+        {"user_id": user_id, "month": month, "category_id": category_id, "transaction_type": transaction_type,
+         "total_cents": total, "transaction_count": count}
+        for (user_id, month, category_id, transaction_type), (total, count) in deltas.items()
+    ])
+
+
+def rebuild_monthly_totals(user_id=None):
+    """Berechnet ``monthly_total`` per INSERT ... SELECT ... GROUP BY neu."""
+    totals = MonthlyTotal.__table__
+    table = Transaction.__table__
+    month = month_start(table.c.date)
+    query = select(
+        table.c.user_id, month, table.c.category_id, table.c.transaction_type,
+        func.sum(table.c.amount_cents), func.count(),
+    ).group_by(table.c.user_id, month, table.c.category_id, table.c.transaction_type)
+    delete = totals.delete()
+    if user_id is not None:
+        query = query.where(table.c.user_id == user_id)
+        delete = delete.where(totals.c.user_id == user_id)
+
+    db.session.execute(delete)
+    result = db.session.execute(totals.insert().from_select(
+        ["user_id", "month", "category_id", "transaction_type", "total_cents", "transaction_count"], query
+    ))
+    # Die Auswertungen antworten per ETag; reparierte Summen müssen ihn ändern
+    if user_id is not None:
+        bump_data_version(user_id)
+    else:
+        bump_all_data_versions()
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,87 @@
+# app/pagination.py
+import base64
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+from .models import Transaction
+
+# Eine Seite der Transaktionsliste mit den Cursorn für die Nachbarseiten
+Page = namedtuple("Page", ["items", "next_cursor", "prev_cursor"])
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(transaction):
+    raw = f"{transaction.date.isoformat()}|{transaction.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        date, id_ = raw.rsplit("|", 1)
+        return datetime.fromisoformat(date), int(id_)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+def clamp_per_page(value, default, maximum):
+    try:
+        per_page = int(value) if value is not None else default
+    except (TypeError, ValueError):
+        per_page = default
+    return max(1, min(per_page, maximum))
+
+
+def paginate_transactions(query, per_page, after=None, before=None):
+    """Keyset-Pagination über (date, id), neueste Transaktionen zuerst.
+
+    ``after`` liefert die Seite hinter dem Cursor, ``before`` die Seite davor.
+    Es werden nie mehr als ``per_page + 1`` Zeilen geladen, unabhängig davon,
+    wie weit man in der Historie blättert.
+    """
+    if after and before:
+        raise InvalidCursor("after und before schließen sich aus")
+
+    if before:
+        date, id_ = decode_cursor(before)
+        rows = (
+            query.filter(
+                or_(
+                    Transaction.date > date,
+                    and_(Transaction.date == date, Transaction.id > id_),
+                )
+            )
+            .order_by(Transaction.date.asc(), Transaction.id.asc())
+            .limit(per_page + 1)
+            .all()
+        )
+        has_more = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        next_cursor = encode_cursor(items[-1]) if items else None
+        prev_cursor = encode_cursor(items[0]) if items and has_more else None
+        return Page(items, next_cursor, prev_cursor)
+
+    if after:
+        date, id_ = decode_cursor(after)
+        query = query.filter(
+            or_(
+                Transaction.date < date,
+                and_(Transaction.date == date, Transaction.id < id_),
+            )
+        )
+    rows = (
+        query.order_by(Transaction.date.desc(), Transaction.id.desc())
+        .limit(per_page + 1)
+        .all()
+    )
+    has_more = len(rows) > per_page
+    items = rows[:per_page]
+    next_cursor = encode_cursor(items[-1]) if items and has_more else None
+    prev_cursor = encode_cursor(items[0]) if items and after else None
+    return Page(items, next_cursor, prev_cursor)
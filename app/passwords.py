@@ -0,0 +1,100 @@
+# app/passwords.py
+# Passwort-Hashing mit konfigurierbarer Policy in einem begrenzten Thread-Pool.
+#
+# PBKDF2/scrypt sind absichtlich teuer. Damit ein Ansturm auf /login nicht
+# alle Request-Threads blockiert, laufen die Hashes in einem eigenen Pool mit
+# fester Größe; ist auch die Warteschlange voll, wird sofort mit
+# ``HasherBusy`` abgelehnt statt weitere Threads zu binden. hashlib gibt bei
+# PBKDF2 und scrypt den GIL frei, die Worker rechnen also echt parallel.
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+class HasherBusy(RuntimeError):
+    pass
+
+
+def policy_method(method, iterations=None):
+    """Vollständiges Präfix, wie werkzeug es vor das erste "$" schreibt.
+
+    "pbkdf2:sha256" + 600000 -> "pbkdf2:sha256:600000", "scrypt" -> "scrypt:32768:8:1".
+    Fehlende Parameter werden mit den Standardwerten von werkzeug ergänzt, sonst
+    sähe jeder gespeicherte Hash veraltet aus und würde bei jedem Login neu berechnet.
+    """
+    name, *args = method.split(":")
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = iterations or (int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS)
+        return f"pbkdf2:{hash_name}:{iterations}"
+    if name == "scrypt" and not args:
+        # scrypt bringt eigene Parameter mit (n, r, p), ITERATIONS gilt nicht
+        return "scrypt:32768:8:1"
+    return method
+
+
+def hash_method(stored):
+    # Alles vor dem ersten "$", z.B. "pbkdf2:sha256:600000"
+    return stored.split("$", 1)[0]
+
+
+class PasswordHasher:
+    """Hasht und prüft Passwörter in höchstens ``workers`` Threads parallel.
+
+    ``queue_size`` weitere Aufträge dürfen warten; wer danach länger als
+    ``timeout`` Sekunden auf einen Platz wartet, bekommt ``HasherBusy``.
+    """
+
+    def __init__(self, method="pbkdf2:sha256", iterations=None, workers=2, queue_size=16, timeout=0.5):
+        self.method = policy_method(method, iterations)
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        # Erst bei der ersten Anmeldung anlegen, CLI-Befehle brauchen den Pool nie
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise HasherBusy("Zu viele gleichzeitige Passwort-Prüfungen")
+        try:
+            future = self.executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored, password):
+        return self._run(check_password_hash, stored, password)
+
+    def needs_rehash(self, stored):
+        return hash_method(stored) != self.method
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def init_hasher(app):
+    hasher = PasswordHasher(
+        app.config["PASSWORD_HASH_METHOD"],
+        app.config["PASSWORD_HASH_ITERATIONS"],
+        app.config["PASSWORD_HASH_WORKERS"],
+        app.config["PASSWORD_HASH_QUEUE"],
+        app.config["PASSWORD_HASH_TIMEOUT"],
+    )
+    app.extensions["password_hasher"] = hasher
+    return hasher
@@ -0,0 +1,181 @@
+# app/recurring.py
+# Scheduler für Daueraufträge: erzeugt fällige Ausführungen inkrementell und idempotent.
+import logging
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import bindparam, select
+
+from . import db
+from .rollups import record_transactions
+from .dialects import insert_ignoring_duplicates
+from .models import RecurringRule, Transaction, bump_data_version
+
+logger = logging.getLogger(__name__)
+
+RECURRING_FREQUENCIES = {
+    "wöchentlich": lambda n: timedelta(weeks=n),
+    "monatlich": lambda n: relativedelta(months=n),
+    "jährlich": lambda n: relativedelta(years=n),
+}
+
+RunResult = namedtuple("RunResult", ["rules", "created", "chunks", "seconds"])
+
+
+def is_recurring(frequency):
+    return frequency in RECURRING_FREQUENCIES
+
+
+def occurrence_date(start_date, frequency, index):
+    # Immer vom Startdatum aus rechnen, damit z.B. der 31. nicht dauerhaft zum 28. wird
+    return start_date + RECURRING_FREQUENCIES[frequency](index)
+
+
+def create_rule_for(transaction):
+    """Legt zu einer neuen wiederkehrenden Transaktion den Dauerauftrag an.
+
+    Die Transaktion selbst ist Ausführung Nr. 0; fällig ist danach Nr. 1.
+    Die Session wird nicht committet.
+    """
+    rule = RecurringRule(
+        user_id=transaction.user_id,
+        amount_cents=transaction.amount_cents,
+        currency=transaction.currency,
+        category_id=transaction.category_id,
+        transaction_type=transaction.transaction_type,
+        frequency=transaction.frequency,
+        start_date=transaction.date,
+        occurrences=1,
+        next_due_at=occurrence_date(transaction.date, transaction.frequency, 1),
+    )
+    db.session.add(rule)
+    db.session.flush()
+    transaction.recurring_rule_id = rule.id
+    return rule
+
+
+def stop_rule_for(transaction):
+    """Beendet den Dauerauftrag, wenn ``transaction`` seine Ausführung Nr. 0 ist.
+
+    Wer die ursprüngliche Transaktion löscht, beendet damit den Dauerauftrag;
+    spätere Ausführungen bleiben stehen. Die Session wird nicht committet.
+    """
+    if transaction.recurring_rule_id is None:
+        return None
+    rule = db.session.get(RecurringRule, transaction.recurring_rule_id)
+    if rule is None or rule.start_date != transaction.date:
+        return None
+    rule.active = False
+    return rule
+
+
+def due_rules_query(now, chunk_size, shard=0, shards=1, skip_users=()):
+    query = (
+        select(RecurringRule.__table__)
+        .where(RecurringRule.active.is_(True), RecurringRule.next_due_at <= now)
+        .order_by(RecurringRule.next_due_at, RecurringRule.id)
+        .limit(chunk_size)
+        # Auf Postgres überspringen parallele Worker gesperrte Zeilen; SQLite ignoriert das
+        .with_for_update(skip_locked=True)
+    )
+    if shards > 1:
+        query = query.where(RecurringRule.user_id % shards == shard)
+    if skip_users:
+        query = query.where(RecurringRule.user_id.not_in(skip_users))
+    return query
+
+
+def run_due_rules(now=None, chunk_size=500, shard=0, shards=1, skip_users=()):
+    """Erzeugt alle bis ``now`` fälligen Ausführungen.
+
+    Pro Chunk von ``chunk_size`` Daueraufträgen gibt es genau eine
+    DB-Transaktion: die verpassten Ausführungen werden gesammelt per
+    executemany eingefügt und ``next_due_at`` wird per Compare-and-Set
+    weitergesetzt. Läuft ein zweiter Prozess parallel, verhindert der
+    eindeutige Index auf (recurring_rule_id, date) doppelte Buchungen.
+    ``shard``/``shards`` teilen die Arbeit nach ``user_id`` auf, die
+    Daueraufträge von ``skip_users`` bleiben liegen.
+    """
+    now = now or datetime.utcnow()
+    started = time.perf_counter()
+    transactions = Transaction.__table__
+    # RETURNING liefert nur die tatsächlich eingefügten Ausführungen (für die Budget-Rollups)
+    insert = insert_ignoring_duplicates(transactions).returning(
+        transactions.c.user_id, transactions.c.category_id, transactions.c.transaction_type,
+        transactions.c.amount_cents, transactions.c.date,
+    )
+    table = RecurringRule.__table__
+    advance = (
+        table.update()
+        .where(table.c.id == bindparam("rule_id"), table.c.next_due_at == bindparam("old_due"))
+        .values(occurrences=bindparam("occurrences"), next_due_at=bindparam("next_due_at"))
+    )
+    rules_done = created = chunks = 0
+
+    while True:
+        rules = db.session.execute(due_rules_query(now, chunk_size, shard, shards, skip_users)).all()
+        if not rules:
+            break
+
+        rows = []
+        advances = []
+        for rule in rules:
+            index = rule.occurrences
+            due = rule.next_due_at
+            while due <= now:
+                rows.append({
+                    "user_id": rule.user_id,
+                    "amount_cents": rule.amount_cents,
+                    "currency": rule.currency,
+                    "category_id": rule.category_id,
+                    "transaction_type": rule.transaction_type,
+                    "frequency": rule.frequency,
+                    "date": due,
+                    "recurring_rule_id": rule.id,
+                })
+                index += 1
+                due = occurrence_date(rule.start_date, rule.frequency, index)
+            advances.append((rule, index, due))
+
+        inserted = 0
+        if rows:
+            created_rows = db.session.execute(insert, rows).all()
+            record_transactions(created_rows)
+            inserted = len(created_rows)
+            if created_rows:
+                bump_data_version(*{row.user_id for row in created_rows})
+        db.session.execute(advance, [
+            {"rule_id": rule.id, "old_due": rule.next_due_at, "occurrences": index, "next_due_at": due}
+            for rule, index, due in advances
+        ])
+        db.session.commit()
+
+        chunks += 1
+        rules_done += len(rules)
+        created += inserted
+        logger.debug("Daueraufträge: Chunk %d, %d Regeln, %d Buchungen", chunks, len(rules), inserted)
+
+    return RunResult(rules_done, created, chunks, time.perf_counter() - started)
+
+
+def run_all_databases(now=None, chunk_size=500, shard=0, shards=1):
+    """``run_due_rules`` in jedem Datenbank-Shard (app/sharding.py), zusammengezählt.
+
+    Benutzer, deren Daten gerade umziehen, kommen beim nächsten Lauf dran.
+    """
+    from .sharding import each_shard, moving_users
+
+    now = now or datetime.utcnow()
+    results = [run_due_rules(now, chunk_size, shard, shards, moving_users(name)) for name in each_shard()]
+    return RunResult(*(sum(values) for values in zip(*results)))
+
+
+def run_shard(database_uri, shard, shards, now, chunk_size):
+    # Läuft in einem eigenen Prozess und braucht daher eine eigene App
+    from . import create_app
+
+    app = create_app(SQLALCHEMY_DATABASE_URI=database_uri)
+    with app.app_context():
+        return run_all_databases(now, chunk_size, shard, shards)
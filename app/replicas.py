@@ -0,0 +1,130 @@
+# app/replicas.py
+# Lesereplikate: Seiten, die nur lesen (``read_only``), holen ihre Daten von
+# einem Replikat statt von der primären Datenbank.
+#
+# DATABASE_REPLICAS nennt je Datenbank ('main' oder ein Shard wie 'shard0')
+# die URIs ihrer Replikate; sie werden als Binds 'main-replica0', ... angelegt
+# und reihum benutzt. Welche Datenbank gemeint ist, entscheidet weiterhin
+# ``app.routing.RoutingSession``; geschrieben wird immer primär, und nach dem
+# ersten Schreibzugriff liest auch die Session nur noch primär.
+#
+# Replikate hinken hinterher. Damit ein Benutzer seine eigenen Änderungen
+# sieht, liest er nach jedem Request mit Schreibzugriff REPLICA_STICKY_SECONDS
+# lang nur von der primären Datenbank; die Frist steht in seinem Session-Cookie
+# und gilt damit in jedem Prozess.
+#
+# Für die lokale Entwicklung stehen SQLite-Kopien für echte Replikate:
+# ``sync_sqlite_replicas`` (bzw. ``flask replicas sync``) kopiert die primären
+# Dateien per Backup-API hinein.
+import functools
+import itertools
+import threading
+import time
+
+from flask import current_app, request, session
+
+from . import db
+
+
+class ReplicaStats:
+    """Lesende Statements nach Ziel (primär oder Replikat)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.primary = self.replica = 0
+
+    def incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def offload_ratio(self):
+        total = self.primary + self.replica
+        return self.replica / total if total else 0.0
+
+
+class Replicas:
+    def __init__(self, names):
+        self.names = names  # primärer Bind (None = Haupt-Datenbank) -> [Binds der Replikate]
+        self.stats = ReplicaStats()
+        self._turns = {key: itertools.count() for key in names}
+
+    def pick(self, key):
+        """Nächstes Replikat der Datenbank ``key`` oder None, wenn sie keins hat."""
+        names = self.names.get(key)
+        if not names:
+            return None
+        return names[next(self._turns[key]) % len(names)]
+
+
+def replica_binds(config):
+    # {Bind des Replikats: (primärer Bind, URI)}
+    binds = {}
+    for database, uris in config["DATABASE_REPLICAS"].items():
+        for i, uri in enumerate(uris):
+            binds[f"{database}-replica{i}"] = (None if database == "main" else database, uri)
+    return binds
+
+
+def init_replica_binds(app):
+    # Vor db.init_app aufrufen: die Replikate werden als zusätzliche Binds angelegt
+    binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+    binds.update((name, uri) for name, (_, uri) in replica_binds(app.config).items())
+    app.config["SQLALCHEMY_BINDS"] = binds
+
+
+def init_replicas(app):
+    # Nach db.init_app und init_sharding aufrufen
+    names = {}
+    for name, (primary, _) in replica_binds(app.config).items():
+        # Wie bei den Shards: create_all/drop_all betreffen nur die primären Datenbanken
+        db.metadatas.pop(name, None)
+        if primary is not None and primary not in app.extensions["shards"]:
+            raise ValueError(f"Replikat für unbekannte Datenbank: {primary!r}")
+        names.setdefault(primary, []).append(name)
+    if not names:
+        return None
+    replicas = app.extensions["replicas"] = Replicas(names)
+    app.before_request(reset_replica_reads)
+    app.after_request(stick_to_primary)
+    app.teardown_request(reset_replica_reads)
+    return replicas
+
+
+def stick_to_primary(response):
+    if db.session.info.get("wrote"):
+        session["primary_until"] = time.time() + current_app.config["REPLICA_STICKY_SECONDS"]
+    return response
+
+
+def reset_replica_reads(error=None):
+    # Am Ende erst beim Teardown, nicht nach der View: gestreamte Seiten lesen noch beim Senden
+    db.session.info.pop("replica_reads", None)
+    db.session.info.pop("wrote", None)
+
+
+def read_only(view):
+    """Erlaubt der View, von Replikaten zu lesen, außer kurz nach eigenen Schreibzugriffen."""
+    @functools.wraps(view)
+    def wrapped(*args, **kwargs):
+        if ("replicas" in current_app.extensions and request.method in ("GET", "HEAD")
+                and session.get("primary_until", 0) <= time.time()):
+            db.session.info["replica_reads"] = True
+        return view(*args, **kwargs)
+
+    return wrapped
+
+
+def sync_sqlite_replicas():
+    """Kopiert jede primäre SQLite-Datenbank in ihre Replikate; liefert die Anzahl der Kopien."""
+    copies = 0
+    for primary, names in current_app.extensions["replicas"].names.items():
+        source = db.engines[primary]
+        for name in names:
+            target = db.engines[name]
+            if source.dialect.name != "sqlite" or target.dialect.name != "sqlite":
+                raise ValueError(f"{name}: nur SQLite-Replikate lassen sich kopieren")
+            # Die Backup-API liefert einen konsistenten Stand, auch während geschrieben wird
+            with source.connect() as reader, target.connect() as writer:
+                reader.connection.driver_connection.backup(writer.connection.driver_connection)
+            copies += 1
+    return copies
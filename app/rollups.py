@@ -0,0 +1,28 @@
+# app/rollups.py
+# Gemeinsamer Einstiegspunkt für alle beim Schreiben gepflegten Aggregate.
+# Die Zeilen-Tupel tragen Beträge in ganzen Cent und die Kategorie als ID.
+from . import budgets, monthly_totals, search
+
+
+def as_tuples(transactions):
+    return [(t.user_id, t.category_id, t.transaction_type, t.amount_cents, t.date) for t in transactions]
+
+
+def apply_rows(rows, sign):
+    budgets.apply_deltas(budgets.rollup_deltas(rows, sign))
+    monthly_totals.apply_deltas(monthly_totals.monthly_deltas(rows, sign))
+    search.apply_deltas(search.category_deltas(rows, sign))
+
+
+def record_transactions(transactions):
+    # Objekte oder Zeilen mit den Attributen einer Transaktion, kein Commit
+    apply_rows(as_tuples(transactions), 1)
+
+
+def forget_transactions(transactions):
+    apply_rows(as_tuples(transactions), -1)
+
+
+def record_values(values):
+    # Spalten-Dicts, wie sie für Core-Inserts gebaut werden
+    apply_rows([(v["user_id"], v["category_id"], v["transaction_type"], v["amount_cents"], v["date"]) for v in values], 1)
@@ -1,38 +1,107 @@
 # app/routes.py
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from werkzeug.security import generate_password_hash, check_password_hash
-from .models import User, Transaction, Budget, SavingsGoal
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, current_app, Response, stream_with_context, abort, send_file
+from .models import User, Transaction, Budget, SavingsGoal, Job, bump_data_version
+from .money import Money
+from .passwords import HasherBusy
+from .pagination import paginate_transactions, clamp_per_page, decode_cursor, InvalidCursor
+from .recurring import is_recurring, create_rule_for, stop_rule_for
+from .budgets import user_budget_statuses
+from .categories import category_id
+from .savings import contribute, delete_goal, forget_transaction_contributions, savings_statuses, ContributionError
+from .rollups import record_transactions, forget_transactions
+from .templating import render_page
+from .search import parse_filters, conditions, InvalidFilter
+from .jobs import enqueue, spool_path
+from .conditional import conditional, user_state
+from .replicas import read_only
 from . import db
+from sqlalchemy import inspect as sa_inspect
 import logging
+import os
+import uuid
+from datetime import date, datetime
 
 main = Blueprint('main', __name__)
+logger = logging.getLogger(__name__)
+
+def page_size():
+    return clamp_per_page(
+        request.args.get("per_page"),
+        current_app.config["TRANSACTIONS_PER_PAGE"],
+        current_app.config["TRANSACTIONS_MAX_PER_PAGE"],
+    )
+
+def page_key():
+    # Seitenparameter für Cache-Schlüssel, nur aus geprüften Werten (nie der Rohtext der Anfrage)
+    cursors = []
+    for name in ("after", "before"):
+        cursor = request.args.get(name)
+        if cursor:
+            cursor_date, cursor_id = decode_cursor(cursor)
+            cursors.append(f"{cursor_date.isoformat()}/{cursor_id}")
+        else:
+            cursors.append("")
+    return ":".join([*cursors, str(page_size())])
+
+def transaction_page(user_id, filters=None):
+    # Liest Cursor und Seitengröße aus der Anfrage und lädt genau eine Seite
+    per_page = page_size()
+    query = Transaction.query.filter_by(user_id=user_id)
+    if filters is not None:
+        query = query.filter(*conditions(user_id, filters))
+    page = paginate_transactions(
+        query,
+        per_page,
+        after=request.args.get("after"),
+        before=request.args.get("before"),
+    )
+    return page, per_page
+
+def password_hasher():
+    return current_app.extensions["password_hasher"]
+
+def hasher_busy(template):
+    # Backpressure: lieber sofort ablehnen als weitere Request-Threads zu blockieren
+    flash("Zu viele gleichzeitige Anmeldungen, bitte versuche es gleich noch einmal.", "warning")
+    return render_template(template), 503, {"Retry-After": "1"}
 
 # Login
 @main.route("/login", methods=["GET", "POST"])
 def user_login():
     if request.method == "POST":
-        logging.debug("POST-Anfrage an /login")
+        logger.debug("POST-Anfrage an /login")
         email = request.form["email"]
         password = request.form["password"]
         user = User.query.filter_by(email=email).first()
 
         if not user:
             flash("Benutzer existiert nicht.", "danger")
-            logging.debug(f"Login fehlgeschlagen: Benutzer existiert nicht für Email: {email}")
+            logger.debug("Login fehlgeschlagen: Benutzer existiert nicht")
             return redirect(url_for("main.user_login"))
 
-        if not check_password_hash(user.password, password):
+        hasher = password_hasher()
+        try:
+            valid = hasher.verify(user.password, password)
+            if valid and hasher.needs_rehash(user.password):
+                # Policy hat sich geändert: mit dem Klartext von eben neu hashen
+                user.password = hasher.hash(password)
+                db.session.commit()
+                logger.debug("Passwort-Hash aktualisiert für Benutzer %s", user.id)
+        except HasherBusy:
+            return hasher_busy("login.html")
+
+        if not valid:
             flash("Falsches Passwort.", "danger")
-            logging.debug(f"Login fehlgeschlagen: Falsches Passwort für Email: {email}")
+            logger.debug("Login fehlgeschlagen: Falsches Passwort für Benutzer %s", user.id)
             return redirect(url_for("main.user_login"))
 
         # Login erfolgreich
         session["user_id"] = user.id
         flash("Erfolgreich eingeloggt!", "success")
-        logging.debug(f"Benutzer eingeloggt: {email}, session user_id: {session.get('user_id')}")
+        logger.debug("Benutzer eingeloggt: %s", user.id)
         return redirect(url_for("main.dashboard"))
 
-    logging.debug("GET-Anfrage an /login")
+    logger.debug("GET-Anfrage an /login")
     return render_template("login.html")
 
 # Startseite
@@ -46,30 +115,34 @@ def home():
 @main.route("/register", methods=["GET", "POST"])
 def register():
     if request.method == "POST":
-        logging.debug("POST-Anfrage an /register")
+        logger.debug("POST-Anfrage an /register")
         username = request.form["username"]
         email = request.form["email"]
         password = request.form["password"]
-        hashed_password = generate_password_hash(password, method="pbkdf2:sha256")
 
-        # Überprüfen, ob Benutzer oder Email bereits existieren
+        # Überprüfen, ob Benutzer oder Email bereits existieren (vor dem teuren Hash)
         existing_user = User.query.filter(
             (User.username == username) | (User.email == email)
         ).first()
         if existing_user:
             flash("Benutzername oder Email bereits vergeben.", "danger")
-            logging.debug(f"Registrierung fehlgeschlagen: Benutzername oder Email bereits vorhanden für {username}, {email}")
+            logger.debug("Registrierung fehlgeschlagen: Benutzername oder Email bereits vergeben")
             return redirect(url_for("main.register"))
 
+        try:
+            hashed_password = password_hasher().hash(password)
+        except HasherBusy:
+            return hasher_busy("register.html")
+
         # Erstelle neuen Benutzer
         new_user = User(username=username, email=email, password=hashed_password)
         db.session.add(new_user)
         db.session.commit()
-        logging.debug(f"Benutzer registriert: {username}, {email}")
+        logger.debug("Benutzer registriert: %s", new_user.id)
 
         flash("Registrierung erfolgreich! Bitte melde dich an.", "success")
         return redirect(url_for("main.user_login"))
-    logging.debug("GET-Anfrage an /register")
+    logger.debug("GET-Anfrage an /register")
     return render_template("register.html")
 
 # Logout
@@ -77,33 +150,101 @@ def register():
 def logout():
     session.pop("user_id", None)
     flash("Erfolgreich abgemeldet", "success")
-    logging.debug("Benutzer abgemeldet")
+    logger.debug("Benutzer abgemeldet")
     return redirect(url_for("main.user_login"))
 
 # Dashboard
 @main.route("/dashboard")
+@read_only
+@conditional
 def dashboard():
     if "user_id" not in session:
         flash("Bitte melde dich an", "warning")
-        logging.debug("Zugriff auf /dashboard ohne Anmeldung")
+        logger.debug("Zugriff auf /dashboard ohne Anmeldung")
         return redirect(url_for("main.user_login"))
 
-    user = db.session.get(User, session["user_id"])
-    if user is None:
+    # Dieselbe Zeile, aus der conditional den ETag berechnet hat
+    user = user_state(session["user_id"])
+    if not user.exists:
         flash("Benutzer nicht gefunden. Bitte melde dich erneut an.", "danger")
-        logging.debug(f"Benutzer mit ID {session['user_id']} nicht gefunden.")
+        logger.debug("Benutzer mit ID %s nicht gefunden.", user.id)
         session.pop("user_id", None)
         return redirect(url_for("main.user_login"))
 
-    transactions = Transaction.query.filter_by(user_id=user.id).order_by(Transaction.date.desc()).all()
-    budgets = Budget.query.filter_by(user_id=user.id).all()
-    savings_goals = SavingsGoal.query.filter_by(user_id=user.id).all()
-    logging.debug(f"Dashboard geladen für Benutzer: {user.username}")
-    return render_template(
-        "dashboard.html",
-        transactions=transactions,
-        budgets=budgets,
-        savings_goals=savings_goals,
+    cache = current_app.extensions["cache"]
+    # data_version ändert sich bei jedem Schreibzugriff, alte Einträge werden so nie mehr getroffen
+    try:
+        key = "dashboard:{}:{}:{}:{}".format(user.id, user.data_version, date.today().isoformat(), page_key())
+        data = cache.get(key)
+        if data is None:
+            data = dashboard_data(user.id)
+            cache.set(key, data)
+    except InvalidCursor:
+        flash("Ungültige Seite.", "warning")
+        return redirect(url_for("main.dashboard"))
+    logger.debug("Dashboard geladen für Benutzer: %s", user.id)
+    return render_page("dashboard.html", **data)
+
+def plain(obj):
+    # Spaltenwerte (und Money-Beträge) eines Modells als dict, damit sie sich cachen (und picklen) lassen
+    mapper = sa_inspect(type(obj))
+    values = {column.key: getattr(obj, column.key) for column in mapper.column_attrs}
+    values.update((composite.key, getattr(obj, composite.key)) for composite in mapper.composites)
+    return values
+
+def dashboard_data(user_id):
+    page, per_page = transaction_page(user_id)
+    savings_goals = SavingsGoal.query.filter_by(user_id=user_id).order_by(SavingsGoal.id).all()
+    return dict(
+        transactions=[plain(t) for t in page.items],
+        next_cursor=page.next_cursor,
+        prev_cursor=page.prev_cursor,
+        per_page=per_page,
+        budgets=[status._replace(budget=plain(status.budget)) for status in user_budget_statuses(user_id)],
+        savings_goals=[status._replace(goal=plain(status.goal)) for status in savings_statuses(savings_goals)],
+    )
+
+# Alle (oder die gefilterten) Transaktionen auf einer Seite; die Zeilen kommen während des Renderns aus der Datenbank
+@main.route("/transactions")
+@read_only
+@conditional
+def transactions():
+    if "user_id" not in session:
+        flash("Bitte melde dich an", "warning")
+        return redirect(url_for("main.user_login"))
+
+    from .exporter import iter_transaction_rows
+
+    try:
+        filters = parse_filters(request.args)
+    except InvalidFilter:
+        flash("Ungültiger Filter.", "warning")
+        return redirect(url_for("main.transactions"))
+    rows = iter_transaction_rows(session["user_id"], chunk_size=current_app.config["EXPORT_CHUNK_SIZE"],
+                                 newest_first=True, filters=filters)
+    return render_page("transactions.html", transactions=rows, filters=filters)
+
+# Transaktionen als JSON (seitenweise, optional gefiltert: q, category, start, end, min, max, type)
+@main.route("/api/transactions")
+@read_only
+@conditional
+def api_transactions():
+    if "user_id" not in session:
+        return jsonify(error="Nicht angemeldet"), 401
+
+    try:
+        filters = parse_filters(request.args)
+    except InvalidFilter:
+        return jsonify(error="Ungültiger Filter"), 400
+    try:
+        page, per_page = transaction_page(session["user_id"], filters)
+    except InvalidCursor:
+        return jsonify(error="Ungültiger Cursor"), 400
+    return jsonify(
+        transactions=[t.to_dict() for t in page.items],
+        next_cursor=page.next_cursor,
+        prev_cursor=page.prev_cursor,
+        per_page=per_page,
     )
 
 # Transaktion hinzufügen
@@ -115,27 +256,145 @@ def add_transaction():
 
     if request.method == "POST":
         try:
-            amount = float(request.form["amount"])
-            category = request.form["category"]
+            amount = Money.parse(request.form["amount"])
             transaction_type = request.form["transaction_type"]
             frequency = request.form["frequency"]  # Das neue Feld
             user_id = session["user_id"]
             transaction = Transaction(
                 user_id=user_id,
                 amount=amount,
-                category=category,
+                category_id=category_id(user_id, request.form["category"]),
                 transaction_type=transaction_type,
                 frequency=frequency,
+                date=datetime.utcnow(),
             )
             db.session.add(transaction)
+            if is_recurring(frequency):
+                create_rule_for(transaction)
+            goal_id = request.form.get("savings_goal_id", type=int)
+            if goal_id:
+                # Die Transaktion zählt zugleich als Einzahlung auf das Sparziel
+                goal = db.session.get(SavingsGoal, goal_id)
+                if goal is None or goal.user_id != user_id:
+                    raise ContributionError(f"Unbekanntes Sparziel: {goal_id}")
+                db.session.flush()
+                contribute(goal, amount, transaction.date, transaction.id)
+            record_transactions([transaction])
+            bump_data_version(user_id)
             db.session.commit()
             flash("Transaktion hinzugefügt!", "success")
             return redirect(url_for("main.dashboard"))
         except Exception as e:
+            db.session.rollback()
             flash("Fehler beim Hinzufügen der Transaktion.", "danger")
-            logging.error(f"Fehler beim Hinzufügen der Transaktion: {e}")
+            logger.error("Fehler beim Hinzufügen der Transaktion: %s", e)
             return redirect(url_for("main.add_transaction"))
-    return render_template("add_transaction.html")
+    savings_goals = SavingsGoal.query.filter_by(user_id=session["user_id"]).order_by(SavingsGoal.id).all()
+    return render_template("add_transaction.html", savings_goals=savings_goals)
+
+# Kontoauszug importieren
+@main.route("/import_transactions", methods=["GET", "POST"])
+def import_transactions():
+    if "user_id" not in session:
+        flash("Bitte melde dich an, um Transaktionen zu importieren.", "warning")
+        return redirect(url_for("main.user_login"))
+
+    if request.method == "POST":
+        upload = request.files.get("file")
+        if upload is None or not upload.filename:
+            flash("Bitte wähle eine Datei aus.", "warning")
+            return redirect(url_for("main.import_transactions"))
+
+        # Der Import selbst läuft im Worker; die Datei wird dafür im Spool-Verzeichnis abgelegt
+        fmt = "ofx" if upload.filename.lower().endswith((".ofx", ".qfx")) else "csv"
+        path = spool_path(f"upload-{uuid.uuid4().hex}.{fmt}")
+        try:
+            upload.save(path)
+            job = enqueue("import", {"path": path, "format": fmt, "filename": upload.filename}, session["user_id"])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if os.path.exists(path):
+                os.remove(path)
+            flash("Fehler beim Importieren der Datei.", "danger")
+            logger.error("Fehler beim Importieren der Datei: %s", e)
+            return redirect(url_for("main.import_transactions"))
+
+        logger.debug("Import-Job %s für Benutzer %s angelegt", job.id, session["user_id"])
+        return job_accepted(job)
+    return render_template("import_transactions.html")
+
+# Transaktionen exportieren (CSV oder NDJSON, gestreamt; per POST als Hintergrund-Job)
+@main.route("/export_transactions", methods=["GET", "POST"])
+@read_only
+def export_transactions():
+    if "user_id" not in session:
+        flash("Bitte melde dich an, um Transaktionen zu exportieren.", "warning")
+        return redirect(url_for("main.user_login"))
+
+    from .exporter import export_chunks, parse_day, FORMATS
+
+    fmt = request.values.get("format", "csv")
+    if fmt not in FORMATS:
+        flash("Unbekanntes Exportformat.", "danger")
+        return redirect(url_for("main.dashboard"))
+    try:
+        start = parse_day(request.values.get("start"))
+        end = parse_day(request.values.get("end"))
+    except ValueError:
+        flash("Ungültiger Zeitraum.", "danger")
+        return redirect(url_for("main.dashboard"))
+
+    if request.method == "POST":
+        job = enqueue("export", {
+            "format": fmt, "start": request.values.get("start"), "end": request.values.get("end"),
+        }, session["user_id"])
+        db.session.commit()
+        return job_accepted(job)
+
+    mimetype, extension = FORMATS[fmt]
+    chunks = export_chunks(fmt, session["user_id"], start, end, current_app.config["EXPORT_CHUNK_SIZE"])
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=transaktionen.{extension}"},
+    )
+
+# Hintergrund-Jobs: Status als Seite (lädt sich neu, solange der Job läuft) und als JSON
+def job_accepted(job):
+    return render_template("job.html", job=job), 202, {"Location": url_for("main.job_status", id=job.id)}
+
+def user_job(id):
+    job = db.session.get(Job, id)
+    if job is None or job.user_id != session["user_id"]:
+        abort(404)
+    return job
+
+@main.route("/jobs/<int:id>")
+def job_page(id):
+    if "user_id" not in session:
+        flash("Bitte melde dich an.", "warning")
+        return redirect(url_for("main.user_login"))
+    return render_template("job.html", job=user_job(id))
+
+@main.route("/api/jobs/<int:id>")
+def job_status(id):
+    if "user_id" not in session:
+        return jsonify(error="Nicht angemeldet"), 401
+    return jsonify(user_job(id).to_dict())
+
+@main.route("/jobs/<int:id>/download")
+def job_download(id):
+    if "user_id" not in session:
+        flash("Bitte melde dich an.", "warning")
+        return redirect(url_for("main.user_login"))
+    job = user_job(id)
+    if job.kind != "export" or job.status != "done":
+        abort(404)
+    from .exporter import FORMATS
+    mimetype, extension = FORMATS[job.result["format"]]
+    return send_file(spool_path(job.result["file"]), mimetype=mimetype, as_attachment=True,
+                     download_name=f"transaktionen.{extension}")
 
 # Transaktion löschen
 @main.route("/delete_transaction/<int:id>", methods=["POST"])
@@ -150,12 +409,17 @@ def delete_transaction(id):
         return redirect(url_for("main.dashboard"))
 
     try:
+        forget_transactions([transaction])
+        forget_transaction_contributions([transaction.id])
+        rule = stop_rule_for(transaction)
         db.session.delete(transaction)
+        bump_data_version(transaction.user_id)
         db.session.commit()
-        flash("Transaktion gelöscht!", "success")
+        flash("Transaktion gelöscht! Der Dauerauftrag ist beendet." if rule else "Transaktion gelöscht!", "success")
     except Exception as e:
+        db.session.rollback()
         flash("Fehler beim Löschen der Transaktion.", "danger")
-        logging.error(f"Fehler beim Löschen der Transaktion: {e}")
+        logger.error("Fehler beim Löschen der Transaktion: %s", e)
     return redirect(url_for("main.dashboard"))
 
 # Budget hinzufügen
@@ -167,20 +431,22 @@ def add_budget():
 
     if request.method == "POST":
         try:
-            category = request.form["category"]
-            amount = float(request.form["amount"])
+            amount = Money.parse(request.form["amount"])
             period = request.form["period"]
             user_id = session["user_id"]
             budget = Budget(
-                user_id=user_id, category=category, amount=amount, period=period
+                user_id=user_id, category_id=category_id(user_id, request.form["category"]),
+                amount=amount, period=period,
             )
             db.session.add(budget)
+            bump_data_version(user_id)
             db.session.commit()
             flash("Budget hinzugefügt!", "success")
             return redirect(url_for("main.dashboard"))
         except Exception as e:
+            db.session.rollback()
             flash("Fehler beim Hinzufügen des Budgets.", "danger")
-            logging.error(f"Fehler beim Hinzufügen des Budgets: {e}")
+            logger.error("Fehler beim Hinzufügen des Budgets: %s", e)
             return redirect(url_for("main.add_budget"))
     return render_template("add_budget.html")
 
@@ -198,11 +464,13 @@ def delete_budget(id):
 
     try:
         db.session.delete(budget)
+        bump_data_version(budget.user_id)
         db.session.commit()
         flash("Budget gelöscht!", "success")
     except Exception as e:
+        db.session.rollback()
         flash("Fehler beim Löschen des Budgets.", "danger")
-        logging.error(f"Fehler beim Löschen des Budgets: {e}")
+        logger.error("Fehler beim Löschen des Budgets: %s", e)
     return redirect(url_for("main.dashboard"))
 
 # Sparziel hinzufügen
@@ -215,20 +483,22 @@ def add_savings_goal():
     if request.method == "POST":
         try:
             name = request.form["name"]
-            target_amount = float(request.form["target_amount"])
+            target_amount = Money.parse(request.form["target_amount"])
             user_id = session["user_id"]
 
             new_goal = SavingsGoal(
                 user_id=user_id, name=name, target_amount=target_amount
             )
             db.session.add(new_goal)
+            bump_data_version(user_id)
             db.session.commit()
 
             flash("Sparziel erfolgreich hinzugefügt!", "success")
             return redirect(url_for("main.dashboard"))
         except Exception as e:
+            db.session.rollback()
             flash("Fehler beim Hinzufügen des Sparziels.", "danger")
-            logging.error(f"Fehler beim Hinzufügen des Sparziels: {e}")
+            logger.error("Fehler beim Hinzufügen des Sparziels: %s", e)
             return redirect(url_for("main.add_savings_goal"))
     return render_template("add_savings_goal.html")
 
@@ -245,10 +515,35 @@ def delete_savings_goal(id):
         return redirect(url_for("main.dashboard"))
 
     try:
-        db.session.delete(savings_goal)
+        delete_goal(savings_goal)
+        bump_data_version(savings_goal.user_id)
         db.session.commit()
         flash("Sparziel gelöscht!", "success")
     except Exception as e:
+        db.session.rollback()
         flash("Fehler beim Löschen des Sparziels.", "danger")
-        logging.error(f"Fehler beim Löschen des Sparziels: {e}")
+        logger.error("Fehler beim Löschen des Sparziels: %s", e)
+    return redirect(url_for("main.dashboard"))
+
+# Einzahlung auf ein Sparziel
+@main.route("/savings_goal/<int:id>/contribute", methods=["POST"])
+def contribute_to_savings_goal(id):
+    if "user_id" not in session:
+        flash("Bitte melde dich an.", "warning")
+        return redirect(url_for("main.user_login"))
+
+    savings_goal = SavingsGoal.query.get_or_404(id)
+    if savings_goal.user_id != session["user_id"]:
+        flash("Zugriff verweigert.", "danger")
+        return redirect(url_for("main.dashboard"))
+
+    try:
+        contribute(savings_goal, Money.parse(request.form["amount"], savings_goal.currency))
+        bump_data_version(savings_goal.user_id)
+        db.session.commit()
+        flash("Einzahlung gebucht!", "success")
+    except Exception as e:
+        db.session.rollback()
+        flash("Fehler bei der Einzahlung.", "danger")
+        logger.error("Fehler bei der Einzahlung auf Sparziel %s: %s", id, e)
     return redirect(url_for("main.dashboard"))
@@ -0,0 +1,74 @@
+# app/routing.py
+# Session, die jedes Statement an die richtige Datenbank schickt.
+#
+# Ohne Sharding gibt es nur die Haupt-Datenbank. Mit Sharding (app/sharding.py)
+# liegen dort nur noch die Tabellen in GLOBAL_TABLES; alle anderen Tabellen
+# gibt es in jedem Shard, und ein Statement geht an den Shard, der für die
+# Session gewählt ist (``session.info["shard"]``, gesetzt pro Request bzw. Job).
+# Statements ohne erkennbare Tabelle (``text()``, ``get_bind()`` für den
+# Dialekt) folgen ebenfalls dem gewählten Shard.
+#
+# Sind Lesereplikate konfiguriert (app/replicas.py), gehen lesende Statements
+# an ein Replikat der so bestimmten Datenbank, wenn die View es erlaubt
+# (``session.info["replica_reads"]``) und die Session noch nichts geschrieben hat.
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import inspect
+from sqlalchemy.sql.util import find_tables
+
+# Benutzer, Jobs und die Shard-Zuordnung selbst gibt es nur einmal
+GLOBAL_TABLES = frozenset({"user", "job", "shard_assignment"})
+
+
+class NoShardSelected(RuntimeError):
+    """Zugriff auf Benutzerdaten, ohne dass für die Session ein Shard gewählt ist."""
+
+
+def statement_tables(mapper, clause):
+    names = set()
+    if mapper is not None:
+        names.update(table.name for table in inspect(mapper).tables)
+    if clause is not None:
+        names.update(table.name for table in find_tables(clause, include_crud=True))
+    return names
+
+
+def is_read(clause):
+    # SELECT ohne FOR UPDATE; ORM-Flushes (ohne Statement), DML und text() schreiben
+    return bool(getattr(clause, "is_select", False)) and getattr(clause, "_for_update_arg", None) is None
+
+
+class RoutingSession(Session):
+    def primary_key(self, mapper, clause):
+        """Bind der primären Datenbank: None (Haupt-Datenbank) oder der Name des Shards."""
+        if not current_app.extensions.get("shards"):
+            return None
+        tables = statement_tables(mapper, clause)
+        if tables and tables <= GLOBAL_TABLES:
+            return None
+        shard = self.info.get("shard")
+        if shard is None and tables:
+            raise NoShardSelected(", ".join(sorted(tables)))
+        return shard
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is not None:
+            return bind
+        engines = self._db.engines
+        key = self.primary_key(mapper, clause)
+        replicas = current_app.extensions.get("replicas")
+        # Ohne Statement fragt der Aufrufer nur nach dem Dialekt
+        if replicas is None or (mapper is None and clause is None):
+            return engines[key]
+
+        # Nach einem Schreibzugriff liest die Session nur noch von der primären Datenbank
+        if not is_read(clause):
+            self.info["wrote"] = True
+            return engines[key]
+        if self.info.get("replica_reads") and not self.info.get("wrote"):
+            replica = replicas.pick(key)
+            if replica is not None:
+                replicas.stats.incr("replica")
+                return engines[replica]
+        replicas.stats.incr("primary")
+        return engines[key]
@@ -0,0 +1,126 @@
+# app/savings.py
+# Sparziele: Einzahlungen als Ledger (``savings_contribution``), der aktuelle
+# Stand wird bei jeder Einzahlung in derselben DB-Transaktion fortgeschrieben.
+#
+# ``current_cents`` ist damit ein Aggregat wie die Budget-Rollups: Lesen
+# kostet keine Summe über das Ledger, ``rebuild_savings`` repariert alle Ziele
+# mit einer einzigen UPDATE-Abfrage.
+import math
+from collections import defaultdict, namedtuple
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import bindparam, case, func, select
+
+from . import db
+from .models import SavingsContribution, SavingsGoal, bump_data_version, bump_all_data_versions
+
+# Für die Prognose zählt mindestens ein Monat, damit eine einzelne Einzahlung
+# nicht eine Sparrate "pro Tag" ergibt
+MIN_RATE_DAYS = 30
+
+SavingsStatus = namedtuple("SavingsStatus", ["goal", "percent", "projected_completion"])
+
+
+class ContributionError(ValueError):
+    pass
+
+
+def contribute(goal, amount, day=None, transaction_id=None):
+    """Bucht eine Einzahlung und schreibt den Stand des Ziels fort; kein Commit."""
+    if amount.currency != goal.currency:
+        raise ContributionError(f"Währung {amount.currency} passt nicht zum Sparziel ({goal.currency})")
+    if amount.cents <= 0:
+        raise ContributionError("Einzahlungen müssen positiv sein")
+    day = day or datetime.utcnow()
+    db.session.execute(SavingsContribution.__table__.insert().values(
+        goal_id=goal.id, user_id=goal.user_id, amount_cents=amount.cents, currency=amount.currency,
+        date=day, transaction_id=transaction_id,
+    ))
+    apply_deltas({goal.id: [amount.cents, day]})
+
+
+def apply_deltas(deltas):
+    # {goal_id: [Cent, frühestes Datum oder None]}; ein executemany-UPDATE, kein Commit
+    if not deltas:
+        return
+    table = SavingsGoal.__table__
+    first = bindparam("first", type_=db.DateTime)
+    update = (
+        table.update()
+        .where(table.c.id == bindparam("goal_id"))
+        .values(
+            current_cents=table.c.current_cents + bindparam("delta"),
+            first_contribution_at=case(
+                (first.is_(None), table.c.first_contribution_at),
+                (table.c.first_contribution_at.is_(None) | (table.c.first_contribution_at > first), first),
+                else_=table.c.first_contribution_at,
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(update, [
+        {"goal_id": goal_id, "delta": cents, "first": first_day} for goal_id, (cents, first_day) in deltas.items()
+    ])
+
+
+def forget_transaction_contributions(transaction_ids):
+    """Entfernt die Einzahlungen gelöschter Transaktionen und zieht sie vom Ziel ab; kein Commit."""
+    table = SavingsContribution.__table__
+    removed = db.session.execute(
+        table.delete().where(table.c.transaction_id.in_(transaction_ids))
+        .returning(table.c.goal_id, table.c.amount_cents)
+    ).all()
+    deltas = defaultdict(lambda: [0, None])
+    for goal_id, cents in removed:
+        deltas[goal_id][0] -= cents
+    apply_deltas(deltas)
+
+
+def delete_goal(goal):
+    # Ledger zuerst, sonst verweist es auf ein gelöschtes Ziel; kein Commit
+    db.session.execute(SavingsContribution.__table__.delete().where(SavingsContribution.goal_id == goal.id))
+    db.session.delete(goal)
+
+
+def projected_completion(goal, today=None):
+    """Voraussichtliches Erreichen des Ziels bei der bisherigen Sparrate (oder None)."""
+    today = today or date.today()
+    current, target = goal.current_amount.cents, goal.target_amount.cents
+    if current >= target:
+        return today
+    if current <= 0 or goal.first_contribution_at is None:
+        return None
+    days = max((today - goal.first_contribution_at.date()).days, MIN_RATE_DAYS)
+    per_day = current / days
+    return today + timedelta(days=math.ceil((target - current) / per_day))
+
+
+def savings_statuses(goals, today=None):
+    return [
+        SavingsStatus(
+            goal,
+            goal.current_amount.cents / goal.target_amount.cents * 100 if goal.target_amount else 0.0,
+            projected_completion(goal, today),
+        )
+        for goal in goals
+    ]
+
+
+def rebuild_savings(user_id=None):
+    """Berechnet Stand und erste Einzahlung aller Ziele in einem UPDATE aus dem Ledger neu."""
+    goals = SavingsGoal.__table__
+    contributions = SavingsContribution.__table__
+    of_goal = contributions.c.goal_id == goals.c.id
+    update = goals.update().values(
+        current_cents=func.coalesce(select(func.sum(contributions.c.amount_cents)).where(of_goal).scalar_subquery(), 0),
+        first_contribution_at=select(func.min(contributions.c.date)).where(of_goal).scalar_subquery(),
+    )
+    if user_id is not None:
+        update = update.where(goals.c.user_id == user_id)
+    result = db.session.execute(update)
+    if user_id is not None:
+        bump_data_version(user_id)
+    else:
+        bump_all_data_versions()
+    db.session.commit()
+    return result.rowcount
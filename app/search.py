@@ -0,0 +1,190 @@
+# app/search.py
+# Suche und Filter über Transaktionen: Kategorie (Volltext oder exakt), Zeitraum,
+# Betragsgrenzen und Einnahme/Ausgabe.
+#
+# Hinter jeder Filterkombination steht ein Index, immer mit user_id vorne:
+# (user_id, date, id) für Liste und Zeitraum, (user_id, category_id, date) für
+# Kategorien, (user_id, transaction_type, date) für Einnahmen/Ausgaben und
+# (user_id, amount_cents) für Betragsgrenzen.
+#
+# Freitext sucht nicht in den Transaktionen selbst, sondern im Kategorie-
+# Vokabular des Benutzers (``category``, ein paar Dutzend Zeilen): die
+# FTS5-Tabelle ``category_fts`` liefert die passenden Kategorie-IDs, danach
+# greift der Index (user_id, category_id, date) – auch zusammen mit Zeitraum
+# und Betrag, was ein Volltextindex über alle Transaktionen nicht könnte.
+# ``category.transaction_count`` wird wie die anderen Aggregate in
+# ``app.rollups`` gepflegt, Trigger halten ``category_fts`` synchron.
+import re
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import DDL, and_, bindparam, column, event, false, func, literal_column, select, table, text
+
+from . import db
+from .categories import find_category_id
+from .models import Category, Transaction, bump_all_data_versions, bump_data_version
+from .money import parse_cents
+
+Filters = namedtuple("Filters", ["q", "category", "start", "end", "min_cents", "max_cents", "transaction_type"])
+TRANSACTION_TYPES = ("income", "expense")
+
+# Contentless (content=''): nur der Index wird gespeichert, die Namen stehen in category.
+# Der Besitzer ist ein eigenes Token (u<user_id>), damit MATCH direkt auf einen Benutzer einschränkt.
+FTS_SCHEMA = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS category_fts USING fts5(
+        owner, name, content='', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS category_fts_insert AFTER INSERT ON category BEGIN
+        INSERT INTO category_fts(rowid, owner, name) VALUES (new.id, 'u' || new.user_id, new.name);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS category_fts_delete AFTER DELETE ON category BEGIN
+        INSERT INTO category_fts(category_fts, rowid, owner, name)
+        VALUES ('delete', old.id, 'u' || old.user_id, old.name);
+    END""",
+)
+
+for statement in FTS_SCHEMA:
+    event.listen(Category.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Category.__table__, "before_drop",
+             DDL("DROP TABLE IF EXISTS category_fts").execute_if(dialect="sqlite"))
+
+category_fts = table("category_fts", column("rowid"))
+
+
+def category_deltas(rows, sign=1):
+    """Zählt Transaktionen je category_id; ``rows`` wie in ``app.rollups``."""
+    deltas = defaultdict(int)
+    for _, category_id, _, _, _ in rows:
+        deltas[category_id] += sign
+    return deltas
+
+
+def apply_deltas(deltas):
+    # Ein executemany-UPDATE über den Primärschlüssel, kein Commit; die Kategorien gibt es schon
+    if not deltas:
+        return
+    categories = Category.__table__
+    update = (
+        categories.update()
+        .where(categories.c.id == bindparam("category_id"))
+        .values(transaction_count=categories.c.transaction_count + bindparam("delta"))
+    )
+    db.session.execute(update, [
+        {"category_id": category_id, "delta": delta} for category_id, delta in deltas.items()
+    ])
+
+
+class InvalidFilter(ValueError):
+    pass
+
+
+def parse_day(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d") if value else None
+    except ValueError as e:
+        raise InvalidFilter(value) from e
+
+
+def parse_amount(value):
+    if not value:
+        return None
+    try:
+        return parse_cents(value)
+    except ValueError as e:
+        raise InvalidFilter(value) from e
+
+
+def parse_filters(args):
+    """Liest die Filter aus Query-Parametern (q, category, start, end, min, max, type)."""
+    transaction_type = args.get("type") or None
+    if transaction_type not in (None, *TRANSACTION_TYPES):
+        raise InvalidFilter(transaction_type)
+    return Filters(
+        q=(args.get("q") or "").strip() or None,
+        category=args.get("category") or None,
+        start=parse_day(args.get("start")),
+        end=parse_day(args.get("end")),
+        min_cents=parse_amount(args.get("min")),
+        max_cents=parse_amount(args.get("max")),
+        transaction_type=transaction_type,
+    )
+
+
+def search_terms(value):
+    # Nur Wortzeichen: Anführungszeichen und FTS-Operatoren aus der Eingabe fallen weg
+    return re.findall(r"\w+", value.lower())
+
+
+def fts_match(user_id, terms):
+    # Alle Begriffe als Präfix in der Kategorie, eingeschränkt auf den Besitzer
+    return " AND ".join([f'owner:"u{int(user_id)}"', *(f'name:"{term}"*' for term in terms)])
+
+
+def matching_categories(user_id, value):
+    """Unterabfrage: IDs der Kategorien des Benutzers, deren Wörter mit den Suchbegriffen beginnen."""
+    terms = search_terms(value)
+    if not terms:
+        return None
+    query = select(Category.id).where(Category.user_id == user_id, Category.transaction_count > 0)
+    if db.session.get_bind().dialect.name == "sqlite":
+        return query.where(Category.id.in_(
+            select(category_fts.c.rowid).where(
+                literal_column("category_fts").op("MATCH")(fts_match(user_id, terms))
+            )
+        ))
+    # Andere Datenbanken: Teilstring im (kleinen) Vokabular des Benutzers
+    return query.where(and_(*(Category.name.ilike(f"%{term}%") for term in terms)))
+
+
+def conditions(user_id, filters):
+    """WHERE-Bedingungen für ``filters`` zusätzlich zu ``user_id = ?``.
+
+    Die Ausdrücke gehen auf die Tabellenspalten und funktionieren deshalb mit
+    ORM-Queries und Core-Selects gleichermaßen.
+    """
+    where = []
+    if filters.q:
+        categories = matching_categories(user_id, filters.q)
+        if categories is not None:
+            where.append(Transaction.category_id.in_(categories))
+    if filters.category:
+        category_id = find_category_id(user_id, filters.category)
+        where.append(Transaction.category_id == category_id if category_id is not None else false())
+    if filters.start is not None:
+        where.append(Transaction.date >= filters.start)
+    if filters.end is not None:
+        # Enddatum inklusive: der ganze Tag zählt
+        where.append(Transaction.date < filters.end + timedelta(days=1))
+    if filters.min_cents is not None:
+        where.append(Transaction.amount_cents >= filters.min_cents)
+    if filters.max_cents is not None:
+        where.append(Transaction.amount_cents <= filters.max_cents)
+    if filters.transaction_type:
+        where.append(Transaction.transaction_type == filters.transaction_type)
+    return where
+
+
+def rebuild_search_index(user_id=None):
+    """Zählt ``category.transaction_count`` neu; ohne ``user_id`` wird auch ``category_fts`` neu aufgebaut."""
+    categories = Category.__table__
+    transactions = Transaction.__table__
+    count = select(func.count()).where(
+        transactions.c.user_id == categories.c.user_id, transactions.c.category_id == categories.c.id
+    ).scalar_subquery()
+    update = categories.update().values(transaction_count=count)
+    if user_id is not None:
+        update = update.where(categories.c.user_id == user_id)
+
+    result = db.session.execute(update)
+    if user_id is None and db.session.get_bind().dialect.name == "sqlite":
+        db.session.execute(text("INSERT INTO category_fts(category_fts) VALUES ('delete-all')"))
+        db.session.execute(text(
+            "INSERT INTO category_fts(rowid, owner, name) SELECT id, 'u' || user_id, name FROM category"
+        ))
+    # Suchergebnisse stehen in bedingt ausgelieferten und gecachten Seiten
+    if user_id is not None:
+        bump_data_version(user_id)
+    else:
+        bump_all_data_versions()
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,305 @@
+# app/sharding.py
+# Horizontales Sharding der Benutzerdaten über mehrere Datenbanken.
+#
+# SHARD_DATABASE_URIS nennt die Shards; sie werden als Binds shard0, shard1, ...
+# angelegt. Die Haupt-Datenbank (SQLALCHEMY_DATABASE_URI) hält dann nur noch
+# Benutzer, Jobs und das Verzeichnis ``shard_assignment`` (Benutzer -> Shard);
+# alles andere, einschließlich ``user_state``, liegt im Shard des Benutzers.
+# Ein Schreibzugriff berührt so nur einen Shard, und jeder Shard hat seinen
+# eigenen Writer – auf SQLite also eine eigene Datei mit eigener Schreibsperre.
+#
+# Neue Benutzer werden beim ersten Zugriff per ``user_id % Anzahl Shards``
+# eingetragen, danach gilt nur noch das Verzeichnis. Jeder Prozess hält die
+# Zuordnung SHARD_MAP_TTL Sekunden. Pro Request (``route_request``) bzw. Job
+# wird der Shard für die Session gewählt, ``app.routing.RoutingSession``
+# schickt die Statements dorthin.
+#
+# ``move_user`` zieht einen Benutzer im laufenden Betrieb um: Zuordnung auf
+# 'moving' (Schreibzugriffe bekommen 503, Lesen geht weiter), SHARD_MAP_TTL
+# warten, bis alle Prozesse das sehen, auf laufende Jobs des Benutzers warten
+# (sie prüfen den Zustand nur beim Start), Zeilen kopieren (neue IDs im Ziel),
+# Zuordnung umstellen, noch einmal SHARD_MAP_TTL warten (bis dahin lesen andere
+# Prozesse weiter aus der Quelle), Zeilen in der Quelle löschen.
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+from math import ceil
+
+from flask import current_app, request, session
+from sqlalchemy import Integer, func, select
+
+from . import db
+from .cache import LRUCache
+from .categories import cache as category_cache
+from .dialects import dialect_insert
+from .models import Job, ShardAssignment, data_version_upsert
+from .routing import GLOBAL_TABLES
+
+ACTIVE, MOVING = "active", "moving"
+
+Assignment = namedtuple("Assignment", ["shard", "state"])
+UNSHARDED = Assignment(None, ACTIVE)
+
+
+def shard_names(config):
+    return tuple(f"shard{i}" for i in range(len(config["SHARD_DATABASE_URIS"])))
+
+
+def init_shard_binds(app):
+    # Vor db.init_app aufrufen: die Shards werden als zusätzliche Binds angelegt
+    binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+    binds.update(zip(shard_names(app.config), app.config["SHARD_DATABASE_URIS"]))
+    app.config["SQLALCHEMY_BINDS"] = binds
+
+
+def init_sharding(app):
+    # Nach db.init_app aufrufen
+    names = app.extensions["shards"] = shard_names(app.config)
+    # Flask-SQLAlchemy legt je Bind ein (hier leeres) MetaData an; create_all/drop_all sollen
+    # nur die Haupt-Datenbank anfassen, die Shards richtet init_shard_schema ein
+    for name in names:
+        db.metadatas.pop(name, None)
+    app.extensions["shard_map"] = LRUCache(app.config["SHARD_MAP_SIZE"], app.config["SHARD_MAP_TTL"])
+    if names:
+        app.before_request(route_request)
+
+
+def shards():
+    return current_app.extensions["shards"]
+
+
+def route_request():
+    user_id = session.get("user_id")
+    if user_id is None:
+        select_shard(None)
+        return None
+    if use_shard(user_id).state == MOVING and request.method not in ("GET", "HEAD"):
+        return current_app.response_class(
+            "Deine Daten werden gerade verschoben. Bitte versuche es gleich noch einmal.", 503,
+            {"Retry-After": str(ceil(current_app.config["SHARD_MAP_TTL"]))},
+        )
+    return None
+
+
+def load_assignment(user_id):
+    table = ShardAssignment.__table__
+    query = select(table.c.shard, table.c.state).where(table.c.user_id == user_id)
+    # Eigene Verbindung zur Haupt-Datenbank: der Eintrag ist unabhängig von der Transaktion der Session
+    with db.engine.begin() as conn:
+        row = conn.execute(query).first()
+        if row is None:
+            names = shards()
+            conn.execute(
+                dialect_insert(table, conn).on_conflict_do_nothing(),
+                {"user_id": user_id, "shard": names[user_id % len(names)], "state": ACTIVE},
+            )
+            row = conn.execute(query).one()
+    return Assignment(*row)
+
+
+def assignment(user_id):
+    """(Shard, Zustand) des Benutzers, aus dem Prozess-Cache oder dem Verzeichnis."""
+    if not shards():
+        return UNSHARDED
+    cache = current_app.extensions["shard_map"]
+    found = cache.get(user_id)
+    if found is None:
+        found = load_assignment(user_id)
+        cache.set(user_id, found)
+    return found
+
+
+def set_assignment(user_id, shard, state):
+    table = ShardAssignment.__table__
+    with db.engine.begin() as conn:
+        conn.execute(table.update().where(table.c.user_id == user_id).values(shard=shard, state=state))
+    current_app.extensions["shard_map"].set(user_id, Assignment(shard, state))
+
+
+def moving_users(shard):
+    """IDs der Benutzer, die gerade aus ``shard`` verschoben werden."""
+    if shard is None:
+        return set()
+    table = ShardAssignment.__table__
+    with db.engine.connect() as conn:
+        return set(conn.execute(
+            select(table.c.user_id).where(table.c.shard == shard, table.c.state == MOVING)
+        ).scalars())
+
+
+def select_shard(name):
+    # Objekte in der Session gehören zum bisherigen Shard; ihre IDs gelten im neuen nicht
+    if db.session.info.get("shard") != name:
+        db.session.expunge_all()
+        if name is None:
+            db.session.info.pop("shard", None)
+        else:
+            db.session.info["shard"] = name
+
+
+def use_shard(user_id):
+    """Wählt den Shard des Benutzers für die Session und liefert die Zuordnung."""
+    found = assignment(user_id)
+    select_shard(found.shard)
+    return found
+
+
+@contextmanager
+def on_shard(name):
+    previous = db.session.info.get("shard")
+    select_shard(name)
+    try:
+        yield name
+    finally:
+        select_shard(previous)
+
+
+def each_shard():
+    """Wählt nacheinander jeden Shard für die Session (ohne Sharding einmal die Haupt-Datenbank).
+
+    Wer darin schreibt, committet vor dem nächsten Shard.
+    """
+    for name in shards() or (None,):
+        with on_shard(name):
+            yield name
+
+
+def per_shard(function, user_id=None):
+    """``function(user_id)`` im Shard des Benutzers, ohne Benutzer in jedem Shard (Summe)."""
+    if user_id is not None:
+        use_shard(user_id)
+        return function(user_id)
+    return sum(function(None) for _ in each_shard())
+
+
+# --- Schema und Umzug ------------------------------------------------------------
+
+def shard_tables():
+    """Die Tabellen eines Shards, referenzierte Tabellen zuerst."""
+    return [table for table in db.metadata.sorted_tables if table.name not in GLOBAL_TABLES]
+
+
+def init_shard_schema():
+    """Legt in jedem Shard die fehlenden Tabellen an (mit Suchindex); liefert die Shard-Namen."""
+    names = shards()
+    for name in names:
+        db.metadata.create_all(db.engines[name], tables=shard_tables())
+    return names
+
+
+def surrogate_key(table):
+    # Eigener Integer-Schlüssel ohne Fremdschlüssel: wird im Ziel neu vergeben
+    columns = list(table.primary_key.columns)
+    if len(columns) == 1 and isinstance(columns[0].type, Integer) and not columns[0].foreign_keys:
+        return columns[0]
+    return None
+
+
+def remapped_columns(table):
+    # Spalten, die auf den Schlüssel einer anderen Shard-Tabelle zeigen: {Spalte: Tabelle}
+    return {
+        fk.parent.name: fk.column.table.name
+        for fk in table.foreign_keys if fk.column.table.name not in GLOBAL_TABLES
+    }
+
+
+def delete_user_rows(conn, user_id):
+    for table in reversed(shard_tables()):
+        conn.execute(table.delete().where(table.c.user_id == user_id))
+
+
+def copy_user_rows(source, target, user_id, batch_size):
+    """Kopiert alle Zeilen des Benutzers; IDs werden neu vergeben und Verweise umgeschrieben."""
+    new_ids = {}  # Tabelle -> {alte ID: neue ID}
+    counts = {}
+    for table in shard_tables():
+        key = surrogate_key(table)
+        remap = remapped_columns(table)
+        ids = new_ids[table.name] = {}
+        counts[table.name] = 0
+        result = source.execute(
+            select(table).where(table.c.user_id == user_id).execution_options(yield_per=batch_size)
+        )
+        for partition in result.mappings().partitions():
+            rows = [dict(row) for row in partition]
+            for row in rows:
+                for column, parent in remap.items():
+                    if row[column] is not None:
+                        row[column] = new_ids[parent][row[column]]
+            if key is None:
+                target.execute(table.insert(), rows)
+            else:
+                old = [row.pop(key.name) for row in rows]
+                new = target.execute(table.insert().returning(key, sort_by_parameter_order=True), rows).scalars()
+                ids.update(zip(old, new))
+            counts[table.name] += len(rows)
+    return counts
+
+
+class JobsStillRunning(RuntimeError):
+    """Der Benutzer hat noch laufende Jobs; der Umzug wurde abgebrochen."""
+
+
+def wait_for_jobs(user_id, timeout, poll_interval=0.5):
+    # Jobs prüfen 'moving' nur beim Start; ein laufender Import würde sonst weiter in die Quelle schreiben
+    table = Job.__table__
+    query = select(func.count()).select_from(table).where(table.c.user_id == user_id, table.c.status == "running")
+    deadline = time.monotonic() + timeout
+    while True:
+        with db.engine.connect() as conn:
+            running = conn.execute(query).scalar()
+        if not running:
+            return
+        if time.monotonic() >= deadline:
+            raise JobsStillRunning(f"Benutzer {user_id}: {running} Jobs laufen noch, Umzug abgebrochen")
+        time.sleep(poll_interval)
+
+
+def move_user(user_id, target, wait=None, batch_size=5000, jobs_timeout=None):
+    """Verschiebt alle Daten des Benutzers in den Shard ``target``; liefert {Tabelle: Zeilen}.
+
+    ``wait`` (Standard: SHARD_MAP_TTL) ist die Zeit, bis alle Prozesse den
+    Zustand 'moving' sehen und keine Schreibzugriffe mehr starten, und nach dem
+    Umstellen die Zeit, bis sie nicht mehr aus der Quelle lesen. Laufen danach
+    noch Jobs des Benutzers, wartet ``move_user`` bis zu ``jobs_timeout``
+    (Standard: JOB_LEASE_SECONDS) und bricht sonst mit JobsStillRunning ab.
+    """
+    if target not in shards():
+        raise ValueError(f"Unbekannter Shard: {target!r}")
+    source = assignment(user_id).shard
+    if source == target:
+        return {}
+
+    wait = current_app.config["SHARD_MAP_TTL"] if wait is None else wait
+    set_assignment(user_id, source, MOVING)
+    try:
+        time.sleep(wait)
+        wait_for_jobs(user_id, current_app.config["JOB_LEASE_SECONDS"] if jobs_timeout is None else jobs_timeout)
+        with db.engines[source].connect() as reader, db.engines[target].begin() as writer:
+            # Reste eines abgebrochenen Umzugs entfernen
+            delete_user_rows(writer, user_id)
+            counts = copy_user_rows(reader, writer, user_id, batch_size)
+            # Neue IDs: gecachte Seiten und ETags des Benutzers dürfen nicht mehr passen
+            writer.execute(data_version_upsert(writer),
+                           {"user_id": user_id, "data_version": 1, "updated_at": datetime.utcnow()})
+    except BaseException:
+        set_assignment(user_id, source, ACTIVE)
+        raise
+
+    set_assignment(user_id, target, ACTIVE)
+    # Die IDs der Kategorien sind neu; andere Prozesse merken es an der data_version
+    category_cache().evict(user_id)
+    # Andere Prozesse halten noch (Quelle, 'moving'): sie lesen aus der Quelle, schreiben aber nicht
+    time.sleep(wait)
+    with db.engines[source].begin() as conn:
+        delete_user_rows(conn, user_id)
+    return counts
+
+
+def shard_counts():
+    """Anzahl Benutzer je Shard laut Verzeichnis."""
+    table = ShardAssignment.__table__
+    with db.engine.connect() as conn:
+        rows = dict(conn.execute(select(table.c.shard, func.count()).group_by(table.c.shard)).all())
+    return {name: rows.get(name, 0) for name in shards()}
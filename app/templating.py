@@ -0,0 +1,55 @@
+# app/templating.py
+# Jinja-Bytecode-Cache für alle Worker und gestreamtes Rendern großer Seiten.
+#
+# Der Bytecode-Cache liegt im Dateisystem, damit ein neu gestarteter Worker
+# die Templates nicht erneut kompilieren muss; Jinja prüft per Prüfsumme des
+# Quelltexts selbst, ob ein Eintrag noch passt. Beim Streamen wird die Seite
+# Stück für Stück erzeugt, Zeilen kommen aus Generatoren statt aus Listen.
+import os
+
+from flask import Response, current_app, get_flashed_messages, render_template, stream_template
+from jinja2 import FileSystemBytecodeCache
+
+from .categories import category_name
+from .money import format_cents
+
+
+def bytecode_cache(config):
+    if not config["TEMPLATE_BYTECODE_CACHE"]:
+        return None
+    directory = config["TEMPLATE_CACHE_DIR"]
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Ohne Verzeichnis nimmt Jinja ein eigenes, nur für diesen Benutzer lesbares im Temp-Verzeichnis
+    return FileSystemBytecodeCache(directory or None)
+
+
+def buffered(chunks, size):
+    # Jinja liefert viele kleine Strings; zu Blöcken von ``size`` Zeichen zusammenfassen
+    pending, length = [], 0
+    for chunk in chunks:
+        pending.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(pending)
+            pending, length = [], 0
+    if pending:
+        yield "".join(pending)
+
+
+def render_page(template, **context):
+    """Rendert ``template`` gestreamt (STREAM_TEMPLATES) oder wie bisher am Stück."""
+    if not current_app.config["STREAM_TEMPLATES"]:
+        return render_template(template, **context)
+    # Flash-Nachrichten jetzt aus der Session holen: das Session-Cookie ist
+    # schon gesendet, wenn base.html sie während des Streamens abfragt
+    get_flashed_messages()
+    chunks = stream_template(template, **context)
+    return Response(buffered(chunks, current_app.config["STREAM_BUFFER_SIZE"]), mimetype="text/html")
+
+
+def init_templates(app):
+    # Muss vor dem ersten Zugriff auf app.jinja_env passieren
+    app.jinja_options = {**app.jinja_options, "bytecode_cache": bytecode_cache(app.config)}
+    app.add_template_filter(format_cents, "cents")
+    app.add_template_filter(category_name, "category_name")
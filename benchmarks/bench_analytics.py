@@ -0,0 +1,101 @@
+"""Benchmark der Auswertungs-API für einen Benutzer mit vielen Transaktionen.
+
+    python benchmarks/bench_analytics.py --rows 500000
+
+Legt eine temporäre SQLite-Datenbank an, erzeugt die Transaktionen per
+executemany, baut die Monatssummen neu auf und misst danach die drei
+Endpunkte unter /api/analytics. Der Exit-Code ist 1, wenn das p95 eines
+Endpunkts über dem Budget liegt.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+from app.analytics import rebuild_monthly_totals  # noqa: E402
+from app.categories import category_ids  # noqa: E402
+from app.models import Transaction, User  # noqa: E402
+
+CATEGORIES = ["Miete", "Lebensmittel", "Tanken", "Versicherung", "Kino", "Restaurant", "Kleidung",
+              "Strom", "Internet", "Handy", "Urlaub", "Geschenke", "Sport", "Bücher", "Arzt"]
+
+
+def seed(rows, years, batch_size=50000):
+    random.seed(42)
+    user = User(username="bench", email="bench@example.com", password="x")
+    db.session.add(user)
+    db.session.commit()
+
+    start = datetime.now() - timedelta(days=365 * years)
+    span = 365 * years * 24 * 3600
+    ids = category_ids(user.id, CATEGORIES)
+    insert = Transaction.__table__.insert()
+    for offset in range(0, rows, batch_size):
+        db.session.execute(insert, [
+            {
+                "user_id": user.id,
+                "amount_cents": random.randint(100, 50000),
+                "category_id": ids[random.choice(CATEGORIES)],
+                "transaction_type": "income" if random.random() < 0.1 else "expense",
+                "frequency": "einmalig",
+                "date": start + timedelta(seconds=random.randrange(span)),
+            }
+            for _ in range(min(batch_size, rows - offset))
+        ])
+        db.session.commit()
+    return user.id
+
+
+def measure(client, url, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.data
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(SQLALCHEMY_DATABASE_URI="sqlite:///" + os.path.join(tmp, "bench.db"))
+        with app.app_context():
+            db.create_all()
+            started = time.perf_counter()
+            user_id = seed(args.rows, args.years)
+            print(f"{args.rows} Transaktionen erzeugt in {time.perf_counter() - started:.1f}s")
+            started = time.perf_counter()
+            totals = rebuild_monthly_totals()
+            print(f"{totals} Monatssummen aufgebaut in {time.perf_counter() - started:.2f}s")
+
+        failed = False
+        with app.test_client() as client:
+            with client.session_transaction() as session:
+                session["user_id"] = user_id
+            year = datetime.now().year
+            for url in ("/api/analytics/cash-flow", "/api/analytics/categories",
+                        f"/api/analytics/year-over-year?year={year}"):
+                p50, p95 = measure(client, url, args.repeat)
+                ok = p95 <= args.budget_ms
+                failed |= not ok
+                print(f"{url:45} p50 {p50:7.2f} ms  p95 {p95:7.2f} ms  {'OK' if ok else 'ZU LANGSAM'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
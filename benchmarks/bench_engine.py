@@ -0,0 +1,123 @@
+"""Benchmark: gleichzeitiges Lesen und Schreiben mit und ohne SQLite-Profil.
+
+    python benchmarks/bench_engine.py --seconds 5 --writers 4 --readers 8
+
+Legt je Profil eine frische SQLite-Datei an. ``--writers`` Threads buchen
+einzelne Transaktionen wie ``/add_transaction`` (Insert, Rollups,
+``data_version``, Commit), ``--readers`` Threads laden die erste
+Dashboard-Seite. Verglichen werden das Profil 'none' (Rollback-Journal,
+synchronous=FULL) und 'sqlite' (WAL, synchronous=NORMAL, busy_timeout).
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.categories import category_id  # noqa: E402
+from app.models import Transaction, User, bump_data_version  # noqa: E402
+from app.money import Money  # noqa: E402
+from app.pagination import paginate_transactions  # noqa: E402
+from app.rollups import record_transactions  # noqa: E402
+
+USERS = 20
+
+
+def seed(rows):
+    db.create_all()
+    db.session.add_all(User(username=f"u{i}", email=f"u{i}@example.com", password="x") for i in range(USERS))
+    category = {user_id: category_id(user_id, "Test") for user_id in range(1, USERS + 1)}
+    db.session.commit()
+    start = datetime(2024, 1, 1)
+    db.session.execute(Transaction.__table__.insert(), [
+        {"user_id": i % USERS + 1, "amount_cents": random.randint(100, 50000), "currency": "EUR",
+         "category_id": category[i % USERS + 1], "transaction_type": "expense", "frequency": "einmalig",
+         "date": start + timedelta(minutes=i)}
+        for i in range(rows)
+    ])
+    db.session.commit()
+
+
+def run(profile, args):
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(directory, 'bench.db')}",
+                         DB_PROFILE=profile, METRICS_ENABLED=False)
+        with app.app_context():
+            seed(args.rows)
+
+        stop = threading.Event()
+        lock = threading.Lock()
+        counts = {"writes": 0, "reads": 0, "errors": 0}
+
+        def count(name):
+            with lock:
+                counts[name] += 1
+
+        def writer():
+            with app.app_context():
+                while not stop.is_set():
+                    user_id = random.randint(1, USERS)
+                    transaction = Transaction(user_id=user_id, amount=Money(random.randint(100, 9999)),
+                                              category_id=category_id(user_id, "Test"),
+                                              transaction_type="expense",
+                                              frequency="einmalig", date=datetime.utcnow())
+                    try:
+                        db.session.add(transaction)
+                        db.session.flush()
+                        record_transactions([transaction])
+                        bump_data_version(user_id)
+                        db.session.commit()
+                        count("writes")
+                    except OperationalError:
+                        db.session.rollback()
+                        count("errors")
+
+        def reader():
+            with app.app_context():
+                while not stop.is_set():
+                    try:
+                        query = Transaction.query.filter_by(user_id=random.randint(1, USERS))
+                        paginate_transactions(query, 50)
+                        db.session.rollback()
+                        count("reads")
+                    except OperationalError:
+                        db.session.rollback()
+                        count("errors")
+
+        threads = [threading.Thread(target=writer) for _ in range(args.writers)]
+        threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        with app.app_context():
+            db.engine.dispose()
+
+    print(f"{profile:7s} Schreiben {counts['writes'] / args.seconds:8.1f}/s   "
+          f"Lesen {counts['reads'] / args.seconds:8.1f}/s   Fehler (locked) {counts['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+    for profile in ("none", "sqlite"):
+        random.seed(42)
+        run(profile, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Mikrobenchmark: Logging-Overhead pro Request.
+
+    python benchmarks/bench_logging.py --requests 2000
+
+Vergleicht den alten Aufbau (``basicConfig(DEBUG)``, f-Strings, synchrones
+Schreiben) mit der Queue-basierten Konfiguration bei INFO und bei DEBUG.
+Gemessen wird ``GET /login`` und ein fehlgeschlagener ``POST /login``
+(billige Routen, bei denen das Logging den größten Anteil hat). Die Ausgabe
+geht in eine temporäre Datei statt auf das Terminal.
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+from app.log import stop_listener  # noqa: E402
+
+
+def old_style_logging(path):
+    # So war es vorher: alles ab DEBUG synchron in den Stream, Meldungen als f-Strings
+    stop_listener()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    logging.basicConfig(level=logging.DEBUG, filename=path, force=True)
+
+
+def old_style_route(email):
+    logging.debug("POST-Anfrage an /login")
+    logging.debug(f"Login fehlgeschlagen: Benutzer existiert nicht für Email: {email}")
+
+
+def measure(client, requests):
+    started = time.perf_counter()
+    for i in range(requests):
+        client.get("/login")
+        client.post("/login", data={"email": f"niemand{i}@example.com", "password": "x"})
+    return (time.perf_counter() - started) / (requests * 2) * 1e6
+
+
+def run(mode, requests, log_path):
+    overrides = {"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:", "METRICS_ENABLED": False}
+    if mode == "nachher-debug":
+        overrides["LOG_LEVEL"] = "DEBUG"
+    stderr, sys.stderr = sys.stderr, open(log_path, "a")
+    try:
+        app = create_app(**overrides)
+        if mode == "vorher":
+            old_style_logging(log_path)
+            # Die alten Aufrufstellen bauen ihre Strings immer, auch wenn DEBUG aus ist
+            app.before_request(lambda: old_style_route("niemand@example.com"))
+        with app.app_context():
+            db.create_all()
+            client = app.test_client()
+            measure(client, 50)  # Aufwärmen
+            return measure(client, requests)
+    finally:
+        stop_listener()
+        sys.stderr.close()
+        sys.stderr = stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = os.path.join(directory, "bench.log")
+        for mode in ("vorher", "nachher", "nachher-debug"):
+            print(f"{mode:15s} {run(mode, args.requests, log_path):8.1f} µs pro Request")
+
+
+if __name__ == "__main__":
+    main()
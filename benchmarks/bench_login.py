@@ -0,0 +1,134 @@
+"""Benchmark: Login-Durchsatz gegen Dashboard-Latenz unter paralleler Last.
+
+    python benchmarks/bench_login.py --seconds 10 --login-threads 16 --dashboard-threads 4
+
+Startet die App mit einem Thread-Server auf einer temporären SQLite-Datenbank.
+``--login-threads`` Clients melden sich in einer Schleife an, während
+``--dashboard-threads`` angemeldete Clients das Dashboard abrufen. Ausgegeben
+werden Logins/s, abgelehnte Logins (503) sowie p50/p99 des Dashboards. Mit
+``--hash-workers`` und ``--hash-queue`` lässt sich der Hash-Pool variieren.
+"""
+import argparse
+import http.cookiejar
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import WSGIRequestHandler, make_server  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.models import User  # noqa: E402
+
+PASSWORD = "bench-password"
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def seed(app, users):
+    with app.app_context():
+        db.create_all()
+        stored = app.extensions["password_hasher"].hash(PASSWORD)
+        db.session.add_all(
+            User(username=f"bench{i}", email=f"bench{i}@example.com", password=stored) for i in range(users)
+        )
+        db.session.commit()
+
+
+def opener():
+    # Eigene Cookies je Client, Weiterleitungen nach dem Login nicht folgen
+    class NoRedirect(urllib.request.HTTPRedirectHandler):
+        def redirect_request(self, *args, **kwargs):
+            return None
+
+    return urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+                                       NoRedirect)
+
+
+def login(client, base, email):
+    data = urllib.parse.urlencode({"email": email, "password": PASSWORD}).encode()
+    try:
+        return client.open(base + "/login", data).status
+    except urllib.error.HTTPError as error:
+        return error.code
+
+
+def run(args):
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    app = create_app(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{path}",
+        PASSWORD_HASH_ITERATIONS=args.iterations,
+        PASSWORD_HASH_WORKERS=args.hash_workers,
+        PASSWORD_HASH_QUEUE=args.hash_queue,
+    )
+    seed(app, args.login_threads + args.dashboard_threads)
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    base = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    results = {"logins": 0, "rejected": 0, "dashboard": []}
+
+    def login_loop(index):
+        client = opener()
+        while not stop.is_set():
+            status = login(client, base, f"bench{index}@example.com")
+            with lock:
+                results["logins" if status == 302 else "rejected"] += 1
+
+    def dashboard_loop(index):
+        client = opener()
+        login(client, base, f"bench{args.login_threads + index}@example.com")
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.open(base + "/dashboard").read()
+            with lock:
+                results["dashboard"].append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=login_loop, args=(i,)) for i in range(args.login_threads)]
+    threads += [threading.Thread(target=dashboard_loop, args=(i,)) for i in range(args.dashboard_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+    app.extensions["password_hasher"].shutdown()
+    os.unlink(path)
+
+    timings = sorted(results["dashboard"])
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))] if timings else float("nan")
+    print(f"Hash-Pool {args.hash_workers} Worker, Warteschlange {args.hash_queue}, "
+          f"{args.iterations} Iterationen")
+    print(f"Logins       {results['logins'] / args.seconds:8.1f} /s   abgelehnt (503): {results['rejected']}")
+    print(f"Dashboard    p50 {statistics.median(timings) if timings else float('nan'):8.2f} ms   "
+          f"p99 {p99:8.2f} ms   ({len(timings)} Abrufe)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--login-threads", type=int, default=16)
+    parser.add_argument("--dashboard-threads", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=600000)
+    parser.add_argument("--hash-workers", type=int, default=2)
+    parser.add_argument("--hash-queue", type=int, default=16)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark: Such- und Filterabfragen über /api/transactions.
+
+    python benchmarks/bench_search.py --users 100 --transactions 10000
+
+Erzeugt mit ``datagen`` eine SQLite-Datenbank (Standard: 1 Mio. Transaktionen)
+und misst je Filterkombination die erste Seite über den Flask-Testclient,
+jeweils mit dem Anfrageplan der Suchabfrage. ``--database`` hebt eine
+erzeugte Datei für weitere Läufe auf.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from benchmarks.datagen import generate  # noqa: E402
+
+QUERIES = {
+    "ohne Filter": "",
+    "Volltext 'leb'": "q=leb",
+    "Volltext 'restaurant'": "q=restaurant",
+    "Kategorie exakt": "category=Lebensmittel",
+    "Zeitraum (1 Monat)": "start=2025-03-01&end=2025-03-31",
+    "Typ income": "type=income",
+    "Betrag > 500": "min=500",
+    "Betrag 50-60": "min=50&max=60",
+    "Lebensmittel im März > 50": "q=lebensm&start=2025-03-01&end=2025-03-31&min=50",
+    "Volltext, kein Treffer": "q=xyz",
+}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, round(fraction * (len(values) - 1)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--transactions", type=int, default=10000, help="pro Benutzer")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--database", help="SQLite-Datei (wird wiederverwendet, wenn vorhanden)")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    path = os.path.abspath(args.database or os.path.join(directory, "search.db"))
+    exists = os.path.exists(path)
+    app = create_app(SQLALCHEMY_DATABASE_URI=f"sqlite:///{path}", METRICS_ENABLED=False, LOG_LEVEL="WARNING")
+    with app.app_context():
+        if not exists:
+            db.create_all()
+            counts = generate(args.users, args.transactions, budgets=0, goals=0, years=2)
+            db.session.execute(db.text("ANALYZE"))
+            db.session.commit()
+            print(f"Daten: {counts.transactions} Transaktionen in {counts.seconds:.1f}s", file=sys.stderr)
+
+        statements = []
+        event.listen(db.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, parameters, context, many: statements.append((statement, parameters)))
+
+        client = app.test_client()
+        user_ids = list(range(1, args.users + 1))
+        for label, query in QUERIES.items():
+            timings, rows = [], 0
+            for _ in range(args.repeat):
+                with client.session_transaction() as session:
+                    session["user_id"] = random.choice(user_ids)
+                statements.clear()
+                started = time.perf_counter()
+                response = client.get(f"/api/transactions?per_page=50&{query}")
+                timings.append(time.perf_counter() - started)
+                rows += len(response.get_json()["transactions"])
+            statement, parameters = statements[-1]
+            with db.engine.connect() as conn:
+                plan = [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+            print(f"{label:28s} p50 {percentile(timings, 0.5) * 1000:7.2f} ms  "
+                  f"p95 {percentile(timings, 0.95) * 1000:7.2f} ms  {rows / args.repeat:5.1f} Zeilen  "
+                  f"| {'; '.join(plan)}")
+        db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
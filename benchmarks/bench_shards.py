@@ -0,0 +1,114 @@
+"""Benchmark: Schreibdurchsatz mit 1, 2, 4, ... Shards.
+
+    python benchmarks/bench_shards.py --seconds 5 --writers 8 --shards 0 2 4
+
+Legt je Lauf eine Haupt-Datenbank und die Shard-Dateien frisch an (0 heißt
+ohne Sharding, alles in einer Datei). ``--writers`` Prozesse buchen einzelne
+Transaktionen wie ``/add_transaction`` (Shard wählen, Insert, Rollups,
+``data_version``, Commit) für zufällige Benutzer. Jeder Shard hat seine eigene
+Schreibsperre; der Durchsatz steigt daher mit der Zahl der Shards, solange
+Kerne frei sind. Mit ``--synchronous FULL`` und ``--dir`` auf einer echten
+Platte kostet jeder Commit ein fsync, das zeigt den Effekt deutlicher.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.categories import category_id  # noqa: E402
+from app.models import Transaction, User, bump_data_version  # noqa: E402
+from app.money import Money  # noqa: E402
+from app.rollups import record_transactions  # noqa: E402
+from app.sharding import each_shard, init_shard_schema, use_shard  # noqa: E402
+
+USERS = 64
+
+
+def seed():
+    db.create_all()
+    init_shard_schema()
+    db.session.add_all(User(id=i, username=f"u{i}", email=f"u{i}@example.com", password="x")
+                       for i in range(1, USERS + 1))
+    db.session.commit()
+    for user_id in range(1, USERS + 1):
+        use_shard(user_id)
+        category_id(user_id, "Test")
+        db.session.commit()
+
+
+def write(config, seconds, seed):
+    # Läuft in einem eigenen Prozess (wie ein Worker des Webservers) mit eigener App
+    random.seed(seed)
+    app = create_app(**config)
+    writes = errors = 0
+    with app.app_context():
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            user_id = random.randint(1, USERS)
+            try:
+                use_shard(user_id)
+                transaction = Transaction(user_id=user_id, amount=Money(random.randint(100, 9999)),
+                                          category_id=category_id(user_id, "Test"), transaction_type="expense",
+                                          frequency="einmalig", date=datetime.utcnow())
+                db.session.add(transaction)
+                db.session.flush()
+                record_transactions([transaction])
+                bump_data_version(user_id)
+                db.session.commit()
+                writes += 1
+            except OperationalError:
+                db.session.rollback()
+                errors += 1
+    return writes, errors
+
+
+def run(shards, args):
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        config = dict(
+            SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(directory, 'main.db')}",
+            SHARD_DATABASE_URIS=[f"sqlite:///{os.path.join(directory, f'shard{i}.db')}" for i in range(shards)],
+            SQLITE_SYNCHRONOUS=args.synchronous, METRICS_ENABLED=False, SHARD_MAP_TTL=3600,
+        )
+        app = create_app(**config)
+        with app.app_context():
+            seed()
+
+        with ProcessPoolExecutor(args.writers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(write, [config] * args.writers, [args.seconds] * args.writers,
+                                    range(args.writers)))
+        writes, errors = (sum(values) for values in zip(*results))
+
+        with app.app_context():
+            written = sum(db.session.query(Transaction).count() for _ in each_shard())
+            for engine in db.engines.values():
+                engine.dispose()
+
+    label = f"{shards} Shards" if shards else "ohne"
+    print(f"{label:9s} Schreiben {writes / args.seconds:8.1f}/s   Zeilen {written}   Fehler (locked) {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--shards", type=int, nargs="+", default=[0, 2, 4])
+    parser.add_argument("--synchronous", default="NORMAL", help="PRAGMA synchronous der Dateien")
+    parser.add_argument("--dir", default=None, help="Verzeichnis für die Dateien (Standard: Temp-Verzeichnis)")
+    args = parser.parse_args()
+    for shards in args.shards:
+        random.seed(42)
+        run(shards, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Synthetische Testdaten: N Benutzer mit je M Transaktionen, Budgets und Sparzielen.
+
+    python benchmarks/datagen.py --database /tmp/moneymap.db --users 100 --transactions 5000
+
+Alles wird per Core-executemany in großen Batches geschrieben; Rollups und
+Monatssummen werden danach einmal neu berechnet. Kategorien, Beträge und
+Buchungstage folgen grob echten Kontoauszügen: monatliches Gehalt und Miete,
+viele kleine Lebensmittel-Einkäufe, gelegentliche große Ausgaben, am
+Wochenende mehr Freizeit. Gleicher ``seed`` ergibt gleiche Daten.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from app import db  # noqa: E402
+from app.budgets import rebuild_rollups  # noqa: E402
+from app.models import Budget, Category, SavingsGoal, Transaction, User  # noqa: E402
+from app.monthly_totals import rebuild_monthly_totals  # noqa: E402
+from app.search import rebuild_search_index  # noqa: E402
+
+PASSWORD = "benchmark"
+
+# Kategorie -> (Gewicht, Median in Cent, Streuung des Log-Betrags, Wochenend-Faktor)
+EXPENSE_CATEGORIES = {
+    "Lebensmittel": (30, 3500, 0.6, 1.3),
+    "Restaurant": (10, 2800, 0.5, 1.8),
+    "Tanken": (8, 6000, 0.3, 1.0),
+    "Drogerie": (6, 1500, 0.5, 1.2),
+    "Kleidung": (5, 6000, 0.8, 1.5),
+    "Kino": (3, 2400, 0.3, 2.0),
+    "Bücher": (3, 1800, 0.4, 1.3),
+    "Sport": (3, 3000, 0.6, 1.4),
+    "Geschenke": (3, 4000, 0.9, 1.2),
+    "Arzt": (2, 5000, 0.9, 0.3),
+    "Urlaub": (1, 60000, 0.7, 1.0),
+    "Elektronik": (1, 25000, 0.9, 1.3),
+}
+MONTHLY_EXPENSES = {"Miete": 95000, "Strom": 8500, "Internet": 3999, "Handy": 1999, "Versicherung": 12000}
+CATEGORY_NAMES = ["Gehalt", *MONTHLY_EXPENSES, *EXPENSE_CATEGORIES]
+GOAL_NAMES = ["Urlaub", "Notgroschen", "Auto", "Laptop", "Umzug", "Hochzeit"]
+
+Counts = namedtuple("Counts", ["users", "transactions", "budgets", "goals", "seconds"])
+
+
+def amount(rng, median, sigma):
+    return max(50, int(rng.lognormvariate(0, sigma) * median))
+
+
+def user_transactions(rng, user_id, count, start, days, category_ids):
+    """Fixkosten und Gehalt monatlich, der Rest zufällig mit Wochenend-Gewichtung.
+
+    ``category_ids`` bildet (user_id, Name) auf die ID in ``category`` ab.
+    """
+    rows = []
+    salary = rng.randrange(220000, 520000, 100)
+    month = start.replace(day=1)
+    end = start + timedelta(days=days)
+    while month < end and len(rows) < count:
+        rows.append((salary, "Gehalt", "income", "monatlich", month + timedelta(days=rng.randint(0, 2))))
+        for category, cents in MONTHLY_EXPENSES.items():
+            rows.append((cents, category, "expense", "monatlich", month + timedelta(days=rng.randint(0, 4))))
+        month = (month + timedelta(days=32)).replace(day=1)
+
+    categories = list(EXPENSE_CATEGORIES)
+    weights = [EXPENSE_CATEGORIES[c][0] for c in categories]
+    while len(rows) < count:
+        day = start + timedelta(days=rng.randrange(days), minutes=rng.randrange(8 * 60, 22 * 60))
+        category = rng.choices(categories, weights)[0]
+        _, median, sigma, weekend = EXPENSE_CATEGORIES[category]
+        # Unter der Woche werden Wochenend-Kategorien mit 1/Faktor verworfen und umgekehrt
+        factor = weekend if day.weekday() >= 5 else 1 / weekend
+        if factor < 1 and rng.random() > factor:
+            continue
+        rows.append((amount(rng, median, sigma), category, "expense", "einmalig", day))
+
+    return [
+        {"user_id": user_id, "amount_cents": cents, "currency": "EUR", "category_id": category_ids[(user_id, category)],
+         "transaction_type": kind, "frequency": frequency, "date": day}
+        for cents, category, kind, frequency, day in rows[:count]
+    ]
+
+
+def generate(users=10, transactions=1000, budgets=5, goals=2, years=2, seed=42,
+             password_method="pbkdf2:sha256:1000", batch_size=50000, start_user=1):
+    """Schreibt die Daten in die Datenbank der aktiven App und liefert die Anzahlen."""
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    password = generate_password_hash(PASSWORD, password_method)
+    user_ids = range(start_user, start_user + users)
+    db.session.execute(User.__table__.insert(), [
+        {"id": user_id, "username": f"bench{user_id}", "email": f"bench{user_id}@example.com",
+         "password": password}
+        for user_id in user_ids
+    ])
+    # Das Kategorie-Vokabular je Benutzer vorab anlegen, die Zeilen tragen nur noch IDs
+    db.session.execute(Category.__table__.insert(), [
+        {"user_id": user_id, "name": name, "transaction_count": 0}
+        for user_id in user_ids
+        for name in CATEGORY_NAMES
+    ])
+    category_ids = {
+        (row.user_id, row.name): row.id
+        for row in db.session.execute(db.select(Category.user_id, Category.name, Category.id).where(
+            Category.user_id >= user_ids.start, Category.user_id < user_ids.stop
+        ))
+    }
+
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=365 * years)
+    insert = Transaction.__table__.insert()
+    pending = []
+    written = 0
+    for user_id in user_ids:
+        pending.extend(user_transactions(rng, user_id, transactions, start, 365 * years, category_ids))
+        if len(pending) >= batch_size:
+            db.session.execute(insert, pending)
+            written += len(pending)
+            pending = []
+    if pending:
+        db.session.execute(insert, pending)
+        written += len(pending)
+
+    budget_categories = ["Lebensmittel", "Restaurant", "Tanken", "Kleidung", "Sport", "Kino", "Drogerie"]
+    budgets = min(budgets, len(budget_categories))
+    if budgets:
+        db.session.execute(Budget.__table__.insert(), [
+            {"user_id": user_id, "category_id": category_ids[(user_id, category)], "amount_cents": rng.randrange(5000, 60000, 500),
+             "currency": "EUR", "period": rng.choice(["wöchentlich", "monatlich", "monatlich", "jährlich"])}
+            for user_id in user_ids
+            for category in rng.sample(budget_categories, budgets)
+        ])
+    if goals:
+        db.session.execute(SavingsGoal.__table__.insert(), [
+            {"user_id": user_id, "name": rng.choice(GOAL_NAMES), "target_cents": rng.randrange(50000, 2000000, 100),
+             "current_cents": 0, "currency": "EUR", "date_created": start}
+            for user_id in user_ids
+            for _ in range(goals)
+        ])
+    db.session.commit()
+
+    # Aggregate einmal per GROUP BY aufbauen statt pro Zeile
+    rebuild_rollups()
+    rebuild_monthly_totals()
+    rebuild_search_index()
+    return Counts(users, written, users * budgets, users * goals,
+                  time.perf_counter() - started)
+
+
+def main():
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", required=True, help="Pfad der SQLite-Datei")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--transactions", type=int, default=1000, help="pro Benutzer")
+    parser.add_argument("--budgets", type=int, default=5, help="pro Benutzer")
+    parser.add_argument("--goals", type=int, default=2, help="pro Benutzer")
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    app = create_app(SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.abspath(args.database)}", METRICS_ENABLED=False)
+    with app.app_context():
+        db.create_all()
+        counts = generate(args.users, args.transactions, args.budgets, args.goals, args.years, args.seed)
+    print(f"{counts.users} Benutzer, {counts.transactions} Transaktionen, {counts.budgets} Budgets, "
+          f"{counts.goals} Sparziele in {counts.seconds:.1f}s "
+          f"({counts.transactions / max(counts.seconds, 1e-9):,.0f} Zeilen/s)")
+
+
+if __name__ == "__main__":
+    main()
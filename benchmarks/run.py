@@ -0,0 +1,307 @@
+"""Benchmark-Suite: Szenarien gegen generierte Daten, Ergebnis als JSON.
+
+    python benchmarks/run.py --users 50 --transactions 2000 --output results.json
+    python benchmarks/run.py --output new.json --baseline results.json --tolerance 0.25
+
+Erzeugt mit ``datagen`` eine frische SQLite-Datenbank in einem temporären
+Verzeichnis und misst über den Flask-Testclient (kein Netzwerk nötig):
+
+    dashboard          GET /dashboard ohne Cache
+    dashboard_cached   GET /dashboard mit warmem LRU-Cache
+    add_delete         POST /add_transaction + POST /delete_transaction
+    login              POST /login mit der eingestellten Hash-Policy
+    analytics          GET /api/analytics/cash-flow
+    forecast           24-Monats-Prognose über 300 Daueraufträge ohne Cache
+    recurring          run_due_rules über frisch fällige Daueraufträge
+    import             import_transactions über generierte Zeilen
+
+Für jedes Szenario stehen p50/p95/p99/Mittelwert in ms und, wo sinnvoll,
+Zeilen pro Sekunde im JSON. Mit ``--baseline`` wird gegen eine gespeicherte
+Ergebnisdatei verglichen; liegt ein p95 um mehr als ``--tolerance`` (und
+mindestens ``--min-delta-ms``) darüber oder rows_per_sec entsprechend
+darunter, ist der Exit-Code 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+from app.categories import category_id  # noqa: E402
+from app.forecast import FREQUENCY_CODES, forecast  # noqa: E402
+from app.importer import import_transactions  # noqa: E402
+from app.models import RecurringRule, Transaction  # noqa: E402
+from app.recurring import run_due_rules  # noqa: E402
+from benchmarks.datagen import PASSWORD, generate  # noqa: E402
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(timings, rows=None):
+    values = sorted(t * 1000 for t in timings)
+    result = {
+        "samples": len(values),
+        "p50_ms": round(percentile(values, 0.50), 3),
+        "p95_ms": round(percentile(values, 0.95), 3),
+        "p99_ms": round(percentile(values, 0.99), 3),
+        "mean_ms": round(sum(values) / len(values), 3),
+    }
+    if rows is not None:
+        result["rows_per_sec"] = round(rows / max(sum(timings), 1e-9), 1)
+    return result
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def logged_in(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = user_id
+    return client
+
+
+def check(response, status=200):
+    if response.status_code != status:
+        raise RuntimeError(f"{response.request.path}: HTTP {response.status_code}")
+    return response
+
+
+# --- Szenarien ---------------------------------------------------------------
+
+def scenario_dashboard(ctx):
+    app = ctx["app"]
+    app.extensions["cache"] = ctx["no_cache"]
+    clients = [logged_in(app, user_id) for user_id in ctx["sample_users"]]
+    return summarize(timed(lambda: check(random.choice(clients).get("/dashboard")), ctx["repeat"]))
+
+
+def scenario_dashboard_cached(ctx):
+    app = ctx["app"]
+    app.extensions["cache"] = ctx["cache"]
+    client = logged_in(app, ctx["sample_users"][0])
+    check(client.get("/dashboard"))
+    return summarize(timed(lambda: check(client.get("/dashboard")), ctx["repeat"]))
+
+
+def scenario_add_delete(ctx):
+    client = logged_in(ctx["app"], ctx["sample_users"][0])
+
+    def add_and_delete():
+        check(client.post("/add_transaction", data={
+            "amount": "12.34", "category": "Benchmark", "transaction_type": "expense", "frequency": "einmalig",
+        }), 302)
+        transaction_id = db.session.execute(
+            db.select(Transaction.id).filter_by(user_id=ctx["sample_users"][0]).order_by(Transaction.id.desc()).limit(1)
+        ).scalar_one()
+        check(client.post(f"/delete_transaction/{transaction_id}"), 302)
+
+    return summarize(timed(add_and_delete, ctx["repeat"]))
+
+
+def scenario_login(ctx):
+    client = ctx["app"].test_client()
+    emails = [f"bench{user_id}@example.com" for user_id in ctx["sample_users"]]
+    return summarize(timed(
+        lambda: check(client.post("/login", data={"email": random.choice(emails), "password": PASSWORD}), 302),
+        ctx["login_repeat"],
+    ))
+
+
+def scenario_analytics(ctx):
+    client = logged_in(ctx["app"], ctx["sample_users"][0])
+    return summarize(timed(lambda: check(client.get("/api/analytics/cash-flow")), ctx["repeat"]))
+
+
+def scenario_forecast(ctx):
+    user_id = ctx["sample_users"][0]
+    fixed = category_id(user_id, "Fixkosten")
+    today = datetime.now()
+    db.session.execute(RecurringRule.__table__.insert(), [
+        {"user_id": user_id, "amount_cents": random.randint(500, 200000), "currency": "EUR", "category_id": fixed,
+         "transaction_type": random.choice(["income", "expense"]), "frequency": random.choice(list(FREQUENCY_CODES)),
+         "start_date": today - timedelta(days=random.randrange(365)), "occurrences": 1,
+         # Weit in der Zukunft fällig, damit das recurring-Szenario diese Regeln nicht bucht
+         "next_due_at": today + timedelta(days=3650), "active": True}
+        for _ in range(300)
+    ])
+    db.session.commit()
+    return summarize(timed(lambda: forecast(user_id, 24), ctx["repeat"]))
+
+
+def scenario_recurring(ctx):
+    # Je Durchlauf neue Daueraufträge, die seit einem Jahr monatlich fällig sind
+    timings, created = [], 0
+    start = datetime.now() - timedelta(days=365)
+    subscription = {user_id: category_id(user_id, "Abo") for user_id in ctx["user_ids"]}
+    for _ in range(ctx["recurring_repeat"]):
+        db.session.execute(RecurringRule.__table__.insert(), [
+            {"user_id": user_id, "amount_cents": 1999, "currency": "EUR", "category_id": subscription[user_id],
+             "transaction_type": "expense", "frequency": "monatlich", "start_date": start,
+             "occurrences": 1, "next_due_at": start + timedelta(days=31), "active": True}
+            for user_id in ctx["user_ids"]
+        ])
+        db.session.commit()
+        result = run_due_rules()
+        timings.append(result.seconds)
+        created += result.created
+    return summarize(timings, created)
+
+
+def scenario_import(ctx):
+    timings, imported = [], 0
+    for _ in range(ctx["recurring_repeat"]):
+        rows = (
+            {"date": f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}", "amount": f"-{i % 500 + 1},{i % 100:02d}",
+             "category": "Import"}
+            for i in range(ctx["import_rows"])
+        )
+        result = import_transactions(ctx["sample_users"][0], rows)
+        timings.append(result.seconds)
+        imported += result.imported
+    return summarize(timings, imported)
+
+
+SCENARIOS = {
+    "dashboard": scenario_dashboard,
+    "dashboard_cached": scenario_dashboard_cached,
+    "add_delete": scenario_add_delete,
+    "login": scenario_login,
+    "analytics": scenario_analytics,
+    "forecast": scenario_forecast,
+    "recurring": scenario_recurring,
+    "import": scenario_import,
+}
+
+
+# --- Vergleich ------------------------------------------------------------------
+
+def compare(results, baseline, tolerance, min_delta_ms=2.0):
+    """Liefert (Szenario, Kennzahl, alt, neu) für jede Verschlechterung über ``tolerance``.
+
+    Bei p95 muss die Differenz zusätzlich ``min_delta_ms`` übersteigen, damit
+    Jitter bei sehr schnellen Szenarien nicht als Regression zählt.
+    """
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        if (current["p95_ms"] > previous["p95_ms"] * (1 + tolerance)
+                and current["p95_ms"] - previous["p95_ms"] > min_delta_ms):
+            regressions.append((name, "p95_ms", previous["p95_ms"], current["p95_ms"]))
+        if "rows_per_sec" in current and "rows_per_sec" in previous:
+            if current["rows_per_sec"] < previous["rows_per_sec"] / (1 + tolerance):
+                regressions.append((name, "rows_per_sec", previous["rows_per_sec"], current["rows_per_sec"]))
+    return regressions
+
+
+def run(args):
+    random.seed(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(directory, 'bench.db')}",
+            PASSWORD_HASH_ITERATIONS=args.hash_iterations,
+            METRICS_ENABLED=False,
+            LOG_LEVEL="WARNING",
+        )
+        with app.app_context():
+            db.create_all()
+            counts = generate(args.users, args.transactions, args.budgets, args.goals, args.years, args.seed,
+                              password_method=f"pbkdf2:sha256:{args.hash_iterations}")
+            print(f"Daten: {counts.users} Benutzer, {counts.transactions} Transaktionen "
+                  f"in {counts.seconds:.1f}s", file=sys.stderr)
+
+            from app.cache import NullCache
+            user_ids = list(range(1, args.users + 1))
+            ctx = {
+                "app": app,
+                "cache": app.extensions["cache"],
+                "no_cache": NullCache(),
+                "user_ids": user_ids,
+                "sample_users": random.sample(user_ids, min(10, len(user_ids))),
+                "repeat": args.repeat,
+                "login_repeat": args.login_repeat,
+                "recurring_repeat": args.batch_repeat,
+                "import_rows": args.import_rows,
+            }
+            selected = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+            scenarios = {}
+            for name in selected:
+                scenarios[name] = SCENARIOS[name](ctx)
+                print(f"{name:18s} {json.dumps(scenarios[name])}", file=sys.stderr)
+            db.engine.dispose()
+
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "users": args.users,
+            "transactions_per_user": args.transactions,
+            "hash_iterations": args.hash_iterations,
+            "seed": args.seed,
+        },
+        "scenarios": scenarios,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--transactions", type=int, default=1000, help="pro Benutzer")
+    parser.add_argument("--budgets", type=int, default=5)
+    parser.add_argument("--goals", type=int, default=2)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=200, help="Wiederholungen der Request-Szenarien")
+    parser.add_argument("--login-repeat", type=int, default=20)
+    parser.add_argument("--batch-repeat", type=int, default=3, help="Durchläufe für recurring/import")
+    parser.add_argument("--import-rows", type=int, default=20000)
+    parser.add_argument("--hash-iterations", type=int, default=600000)
+    parser.add_argument("--scenarios", help=f"Kommagetrennt, Auswahl aus: {', '.join(SCENARIOS)}")
+    parser.add_argument("--output", help="JSON-Datei für die Ergebnisse (sonst stdout)")
+    parser.add_argument("--baseline", help="Gespeicherte Ergebnisse zum Vergleich")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Erlaubte Verschlechterung, 0.2 = 20 %%")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Mindestdifferenz für p95-Regressionen")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            regressions = compare(results, json.load(handle), args.tolerance, args.min_delta_ms)
+        for name, metric, old, new in regressions:
+            print(f"REGRESSION {name} {metric}: {old} -> {new}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("Keine Regression gegenüber der Baseline.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,3 +5,93 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dein_geheimes_schlüssel'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///site.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Flask-Migrate registrieren: None = nur unter der Flask-CLI ('flask db ...'), '1'/'0' erzwingt es
+    MIGRATIONS_ENABLED = {'1': True, '0': False}.get(os.environ.get('MIGRATIONS_ENABLED'))
+
+    # Seitengröße der Transaktionsliste (Dashboard und /api/transactions)
+    TRANSACTIONS_PER_PAGE = int(os.environ.get('TRANSACTIONS_PER_PAGE') or 50)
+    TRANSACTIONS_MAX_PER_PAGE = int(os.environ.get('TRANSACTIONS_MAX_PER_PAGE') or 500)
+
+    # Bulk-Import von Kontoauszügen
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE') or 5000)
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH') or 512 * 1024 * 1024)
+
+    # Streaming-Export: Zeilen pro Cursor-Block bzw. gesendetem Chunk
+    EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE') or 1000)
+
+    # Templates: Bytecode-Cache im Dateisystem (ohne Verzeichnis: Jinja-Standard im Temp-Verzeichnis)
+    TEMPLATE_BYTECODE_CACHE = (os.environ.get('TEMPLATE_BYTECODE_CACHE') or '1') != '0'
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR')
+    # Dashboard und Listen gestreamt rendern, in Blöcken von STREAM_BUFFER_SIZE Zeichen
+    STREAM_TEMPLATES = (os.environ.get('STREAM_TEMPLATES') or '1') != '0'
+    STREAM_BUFFER_SIZE = int(os.environ.get('STREAM_BUFFER_SIZE') or 8192)
+
+    # Daueraufträge pro DB-Transaktion beim Scheduler-Lauf
+    RECURRING_CHUNK_SIZE = int(os.environ.get('RECURRING_CHUNK_SIZE') or 500)
+
+    # Hintergrund-Jobs: Ablage für Uploads/Exporte (Standard: instance/jobs), Lease eines Jobs in
+    # Sekunden, Threads und Abfrageintervall von 'flask worker'
+    JOB_SPOOL_DIR = os.environ.get('JOB_SPOOL_DIR')
+    JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS') or 300)
+    WORKER_THREADS = int(os.environ.get('WORKER_THREADS') or 2)
+    WORKER_POLL_INTERVAL = float(os.environ.get('WORKER_POLL_INTERVAL') or 1.0)
+    # Abgeschlossene Jobs samt Exportdatei so viele Sekunden aufbewahren; danach räumt der Worker auf
+    JOB_RESULT_TTL = int(os.environ.get('JOB_RESULT_TTL') or 24 * 3600)
+
+    # Fester Anteil der ETags (z.B. die Release-Version); ohne Wert wird er aus dem Stand des Codes berechnet
+    ETAG_SALT = os.environ.get('ETAG_SALT')
+
+    # Dashboard-Cache: 'lru' (im Prozess), 'socket' (lokaler memcached) oder 'none'
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND') or 'lru'
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES') or 1024)
+    CACHE_TTL = int(os.environ.get('CACHE_TTL') or 300)
+    CACHE_SOCKET = os.environ.get('CACHE_SOCKET') or 'unix:/tmp/memcached.sock'
+
+    # Kategorie-Cache (ID <-> Name) im Prozess: Anzahl Benutzer, deren Kategorien gehalten werden
+    CATEGORY_CACHE_USERS = int(os.environ.get('CATEGORY_CACHE_USERS') or 10000)
+
+    # Passwort-Hashing: Verfahren und Iterationen (bei Änderung wird beim Login neu gehasht; ohne Wert
+    # gilt der Standard von werkzeug), Größe des Hash-Pools, wartende Aufträge und maximale Wartezeit
+    # auf einen Platz in Sekunden
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'pbkdf2:sha256'
+    PASSWORD_HASH_ITERATIONS = int(os.environ['PASSWORD_HASH_ITERATIONS']) if os.environ.get('PASSWORD_HASH_ITERATIONS') else None
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or 2)
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE') or 16)
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT') or 0.5)
+
+    # Horizontales Sharding: kommagetrennte URIs der Shards (leer: alles in SQLALCHEMY_DATABASE_URI).
+    # Die Haupt-Datenbank hält dann nur Benutzer, Jobs und die Zuordnung Benutzer -> Shard; diese
+    # Zuordnung hält jeder Prozess SHARD_MAP_TTL Sekunden für bis zu SHARD_MAP_SIZE Benutzer
+    SHARD_DATABASE_URIS = [uri for uri in (os.environ.get('SHARD_DATABASE_URIS') or '').split(',') if uri]
+    SHARD_MAP_TTL = float(os.environ.get('SHARD_MAP_TTL') or 5)
+    SHARD_MAP_SIZE = int(os.environ.get('SHARD_MAP_SIZE') or 100000)
+
+    # Lesereplikate je Datenbank ('main' oder ein Shard wie 'shard0'): {Name: [URI, ...]};
+    # REPLICA_DATABASE_URIS (kommagetrennt) gilt für die Haupt-Datenbank. Nach einem Schreibzugriff
+    # liest der Benutzer REPLICA_STICKY_SECONDS lang nur von der primären Datenbank
+    DATABASE_REPLICAS = {'main': [uri for uri in (os.environ.get('REPLICA_DATABASE_URIS') or '').split(',') if uri]}
+    REPLICA_STICKY_SECONDS = float(os.environ.get('REPLICA_STICKY_SECONDS') or 5)
+
+    # Engine-Profil: 'auto' (nach URI), 'sqlite' (WAL + Pragmas), 'server' (Connection-Pool) oder 'none'
+    DB_PROFILE = os.environ.get('DB_PROFILE') or 'auto'
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE') or 'WAL'
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 5000)
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB') or 64 * 1024)
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE') or 256 * 1024 * 1024)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 10)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 20)
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT') or 30)
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE') or 1800)
+    DB_POOL_PRE_PING = (os.environ.get('DB_POOL_PRE_PING') or '1') != '0'
+
+    # Logging: Level, 'text' oder 'json' und Anteil der DEBUG/INFO-Meldungen, die geschrieben werden
+    LOG_LEVEL = os.environ.get('LOG_LEVEL') or 'INFO'
+    LOG_FORMAT = os.environ.get('LOG_FORMAT') or 'text'
+    LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE') or 1.0)
+
+    # Messung pro Request (/metrics) und Schwellen für das Slow-Log in Millisekunden
+    METRICS_ENABLED = (os.environ.get('METRICS_ENABLED') or '1') != '0'
+    METRICS_SLOW_REQUEST_MS = float(os.environ.get('METRICS_SLOW_REQUEST_MS') or 500)
+    METRICS_SLOW_QUERY_MS = float(os.environ.get('METRICS_SLOW_QUERY_MS') or 100)
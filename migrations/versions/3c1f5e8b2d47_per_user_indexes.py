@@ -0,0 +1,30 @@
+"""Per-user composite indexes
+
+Revision ID: 3c1f5e8b2d47
+Revises: a9007d690328
+Create Date: 2026-10-18 09:12:44.120331
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1f5e8b2d47'
+down_revision = 'a9007d690328'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_transaction_user_id_date_id', 'transaction', ['user_id', sa.text('date DESC'), 'id'], unique=False)
+    op.create_index('ix_transaction_user_id_category', 'transaction', ['user_id', 'category'], unique=False)
+    op.create_index('ix_budget_user_id_category', 'budget', ['user_id', 'category'], unique=False)
+    op.create_index('ix_savings_goal_user_id', 'savings_goal', ['user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_savings_goal_user_id', table_name='savings_goal')
+    op.drop_index('ix_budget_user_id_category', table_name='budget')
+    op.drop_index('ix_transaction_user_id_category', table_name='transaction')
+    op.drop_index('ix_transaction_user_id_date_id', table_name='transaction')
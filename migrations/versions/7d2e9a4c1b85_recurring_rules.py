@@ -0,0 +1,102 @@
+"""Recurring rules with next_due_at
+
+Revision ID: 7d2e9a4c1b85
+Revises: 3c1f5e8b2d47
+Create Date: 2026-10-18 10:41:07.554210
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2e9a4c1b85'
+down_revision = '3c1f5e8b2d47'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade():
+    op.create_table('recurring_rule',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('transaction_type', sa.String(length=50), nullable=False),
+    sa.Column('frequency', sa.String(length=50), nullable=False),
+    sa.Column('start_date', sa.DateTime(), nullable=False),
+    sa.Column('occurrences', sa.Integer(), nullable=False),
+    sa.Column('next_due_at', sa.DateTime(), nullable=False),
+    sa.Column('active', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_recurring_rule_active_next_due_at', 'recurring_rule', ['active', 'next_due_at'], unique=False)
+    op.create_index('ix_recurring_rule_user_id', 'recurring_rule', ['user_id'], unique=False)
+
+    with op.batch_alter_table('transaction') as batch_op:
+        batch_op.add_column(sa.Column('recurring_rule_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_transaction_recurring_rule_id', 'recurring_rule', ['recurring_rule_id'], ['id'])
+        batch_op.create_index('ux_transaction_recurring_rule_id_date', ['recurring_rule_id', 'date'], unique=True)
+
+    backfill_rules()
+
+
+def backfill_rules():
+    # Bestehende wiederkehrende Transaktionen werden zu Daueraufträgen; der
+    # alte Scheduler hat keine Ausführungen verknüpft, daher beginnt jede
+    # Regel mit der nächsten Fälligkeit nach der ursprünglichen Buchung.
+    from datetime import timedelta
+    from dateutil.relativedelta import relativedelta
+
+    steps = {
+        'wöchentlich': timedelta(weeks=1),
+        'monatlich': relativedelta(months=1),
+        'jährlich': relativedelta(years=1),
+    }
+    conn = op.get_bind()
+    transaction = sa.table('transaction',
+        sa.column('id', sa.Integer), sa.column('user_id', sa.Integer), sa.column('amount', sa.Float),
+        sa.column('category', sa.String), sa.column('transaction_type', sa.String),
+        sa.column('frequency', sa.String), sa.column('date', sa.DateTime),
+        sa.column('recurring_rule_id', sa.Integer))
+    rule = sa.table('recurring_rule',
+        sa.column('id', sa.Integer), sa.column('user_id', sa.Integer), sa.column('amount', sa.Float),
+        sa.column('category', sa.String), sa.column('transaction_type', sa.String),
+        sa.column('frequency', sa.String), sa.column('start_date', sa.DateTime),
+        sa.column('occurrences', sa.Integer), sa.column('next_due_at', sa.DateTime),
+        sa.column('active', sa.Boolean))
+
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(transaction)
+            .where(transaction.c.id > last_id, transaction.c.frequency.in_(list(steps)),
+                   transaction.c.date.isnot(None))
+            .order_by(transaction.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        for row in rows:
+            rule_id = conn.execute(rule.insert().values(
+                user_id=row.user_id, amount=row.amount, category=row.category,
+                transaction_type=row.transaction_type, frequency=row.frequency,
+                start_date=row.date, occurrences=1, next_due_at=row.date + steps[row.frequency],
+                active=True,
+            ).returning(rule.c.id)).scalar_one()
+            conn.execute(transaction.update().where(transaction.c.id == row.id).values(recurring_rule_id=rule_id))
+        last_id = rows[-1].id
+
+
+def downgrade():
+    with op.batch_alter_table('transaction') as batch_op:
+        batch_op.drop_index('ux_transaction_recurring_rule_id_date')
+        batch_op.drop_constraint('fk_transaction_recurring_rule_id', type_='foreignkey')
+        batch_op.drop_column('recurring_rule_id')
+
+    op.drop_index('ix_recurring_rule_user_id', table_name='recurring_rule')
+    op.drop_index('ix_recurring_rule_active_next_due_at', table_name='recurring_rule')
+    op.drop_table('recurring_rule')
@@ -0,0 +1,229 @@
+"""Normalize categories into a per-user category table
+
+Revision ID: a4c9e2f7b318
+Revises: f2b7c4d9e815
+Create Date: 2026-10-18 17:05:44.318902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c9e2f7b318'
+down_revision = 'f2b7c4d9e815'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 10000
+
+# Tabellen mit Ganzzahl-ID, die eine Kategorie-Spalte tragen -> Index auf die Kategorie (alt, neu)
+ENTITY_TABLES = {
+    'transaction': (('ix_transaction_user_id_category_date', ['user_id', 'category', 'date']),
+                    ('ix_transaction_user_id_category_id_date', ['user_id', 'category_id', 'date'])),
+    'recurring_rule': None,
+    'budget': (('ix_budget_user_id_category', ['user_id', 'category']),
+               ('ix_budget_user_id_category_id', ['user_id', 'category_id'])),
+}
+# Aggregate mit der Kategorie im Primärschlüssel -> (Schlüssel ohne Kategorie, Wertespalten, Position
+# der Kategorie im Primärschlüssel hinter user_id)
+AGGREGATE_TABLES = {
+    'budget_rollup': ([('period', sa.String(50)), ('period_start', sa.Date())],
+                      [('spent_cents', sa.Integer())], 0),
+    'monthly_total': ([('month', sa.Date()), ('transaction_type', sa.String(50))],
+                      [('total_cents', sa.Integer()), ('transaction_count', sa.Integer())], 1),
+}
+
+
+def aggregate_table(name, category, keys, values, position):
+    # Spalten und Primärschlüssel in der Reihenfolge der Modelle
+    key_columns = [column for column, _ in keys]
+    key_columns.insert(position, category.name)
+    return op.create_table(name,
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        *(category if column == category.name else sa.Column(column, dict(keys)[column], nullable=False)
+          for column in key_columns),
+        *(sa.Column(column, type_, nullable=False) for column, type_ in values),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        *([sa.ForeignKeyConstraint(['category_id'], ['category.id'], )] if category.name == 'category_id' else []),
+        sa.PrimaryKeyConstraint('user_id', *key_columns),
+    )
+FALLBACK_NAME = 'Ohne Kategorie'
+
+# Stand von app/search.py zum Zeitpunkt dieser Migration
+FTS_SCHEMA = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS category_fts USING fts5(
+        owner, name, content='', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS category_fts_insert AFTER INSERT ON category BEGIN
+        INSERT INTO category_fts(rowid, owner, name) VALUES (new.id, 'u' || new.user_id, new.name);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS category_fts_delete AFTER DELETE ON category BEGIN
+        INSERT INTO category_fts(category_fts, rowid, owner, name)
+        VALUES ('delete', old.id, 'u' || old.user_id, old.name);
+    END""",
+)
+# Stand von f2b7c4d9e815
+OLD_FTS_SCHEMA = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS category_fts USING fts5(
+        owner, category, content='', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS category_fts_insert AFTER INSERT ON category_count BEGIN
+        INSERT INTO category_fts(rowid, owner, category) VALUES (new.id, 'u' || new.user_id, new.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS category_fts_delete AFTER DELETE ON category_count BEGIN
+        INSERT INTO category_fts(category_fts, rowid, owner, category)
+        VALUES ('delete', old.id, 'u' || old.user_id, old.category);
+    END""",
+)
+
+
+def normalize(name):
+    # Wie app.categories.normalize; leere Namen landen in einer Sammelkategorie
+    return " ".join((name or "").split()) or FALLBACK_NAME
+
+
+def in_batches(table_name, statement):
+    """Führt ``statement`` blockweise über Bereiche der Ganzzahl-ID aus (:low < id <= :high)."""
+    conn = op.get_bind()
+    max_id = conn.execute(sa.text(f'SELECT MAX(id) FROM "{table_name}"')).scalar() or 0
+    for low in range(0, max_id, BATCH_SIZE):
+        conn.execute(sa.text(statement), {"low": low, "high": low + BATCH_SIZE})
+
+
+def upgrade():
+    conn = op.get_bind()
+    sqlite = conn.dialect.name == 'sqlite'
+
+    # category_count (Suchvokabular) geht in der neuen Tabelle category auf
+    if sqlite:
+        op.execute("DROP TABLE IF EXISTS category_fts")
+    op.drop_index('ux_category_count_user_id_category', table_name='category_count')
+    op.drop_table('category_count')
+    op.create_table('category',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('transaction_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ux_category_user_id_name', 'category', ['user_id', 'name'], unique=True)
+    if sqlite:
+        for statement in FTS_SCHEMA:
+            op.execute(statement)
+
+    # Alle vorkommenden Schreibweisen einsammeln und normalisiert deduplizieren.
+    # Die Zuordnung alte Schreibweise -> ID liegt in einer Hilfstabelle, damit das
+    # Nachtragen der IDs in SQL (blockweise) statt Zeile für Zeile in Python läuft.
+    spellings = set()
+    for table_name in (*ENTITY_TABLES, *AGGREGATE_TABLES):
+        spellings.update(conn.execute(sa.text(f'SELECT DISTINCT user_id, category FROM "{table_name}"')))
+    names = sorted({(user_id, normalize(category)) for user_id, category in spellings})
+    if names:
+        conn.execute(sa.text("INSERT INTO category (user_id, name, transaction_count) VALUES (:user_id, :name, 0)"),
+                     [{"user_id": user_id, "name": name} for user_id, name in names])
+    ids = {(user_id, name): id_ for id_, user_id, name in conn.execute(sa.text("SELECT id, user_id, name FROM category"))}
+
+    op.create_table('category_spelling',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'category')
+    )
+    if spellings:
+        conn.execute(sa.text("INSERT INTO category_spelling (user_id, category, category_id) "
+                             "VALUES (:user_id, :category, :category_id)"), [
+            {"user_id": user_id, "category": category, "category_id": ids[(user_id, normalize(category))]}
+            for user_id, category in spellings
+        ])
+    spelling_id = ('(SELECT s.category_id FROM category_spelling s '
+                   'WHERE s.user_id = "{0}".user_id AND s.category = "{0}".category)')
+
+    for table_name, indexes in ENTITY_TABLES.items():
+        op.add_column(table_name, sa.Column('category_id', sa.Integer(), nullable=True))
+        in_batches(table_name, f'UPDATE "{table_name}" SET category_id = {spelling_id.format(table_name)} '
+                               'WHERE id > :low AND id <= :high')
+        if indexes:
+            op.drop_index(indexes[0][0], table_name=table_name)
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.alter_column('category_id', existing_type=sa.Integer(), nullable=False)
+            batch_op.create_foreign_key(f'fk_{table_name}_category_id', 'category', ['category_id'], ['id'])
+            batch_op.drop_column('category')
+        if indexes:
+            op.create_index(indexes[1][0], table_name, indexes[1][1], unique=False)
+
+    # Aggregate neu anlegen; Schreibweisen, die jetzt dieselbe Kategorie sind, werden zusammengezählt
+    for table_name, (keys, values, position) in AGGREGATE_TABLES.items():
+        aggregate_table(f'{table_name}_new', sa.Column('category_id', sa.Integer(), nullable=False),
+                        keys, values, position)
+        key_columns = ", ".join(name for name, _ in keys)
+        op.execute(
+            f"INSERT INTO {table_name}_new (user_id, category_id, {key_columns}, {', '.join(n for n, _ in values)}) "
+            f"SELECT a.user_id, s.category_id, {', '.join('a.' + n for n, _ in keys)}, "
+            f"{', '.join(f'SUM(a.{n})' for n, _ in values)} "
+            f"FROM {table_name} a JOIN category_spelling s ON s.user_id = a.user_id AND s.category = a.category "
+            f"GROUP BY a.user_id, s.category_id, {', '.join('a.' + n for n, _ in keys)}"
+        )
+        op.drop_table(table_name)
+        op.rename_table(f'{table_name}_new', table_name)
+
+    op.drop_table('category_spelling')
+    op.execute(
+        'UPDATE category SET transaction_count = (SELECT COUNT(*) FROM "transaction" t '
+        'WHERE t.user_id = category.user_id AND t.category_id = category.id)'
+    )
+
+
+def downgrade():
+    conn = op.get_bind()
+    sqlite = conn.dialect.name == 'sqlite'
+    category_name = '(SELECT c.name FROM category c WHERE c.id = "{0}".category_id)'
+
+    for table_name, (keys, values, position) in AGGREGATE_TABLES.items():
+        aggregate_table(f'{table_name}_old', sa.Column('category', sa.String(length=100), nullable=False),
+                        keys, values, position)
+        columns = ", ".join(name for name, _ in keys + values)
+        op.execute(
+            f"INSERT INTO {table_name}_old (user_id, category, {columns}) "
+            f"SELECT a.user_id, c.name, {', '.join('a.' + n for n, _ in keys + values)} "
+            f"FROM {table_name} a JOIN category c ON c.id = a.category_id"
+        )
+        op.drop_table(table_name)
+        op.rename_table(f'{table_name}_old', table_name)
+
+    for table_name, indexes in ENTITY_TABLES.items():
+        op.add_column(table_name, sa.Column('category', sa.String(length=100), nullable=True))
+        in_batches(table_name, f'UPDATE "{table_name}" SET category = {category_name.format(table_name)} '
+                               'WHERE id > :low AND id <= :high')
+        if indexes:
+            op.drop_index(indexes[1][0], table_name=table_name)
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.alter_column('category', existing_type=sa.String(length=100), nullable=False)
+            batch_op.drop_constraint(f'fk_{table_name}_category_id', type_='foreignkey')
+            batch_op.drop_column('category_id')
+        if indexes:
+            op.create_index(indexes[0][0], table_name, indexes[0][1], unique=False)
+
+    op.create_table('category_count',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('transaction_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ux_category_count_user_id_category', 'category_count', ['user_id', 'category'], unique=True)
+    if sqlite:
+        # Die Trigger heißen gleich und hängen noch an category
+        op.execute("DROP TRIGGER IF EXISTS category_fts_insert")
+        op.execute("DROP TRIGGER IF EXISTS category_fts_delete")
+        op.execute("DROP TABLE IF EXISTS category_fts")
+        for statement in OLD_FTS_SCHEMA:
+            op.execute(statement)
+    op.execute(
+        "INSERT INTO category_count (user_id, category, transaction_count) "
+        "SELECT user_id, name, transaction_count FROM category"
+    )
+    op.drop_index('ux_category_user_id_name', table_name='category')
+    op.drop_table('category')
@@ -0,0 +1,50 @@
+"""Savings contribution ledger
+
+Revision ID: b6d1f3a8c924
+Revises: a4c9e2f7b318
+Create Date: 2026-10-18 18:21:09.551273
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d1f3a8c924'
+down_revision = 'a4c9e2f7b318'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('savings_contribution',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('goal_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('amount_cents', sa.Integer(), nullable=False),
+    sa.Column('currency', sa.String(length=3), server_default='EUR', nullable=False),
+    sa.Column('date', sa.DateTime(), nullable=False),
+    sa.Column('transaction_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['goal_id'], ['savings_goal.id'], ),
+    sa.ForeignKeyConstraint(['transaction_id'], ['transaction.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_savings_contribution_goal_id_date', 'savings_contribution', ['goal_id', 'date'], unique=False)
+    op.create_index('ux_savings_contribution_transaction_id', 'savings_contribution', ['transaction_id'], unique=True)
+    op.add_column('savings_goal', sa.Column('first_contribution_at', sa.DateTime(), nullable=True))
+
+    # Vorhandene Stände als Anfangsbestand ins Ledger, damit ein Neuaufbau sie nicht verliert
+    op.execute(
+        "INSERT INTO savings_contribution (goal_id, user_id, amount_cents, currency, date) "
+        "SELECT id, user_id, current_cents, currency, date_created FROM savings_goal WHERE current_cents > 0"
+    )
+    op.execute("UPDATE savings_goal SET first_contribution_at = date_created WHERE current_cents > 0")
+
+
+def downgrade():
+    with op.batch_alter_table('savings_goal') as batch_op:
+        batch_op.drop_column('first_contribution_at')
+    op.drop_index('ux_savings_contribution_transaction_id', table_name='savings_contribution')
+    op.drop_index('ix_savings_contribution_goal_id_date', table_name='savings_contribution')
+    op.drop_table('savings_contribution')
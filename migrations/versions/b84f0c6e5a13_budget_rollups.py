@@ -0,0 +1,79 @@
+"""Budget spending rollups
+
+Revision ID: b84f0c6e5a13
+Revises: 7d2e9a4c1b85
+Create Date: 2026-10-18 12:05:31.902114
+
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b84f0c6e5a13'
+down_revision = '7d2e9a4c1b85'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 10000
+
+
+def period_starts(day):
+    day = day.date() if isinstance(day, datetime) else day
+    return (
+        ('wöchentlich', day - timedelta(days=day.weekday())),
+        ('monatlich', day.replace(day=1)),
+        ('jährlich', day.replace(month=1, day=1)),
+    )
+
+
+def upgrade():
+    op.create_table('budget_rollup',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('period', sa.String(length=50), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('spent', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'category', 'period', 'period_start')
+    )
+
+    # Rollups aus den vorhandenen Ausgaben befüllen, Transaktionen blockweise lesen
+    conn = op.get_bind()
+    transaction = sa.table('transaction',
+        sa.column('id', sa.Integer), sa.column('user_id', sa.Integer), sa.column('amount', sa.Float),
+        sa.column('category', sa.String), sa.column('transaction_type', sa.String),
+        sa.column('date', sa.DateTime))
+    rollup = sa.table('budget_rollup',
+        sa.column('user_id', sa.Integer), sa.column('category', sa.String), sa.column('period', sa.String),
+        sa.column('period_start', sa.Date), sa.column('spent', sa.Float))
+
+    totals = defaultdict(float)
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(transaction)
+            .where(transaction.c.id > last_id, transaction.c.transaction_type == 'expense',
+                   transaction.c.date.isnot(None))
+            .order_by(transaction.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        for row in rows:
+            for period, start in period_starts(row.date):
+                totals[(row.user_id, row.category, period, start)] += row.amount
+        last_id = rows[-1].id
+
+    if totals:
+        conn.execute(rollup.insert(), [
+            {'user_id': user_id, 'category': category, 'period': period, 'period_start': start, 'spent': spent}
+            for (user_id, category, period, start), spent in totals.items()
+        ])
+
+
+def downgrade():
+    op.drop_table('budget_rollup')
@@ -0,0 +1,45 @@
+"""Monthly totals for analytics
+
+Revision ID: c5a7d3f9e260
+Revises: b84f0c6e5a13
+Create Date: 2026-10-18 13:20:48.317095
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a7d3f9e260'
+down_revision = 'b84f0c6e5a13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('monthly_total',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('transaction_type', sa.String(length=50), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('transaction_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'month', 'category', 'transaction_type')
+    )
+
+    # Befüllen mit einem einzigen INSERT ... SELECT ... GROUP BY
+    if op.get_bind().dialect.name == 'sqlite':
+        month = "strftime('%Y-%m-01', date)"
+    else:
+        month = "CAST(date_trunc('month', date) AS DATE)"
+    op.execute(
+        "INSERT INTO monthly_total (user_id, month, category, transaction_type, total, transaction_count) "
+        f"SELECT user_id, {month}, category, transaction_type, SUM(amount), COUNT(*) "
+        'FROM "transaction" WHERE date IS NOT NULL '
+        f"GROUP BY user_id, {month}, category, transaction_type"
+    )
+
+
+def downgrade():
+    op.drop_table('monthly_total')
@@ -0,0 +1,26 @@
+"""User data version for cache invalidation
+
+Revision ID: d1e6b2a8f471
+Revises: c5a7d3f9e260
+Create Date: 2026-10-18 14:02:19.640532
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1e6b2a8f471'
+down_revision = 'c5a7d3f9e260'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.drop_column('data_version')
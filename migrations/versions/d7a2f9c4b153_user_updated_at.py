@@ -0,0 +1,25 @@
+"""Add user.updated_at for Last-Modified
+
+Revision ID: d7a2f9c4b153
+Revises: c3e8a5d1f276
+Create Date: 2026-10-18 19:48:12.602917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a2f9c4b153'
+down_revision = 'c3e8a5d1f276'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('user', sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.drop_column('updated_at')
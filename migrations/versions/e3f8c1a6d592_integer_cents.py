@@ -0,0 +1,86 @@
+"""Store money as integer cents with currency
+
+Revision ID: e3f8c1a6d592
+Revises: d1e6b2a8f471
+Create Date: 2026-10-18 14:47:08.215379
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3f8c1a6d592'
+down_revision = 'd1e6b2a8f471'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 10000
+
+# Tabelle -> [(alte Float-Spalte, neue Cent-Spalte)], ob eine Währung dazukommt
+MONEY_COLUMNS = {
+    'transaction': ([('amount', 'amount_cents')], True),
+    'recurring_rule': ([('amount', 'amount_cents')], True),
+    'budget': ([('amount', 'amount_cents')], True),
+    'savings_goal': ([('target_amount', 'target_cents'), ('current_amount', 'current_cents')], True),
+    'budget_rollup': ([('spent', 'spent_cents')], False),
+    'monthly_total': ([('total', 'total_cents')], False),
+}
+
+
+def copy_values(table_name, pairs, to_cents):
+    """Rechnet die Beträge blockweise über den Primärschlüssel um."""
+    conn = op.get_bind()
+    table = sa.table(table_name, *(sa.column(name) for pair in pairs for name in pair))
+    if to_cents:
+        values = {cents: sa.cast(sa.func.round(table.c[amount] * 100), sa.Integer) for amount, cents in pairs}
+    else:
+        values = {amount: table.c[cents] / 100.0 for amount, cents in pairs}
+
+    if table_name in ('budget_rollup', 'monthly_total'):
+        # Aggregattabellen ohne Ganzzahl-ID sind klein genug für ein einziges UPDATE
+        conn.execute(table.update().values(values))
+        return
+
+    id_column = sa.column('id', sa.Integer)
+    table.append_column(id_column)
+    max_id = conn.execute(sa.select(sa.func.max(id_column))).scalar() or 0
+    for low in range(0, max_id, BATCH_SIZE):
+        conn.execute(
+            table.update()
+            .where(id_column > low, id_column <= low + BATCH_SIZE)
+            .values(values)
+        )
+
+
+def upgrade():
+    for table_name, (pairs, with_currency) in MONEY_COLUMNS.items():
+        with op.batch_alter_table(table_name) as batch_op:
+            for _, cents in pairs:
+                batch_op.add_column(sa.Column(cents, sa.Integer(), nullable=True))
+            if with_currency:
+                batch_op.add_column(sa.Column('currency', sa.String(length=3), nullable=False,
+                                              server_default='EUR'))
+
+        copy_values(table_name, pairs, to_cents=True)
+
+        with op.batch_alter_table(table_name) as batch_op:
+            for amount, cents in pairs:
+                batch_op.alter_column(cents, existing_type=sa.Integer(), nullable=False)
+                batch_op.drop_column(amount)
+
+
+def downgrade():
+    for table_name, (pairs, with_currency) in MONEY_COLUMNS.items():
+        with op.batch_alter_table(table_name) as batch_op:
+            for amount, _ in pairs:
+                batch_op.add_column(sa.Column(amount, sa.Float(), nullable=True))
+
+        copy_values(table_name, pairs, to_cents=False)
+
+        with op.batch_alter_table(table_name) as batch_op:
+            for amount, cents in pairs:
+                batch_op.alter_column(amount, existing_type=sa.Float(), nullable=False)
+                batch_op.drop_column(cents)
+            if with_currency:
+                batch_op.drop_column('currency')
@@ -0,0 +1,53 @@
+"""Move data_version into user_state, add shard directory
+
+Revision ID: e8c1b4f9a372
+Revises: d7a2f9c4b153
+Create Date: 2026-10-18 21:14:03.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8c1b4f9a372'
+down_revision = 'd7a2f9c4b153'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_state',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('data_version', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('shard_assignment',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('shard', sa.String(length=50), nullable=False),
+    sa.Column('state', sa.String(length=20), server_default='active', nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.execute(
+        'INSERT INTO user_state (user_id, data_version, updated_at) '
+        'SELECT id, data_version, updated_at FROM "user"'
+    )
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('data_version')
+
+
+def downgrade():
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute(
+        'UPDATE "user" SET '
+        'data_version = COALESCE((SELECT data_version FROM user_state WHERE user_id = "user".id), 0), '
+        'updated_at = (SELECT updated_at FROM user_state WHERE user_id = "user".id)'
+    )
+    op.drop_table('shard_assignment')
+    op.drop_table('user_state')
@@ -0,0 +1,68 @@
+"""Transaction search: filter indexes and FTS5 category vocabulary
+
+Revision ID: f2b7c4d9e815
+Revises: e3f8c1a6d592
+Create Date: 2026-10-18 16:12:37.904126
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b7c4d9e815'
+down_revision = 'e3f8c1a6d592'
+branch_labels = None
+depends_on = None
+
+# Stand von app/search.py zum Zeitpunkt dieser Migration
+FTS_SCHEMA = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS category_fts USING fts5(
+        owner, category, content='', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS category_fts_insert AFTER INSERT ON category_count BEGIN
+        INSERT INTO category_fts(rowid, owner, category) VALUES (new.id, 'u' || new.user_id, new.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS category_fts_delete AFTER DELETE ON category_count BEGIN
+        INSERT INTO category_fts(category_fts, rowid, owner, category)
+        VALUES ('delete', old.id, 'u' || old.user_id, old.category);
+    END""",
+)
+
+
+def upgrade():
+    op.drop_index('ix_transaction_user_id_category', table_name='transaction')
+    op.create_index('ix_transaction_user_id_category_date', 'transaction', ['user_id', 'category', 'date'], unique=False)
+    op.create_index('ix_transaction_user_id_type_date', 'transaction', ['user_id', 'transaction_type', 'date'], unique=False)
+    op.create_index('ix_transaction_user_id_amount_cents', 'transaction', ['user_id', 'amount_cents'], unique=False)
+
+    op.create_table('category_count',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('transaction_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ux_category_count_user_id_category', 'category_count', ['user_id', 'category'], unique=True)
+
+    # Erst Index und Trigger, dann befüllen: die Trigger tragen jede Zeile in category_fts ein
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in FTS_SCHEMA:
+            op.execute(statement)
+    op.execute(
+        "INSERT INTO category_count (user_id, category, transaction_count) "
+        'SELECT user_id, category, COUNT(*) FROM "transaction" GROUP BY user_id, category'
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS category_fts")
+    op.drop_index('ux_category_count_user_id_category', table_name='category_count')
+    op.drop_table('category_count')
+
+    op.drop_index('ix_transaction_user_id_amount_cents', table_name='transaction')
+    op.drop_index('ix_transaction_user_id_type_date', table_name='transaction')
+    op.drop_index('ix_transaction_user_id_category_date', table_name='transaction')
+    op.create_index('ix_transaction_user_id_category', 'transaction', ['user_id', 'category'], unique=False)
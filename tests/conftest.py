@@ -0,0 +1,62 @@
+import sys
+import os
+import tempfile
+import pytest
+from werkzeug.security import generate_password_hash
+
+# Projektwurzel zum Python-Pfad hinzufügen
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from app import create_app, db
+from app.models import User
+from tests.query_plan import assert_max_queries
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"  # In-Memory-Datenbank für Tests
+    WTF_CSRF_ENABLED = False  # Deaktiviert CSRF für Tests
+    PASSWORD_HASH_ITERATIONS = 1000  # Schnelle Hashes, die Policy selbst wird extra getestet
+    JOB_SPOOL_DIR = tempfile.mkdtemp(prefix="moneymap-jobs-")  # Uploads und Exporte der Job-Tests
+
+
+@pytest.fixture
+def factory_app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        test_user = User(
+            username="testuser",
+            email="test@example.com",
+            password=generate_password_hash("password123", method="pbkdf2:sha256:1000"),
+        )
+        db.session.add(test_user)
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def factory_client(factory_app):
+    with factory_app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def logged_in_client(factory_client):
+    factory_client.post(
+        "/login",
+        data=dict(email="test@example.com", password="password123"),
+        follow_redirects=True,
+    )
+    return factory_client
+
+
+@pytest.fixture
+def max_queries(factory_app):
+    # with max_queries(4): client.get(...) – zählt die Statements auf der Standard-Engine
+    def budget(limit, label=""):
+        return assert_max_queries(db.engine, limit, label)
+    return budget
@@ -0,0 +1,59 @@
+# Hilfsfunktionen, um die von einer Route abgesetzten SQL-Abfragen mitzuschneiden,
+# zu zählen und per EXPLAIN QUERY PLAN auf vollständige Tabellenscans zu prüfen (nur SQLite).
+import re
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+# "SCAN transaction" oder "SCAN transaction USING INDEX ..." heißt: alle Zeilen werden gelesen.
+# "SCAN CONSTANT ROW", Scans über Unterabfragen und FTS5-Abfragen per MATCH ("VIRTUAL TABLE
+# INDEX 0:M...") sind harmlos.
+FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)(?!\(subquery)(?!SUBQUERY)(?!\w+ VIRTUAL TABLE INDEX \d+:M)\"?(\w+)\"?")
+
+
+@contextmanager
+def capture_queries(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@contextmanager
+def assert_max_queries(engine, limit, label=""):
+    """Schlägt fehl, wenn im Block mehr als ``limit`` SQL-Statements abgesetzt werden."""
+    with capture_queries(engine) as statements:
+        yield statements
+    assert len(statements) <= limit, f"{label or 'Block'}: {len(statements)} statt höchstens {limit} Abfragen:\n" + \
+        "\n".join(statement for statement, _ in statements)
+
+
+def query_plan(engine, statement, parameters):
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def full_table_scans(engine, statements):
+    """Liefert (statement, plan_zeile) für jede SELECT-Abfrage, die eine Tabelle komplett liest."""
+    offenders = []
+    for statement, parameters in statements:
+        if not statement.lstrip().upper().startswith("SELECT"):
+            continue
+        for detail in query_plan(engine, statement, parameters):
+            if FULL_SCAN.match(detail):
+                offenders.append((statement, detail))
+    return offenders
+
+
+def assert_no_full_scans(engine, statements):
+    offenders = full_table_scans(engine, statements)
+    assert not offenders, "Vollständiger Tabellenscan:\n" + "\n\n".join(
+        f"{detail}\n  {statement}" for statement, detail in offenders
+    )
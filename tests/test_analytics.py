@@ -0,0 +1,102 @@
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.analytics import rebuild_monthly_totals, rolling_mean
+from app.categories import category_id
+from app.models import MonthlyTotal, Transaction
+from app.money import Money
+from app.rollups import record_transactions
+
+
+@pytest.fixture
+def history(factory_app):
+    def tx(amount, category, transaction_type, day):
+        return Transaction(user_id=1, amount=Money.parse(amount), category_id=category_id(1, category),
+                           transaction_type=transaction_type, date=day)
+
+    transactions = [
+        tx("3000", "Gehalt", "income", datetime(2023, 1, 1)),
+        tx("1000", "Miete", "expense", datetime(2023, 1, 3)),
+        tx("3000", "Gehalt", "income", datetime(2024, 1, 1)),
+        tx("1000", "Miete", "expense", datetime(2024, 1, 3)),
+        tx("300", "Lebensmittel", "expense", datetime(2024, 1, 20)),
+        # Februar ohne Buchungen, damit das Monatsraster eine Lücke füllen muss
+        tx("3200", "Gehalt", "income", datetime(2024, 3, 1)),
+        tx("1000", "Miete", "expense", datetime(2024, 3, 3)),
+        tx("700", "Lebensmittel", "expense", datetime(2024, 3, 15)),
+    ]
+    db.session.add_all(transactions)
+    record_transactions(transactions)
+    db.session.commit()
+
+
+def test_rolling_mean():
+    # Cent-Beträge, der Durchschnitt wird auf ganze Cent gerundet
+    assert rolling_mean([100, 200, 301, 400], 2).tolist() == [100, 150, 250, 350]
+
+
+def test_cash_flow(logged_in_client, history):
+    data = logged_in_client.get("/api/analytics/cash-flow?start=2024-01&window=2").get_json()
+    months = data["months"]
+    assert [m["month"] for m in months] == ["2024-01", "2024-02", "2024-03"]
+    assert [m["net"] for m in months] == [1700.0, 0.0, 1500.0]
+    assert [m["cumulative_net"] for m in months] == [1700.0, 1700.0, 3200.0]
+    assert [m["rolling_net"] for m in months] == [1700.0, 850.0, 750.0]
+
+
+def test_top_categories(logged_in_client, history):
+    data = logged_in_client.get("/api/analytics/categories?start=2024-01&end=2024-12").get_json()
+    assert [(c["category"], c["total"], c["count"], c["share"]) for c in data["categories"]] == [
+        ("Miete", 2000.0, 2, 66.67),
+        ("Lebensmittel", 1000.0, 2, 33.33),
+    ]
+    assert data["categories"][-1]["cumulative_share"] == 100.0
+
+
+def test_year_over_year(logged_in_client, history):
+    data = logged_in_client.get("/api/analytics/year-over-year?year=2024").get_json()
+    assert data["income"]["current"][0] == 3000.0
+    assert data["expense"]["change"][0] == 300.0
+    assert data["expense"]["change_percent"][0] == 30.0
+    assert data["expense"]["change_percent"][2] is None
+    assert data["totals"]["expense"] == [1000.0, 3000.0]
+
+
+def test_requires_login_and_valid_arguments(factory_client, logged_in_client):
+    assert logged_in_client.get("/api/analytics/cash-flow?start=Januar").status_code == 400
+    assert logged_in_client.get("/api/analytics/cash-flow?window=0").status_code == 400
+    assert logged_in_client.get("/api/analytics/categories?type=transfer").status_code == 400
+    assert logged_in_client.get("/api/analytics/year-over-year?year=1").status_code == 400
+    assert logged_in_client.get("/api/analytics/forecast?months=100").status_code == 400
+    logged_in_client.get("/logout")
+    assert logged_in_client.get("/api/analytics/categories").status_code == 401
+
+
+def test_rebuild_matches_incremental(factory_app, history):
+    incremental = {(m.month, m.category_id, m.transaction_type): (m.total_cents, m.transaction_count)
+                   for m in MonthlyTotal.query.all()}
+    assert rebuild_monthly_totals() == len(incremental)
+    db.session.expire_all()
+    rebuilt = {(m.month, m.category_id, m.transaction_type): (m.total_cents, m.transaction_count)
+               for m in MonthlyTotal.query.all()}
+    assert rebuilt == incremental
+
+
+def test_rebuild_changes_etag(factory_app, logged_in_client, history):
+    etag = logged_in_client.get("/api/analytics/cash-flow").headers["ETag"]
+    rebuild_monthly_totals()
+    assert logged_in_client.get("/api/analytics/cash-flow", headers={"If-None-Match": etag}).status_code == 200
+    etag = logged_in_client.get("/api/analytics/cash-flow").headers["ETag"]
+    rebuild_monthly_totals(user_id=1)
+    assert logged_in_client.get("/api/analytics/cash-flow", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_internal_value_error_is_not_a_bad_request(factory_app, logged_in_client, monkeypatch):
+    # Nur geprüfte Parameter ergeben 400, Fehler in der Auswertung selbst bleiben ein 500
+    def broken(*args, **kwargs):
+        raise ValueError("Fehler in der Auswertung")
+    monkeypatch.setattr("app.analytics.cash_flow", broken)
+    factory_app.config["PROPAGATE_EXCEPTIONS"] = False
+    assert logged_in_client.get("/api/analytics/cash-flow").status_code == 500
@@ -1,31 +1,10 @@
-import sys
-import os
 import pytest
-from werkzeug.security import generate_password_hash
 
-# Projektwurzel zum Python-Pfad hinzufügen
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from app import app, db, User, Transaction, Budget, SavingsGoal
 
 @pytest.fixture
-def client():
-    app.config["TESTING"] = True
-    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"  # In-Memory-Datenbank für Tests
-    app.config["WTF_CSRF_ENABLED"] = False  # Deaktiviert CSRF für Tests
-    with app.test_client() as client:
-        with app.app_context():
-            db.create_all()
-            test_user = User(
-                username="testuser",
-                email="test@example.com",
-                password=generate_password_hash("password123", method="pbkdf2:sha256"),
-            )
-            db.session.add(test_user)
-            db.session.commit()
-        yield client
-        with app.app_context():
-            db.drop_all()
+def client(factory_client):
+    # App aus create_app mit In-Memory-Datenbank und Testbenutzer (conftest)
+    return factory_client
 
 def login(client, email, password):
     return client.post("/login", data=dict(email=email, password=password), follow_redirects=True)
@@ -0,0 +1,25 @@
+from app.categories import find_category_id
+from app.models import Budget, BudgetRollup, MonthlyTotal, SavingsGoal, Transaction, User
+from benchmarks.datagen import generate
+from benchmarks.run import compare, summarize
+
+
+def test_generate_small_dataset(factory_app):
+    counts = generate(users=3, transactions=200, budgets=2, goals=1, years=1, start_user=2)
+    assert counts.transactions == 600
+    assert Transaction.query.count() == 600
+    assert User.query.count() == 4
+    assert Budget.query.count() == 6 and SavingsGoal.query.count() == 3
+    # Aggregate sind aufgebaut
+    assert BudgetRollup.query.count() > 0 and MonthlyTotal.query.count() > 0
+    assert Transaction.query.filter_by(user_id=2, category_id=find_category_id(2, "Gehalt")).count() >= 12
+
+
+def test_summarize_and_compare():
+    result = summarize([0.010] * 98 + [0.020, 0.100], rows=1000)
+    assert result["p50_ms"] == 10.0 and result["p99_ms"] == 20.0
+    assert result["rows_per_sec"] == round(1000 / 1.1, 1)
+
+    baseline = {"scenarios": {"a": {"p95_ms": 10.0}, "b": {"p95_ms": 1.0, "rows_per_sec": 100.0}}}
+    current = {"scenarios": {"a": {"p95_ms": 13.0}, "b": {"p95_ms": 1.5, "rows_per_sec": 70.0}}}
+    assert compare(current, baseline, 0.2) == [("a", "p95_ms", 10.0, 13.0), ("b", "rows_per_sec", 100.0, 70.0)]
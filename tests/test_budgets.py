@@ -0,0 +1,95 @@
+from datetime import date, datetime
+
+from app import db
+from app.budgets import budget_statuses, rebuild_rollups, period_start, user_budget_statuses
+from app.categories import category_id
+from app.importer import import_transactions
+from app.models import Budget, BudgetRollup, Transaction
+from app.money import Money
+
+
+def add_budget(category="Lebensmittel", amount=Money.parse("200"), period="monatlich"):
+    budget = Budget(user_id=1, category_id=category_id(1, category), amount=amount, period=period)
+    db.session.add(budget)
+    db.session.commit()
+    return budget
+
+
+def post_transaction(client, amount, category="Lebensmittel", transaction_type="expense"):
+    client.post("/add_transaction", data=dict(
+        amount=amount, category=category, transaction_type=transaction_type, frequency="einmalig"))
+
+
+def test_period_start():
+    day = date(2024, 5, 16)  # Donnerstag
+    assert period_start(day, "wöchentlich") == date(2024, 5, 13)
+    assert period_start(day, "monatlich") == date(2024, 5, 1)
+    assert period_start(datetime(2024, 5, 16, 12), "jährlich") == date(2024, 1, 1)
+
+
+def test_add_and_delete_maintain_rollup(logged_in_client):
+    budget = add_budget()
+    post_transaction(logged_in_client, "50")
+    post_transaction(logged_in_client, "25.5")
+    post_transaction(logged_in_client, "1000", transaction_type="income")
+
+    [status] = budget_statuses(1, [budget])
+    assert status.spent == Money.parse("75.50")
+    assert status.remaining == Money.parse("124.50")
+    assert round(status.percent_used, 2) == 37.75
+
+    first = Transaction.query.filter_by(amount=Money.parse("50")).one()
+    logged_in_client.post(f"/delete_transaction/{first.id}")
+    [status] = budget_statuses(1, [budget])
+    assert status.spent == Money.parse("25.50")
+
+
+def test_failed_budget_delete_is_rolled_back(logged_in_client, monkeypatch):
+    logged_in_client.post("/add_budget", data=dict(category="Kino", amount="30", period="monatlich"))
+    budget = Budget.query.one()
+
+    def broken(*user_ids):
+        raise RuntimeError("kaputt")
+
+    monkeypatch.setattr("app.routes.bump_data_version", broken)
+    logged_in_client.post(f"/delete_budget/{budget.id}")
+    assert not db.session.deleted and Budget.query.count() == 1
+
+
+def test_joined_statuses_match(logged_in_client):
+    budgets = [add_budget(), add_budget(amount=Money.parse("50"), period="wöchentlich"),
+               add_budget(category="Kino", period="jährlich")]
+    post_transaction(logged_in_client, "60")
+    assert user_budget_statuses(1) == budget_statuses(1, budgets)
+    assert [s.spent for s in user_budget_statuses(1)] == [Money(6000), Money(6000), Money(0)]
+
+
+def test_dashboard_shows_budget_status(logged_in_client):
+    add_budget(amount=Money.parse("100"), period="wöchentlich")
+    post_transaction(logged_in_client, "120")
+    response = logged_in_client.get("/dashboard")
+    assert b"120.00" in response.data
+    assert b"-20.00" in response.data
+    assert b"table-danger" in response.data
+
+
+def test_bulk_import_updates_rollups(factory_app):
+    rows = [{"date": "2024-02-10", "amount": "-10", "category": "Lebensmittel"}] * 3
+    import_transactions(1, iter(rows), batch_size=2)
+
+    rollup = db.session.get(BudgetRollup, (1, category_id(1, "Lebensmittel"), "monatlich", date(2024, 2, 1)))
+    assert rollup.spent_cents == 3000
+
+
+def test_rebuild_repairs_rollups(factory_app):
+    db.session.add(Transaction(user_id=1, amount=Money.parse("40"), category_id=category_id(1, "Kino"),
+                               transaction_type="expense", date=datetime(2024, 3, 3)))
+    db.session.add(BudgetRollup(user_id=1, category_id=category_id(1, "Kino"), period="monatlich",
+                                period_start=date(2024, 3, 1), spent_cents=99900))
+    db.session.commit()
+
+    result = factory_app.test_cli_runner().invoke(args=["budgets", "rebuild-rollups"])
+    assert result.exit_code == 0, result.output
+    assert "3 Rollups neu berechnet." in result.output
+    assert db.session.get(BudgetRollup, (1, category_id(1, "Kino"), "monatlich", date(2024, 3, 1))).spent_cents == 4000
+    assert rebuild_rollups(user_id=2) == 0
@@ -0,0 +1,139 @@
+import pickle
+import socket
+import threading
+
+import pytest
+
+from app.cache import LRUCache, SocketCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.info()["evictions"] == 1
+    assert cache.info()["hits"] == 3 and cache.info()["misses"] == 1
+
+
+def test_lru_expires_entries():
+    cache = LRUCache(max_entries=10, ttl=-1)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert cache.info()["expirations"] == 1
+
+
+def test_dashboard_is_cached_until_data_changes(factory_app, logged_in_client):
+    cache = factory_app.extensions["cache"]
+    logged_in_client.get("/dashboard")
+    hits = cache.stats.hits
+    logged_in_client.get("/dashboard")
+    assert cache.stats.hits == hits + 1
+
+    logged_in_client.post("/add_transaction", data=dict(
+        amount="12.34", category="Bäcker", transaction_type="expense", frequency="einmalig"))
+    response = logged_in_client.get("/dashboard")
+    assert "Bäcker".encode() in response.data
+    assert cache.stats.hits == hits + 1
+
+    # Die Statistik ist prozessweit und steht nur in /metrics, nicht in der API der Benutzer
+    assert logged_in_client.get("/api/cache/stats").status_code == 404
+    metrics = logged_in_client.get("/metrics").get_data(as_text=True)
+    assert f'moneymap_cache_events_total{{event="hits"}} {hits + 1}' in metrics
+    assert 'moneymap_cache_entries{backend="lru"}' in metrics
+
+
+def test_delete_invalidates(logged_in_client):
+    logged_in_client.post("/add_budget", data=dict(category="Kino", amount="30", period="monatlich"))
+    assert b"Kino" in logged_in_client.get("/dashboard").data
+    logged_in_client.post("/delete_budget/1")
+    assert b"Kino" not in logged_in_client.get("/dashboard").data
+
+
+@pytest.fixture
+def memcached_store():
+    return {}
+
+
+@pytest.fixture
+def memcached_stub(tmp_path, memcached_store):
+    # Minimaler memcached-Ersatz, der nur get/set über einen Unix-Socket versteht
+    path = str(tmp_path / "cache.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen()
+    store = memcached_store
+
+    def handle(conn):
+        stream = conn.makefile("rwb")
+        for line in stream:
+            parts = line.split()
+            if parts[0] == b"get":
+                if parts[1] in store:
+                    value = store[parts[1]]
+                    stream.write(b"VALUE %s 0 %d\r\n%s\r\n" % (parts[1], len(value), value))
+                stream.write(b"END\r\n")
+            elif parts[0] == b"set":
+                store[parts[1]] = stream.read(int(parts[4]) + 2)[:-2]
+                stream.write(b"STORED\r\n")
+            stream.flush()
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield "unix:" + path
+    server.close()
+
+
+def test_socket_cache_roundtrip(memcached_stub):
+    cache = SocketCache(memcached_stub, "geheim")
+    assert cache.get("dashboard:1") is None
+    cache.set("dashboard:1", {"transactions": [1, 2, 3]})
+    assert cache.get("dashboard:1") == {"transactions": [1, 2, 3]}
+    assert cache.info()["hits"] == 1 and cache.info()["misses"] == 1
+
+
+def test_socket_cache_rejects_unsigned_values(memcached_stub, memcached_store):
+    # Ein anderer Client am Socket legt ein Pickle ohne Signatur ab
+    memcached_store[b"dashboard:1"] = pickle.dumps({"transactions": []})
+    cache = SocketCache(memcached_stub, "geheim")
+    assert cache.get("dashboard:1") is None
+    assert cache.info()["errors"] == 1
+    cache.set("dashboard:1", 1)
+    assert SocketCache(memcached_stub, "anderes").get("dashboard:1") is None
+
+
+@pytest.mark.parametrize("key", ["a b", "x\r\nflush_all", "tab\t", "", "k" * 251])
+def test_socket_cache_rejects_protocol_breaking_keys(memcached_stub, memcached_store, key):
+    cache = SocketCache(memcached_stub, "geheim")
+    with pytest.raises(ValueError):
+        cache.get(key)
+    with pytest.raises(ValueError):
+        cache.set(key, 1)
+    assert memcached_store == {}
+
+
+def test_dashboard_key_ignores_raw_arguments(factory_app, logged_in_client):
+    response = logged_in_client.get("/dashboard?after=x%0d%0aflush_all%0d%0a")
+    assert response.status_code == 302
+    logged_in_client.get("/dashboard?per_page=5%20x")
+    keys = list(factory_app.extensions["cache"]._entries)
+    assert keys and all(" " not in key and "\n" not in key for key in keys)
+    assert keys[-1].endswith(":::50")
+
+
+def test_socket_cache_degrades_to_miss(tmp_path):
+    cache = SocketCache("unix:" + str(tmp_path / "fehlt.sock"), "geheim")
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert cache.info()["errors"] == 2
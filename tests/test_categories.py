@@ -0,0 +1,77 @@
+from datetime import date
+
+from flask import current_app
+
+from app import db
+from app.budgets import user_budget_statuses
+from app.categories import CategoryCache, category_id, category_ids, category_name, find_category_id
+from app.models import Budget, Category, Transaction, User
+from app.money import Money
+
+
+def test_names_are_normalized_and_interned_per_user(factory_app):
+    db.session.add(User(id=2, username="andere", email="andere@example.com", password="x"))
+    ids = category_ids(1, ["Kino", "  Kino ", "Essen  gehen"])
+    assert set(ids) == {"Kino", "Essen gehen"}
+    assert category_id(1, "Kino") == ids["Kino"]
+    assert category_id(2, "Kino") != ids["Kino"]
+    db.session.commit()
+    assert Category.query.count() == 3
+    assert category_name(ids["Essen gehen"]) == "Essen gehen"
+
+
+def test_known_categories_come_from_cache(factory_app, max_queries):
+    kino = category_id(1, "Kino")
+    db.session.commit()
+    with max_queries(0):
+        assert category_id(1, " Kino") == kino
+        assert category_name(kino) == "Kino"
+        assert find_category_id(1, "Kino") == kino
+
+
+def test_cold_cache_loads_vocabulary_once(factory_app, max_queries):
+    ids = category_ids(1, ["Kino", "Miete", "Tanken"])
+    db.session.commit()
+    current_app.extensions["categories"] = CategoryCache()
+    with max_queries(2):
+        assert [category_name(ids[name]) for name in ("Kino", "Miete", "Tanken")] == ["Kino", "Miete", "Tanken"]
+    with max_queries(0):
+        assert find_category_id(1, "Miete") == ids["Miete"]
+    assert find_category_id(1, "Urlaub") is None
+    assert Category.query.count() == 3
+
+
+def test_rolled_back_categories_are_not_cached(factory_app):
+    category_id(1, "Kino")
+    db.session.rollback()
+    assert find_category_id(1, "Kino") is None
+    kino = category_id(1, "Kino")
+    db.session.commit()
+    assert db.session.get(Category, kino).name == "Kino"
+
+
+def test_cache_evicts_least_recently_used_users():
+    cache = CategoryCache(max_users=2)
+    cache.add(1, [("Kino", 1)])
+    cache.add(2, [("Kino", 2)])
+    assert cache.get_id(1, "Kino") == 1
+    cache.add(3, [("Kino", 3)])
+    assert cache.get_id(2, "Kino") is None and cache.get_name(2) is None
+    assert cache.get_id(1, "Kino") == 1 and len(cache) == 2
+
+
+def test_budget_matches_differently_spaced_category(logged_in_client):
+    logged_in_client.post("/add_budget", data=dict(category="Essen gehen", amount="100", period="monatlich"))
+    logged_in_client.post("/add_transaction", data=dict(
+        amount="30", category=" Essen  gehen", transaction_type="expense", frequency="einmalig"))
+    [status] = user_budget_statuses(1, today=date.today())
+    assert status.spent == Money.parse("30")
+    assert Transaction.query.one().category_id == Budget.query.one().category_id
+    assert "<td>Essen gehen</td>".encode() in logged_in_client.get("/dashboard").data
+
+
+def test_empty_category_is_rejected(logged_in_client):
+    response = logged_in_client.post("/add_transaction", data=dict(
+        amount="5", category="   ", transaction_type="expense", frequency="einmalig"), follow_redirects=False)
+    assert response.status_code == 302
+    assert Transaction.query.count() == 0 and Category.query.count() == 0
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+
+from werkzeug.http import http_date
+
+from app import db
+from app.conditional import start_of_today
+from app.models import SavingsGoal, User, UserState, bump_data_version
+from app.money import Money
+
+
+def set_updated_at(value):
+    bump_data_version(1)
+    db.session.execute(db.update(UserState).where(UserState.user_id == 1).values(updated_at=value))
+    db.session.commit()
+
+
+def test_etag_changes_with_every_write(logged_in_client):
+    first = logged_in_client.get("/dashboard")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache" and "Cookie" in first.headers["Vary"]
+    assert logged_in_client.get("/dashboard", headers={"If-None-Match": etag}).status_code == 304
+    # Anderer Query-String, andere Darstellung
+    assert logged_in_client.get("/dashboard?per_page=5").headers["ETag"] != etag
+
+    logged_in_client.post("/add_transaction", data=dict(
+        amount="5", category="Kino", transaction_type="expense", frequency="einmalig"))
+    logged_in_client.get("/dashboard")  # Flash-Nachricht abholen
+    response = logged_in_client.get("/dashboard", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+    assert b"Kino" in response.data
+
+
+def test_pending_flash_is_always_delivered(logged_in_client):
+    goal = SavingsGoal(user_id=1, name="Urlaub", target_amount=Money.parse("100"))
+    db.session.add(goal)
+    db.session.commit()
+    etag = logged_in_client.get("/dashboard").headers["ETag"]
+    # Fehlgeschlagene Einzahlung: keine Änderung, aber eine Meldung
+    logged_in_client.post(f"/savings_goal/{goal.id}/contribute", data=dict(amount="-1"))
+    response = logged_in_client.get("/dashboard", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and "Fehler bei der Einzahlung.".encode() in response.data
+
+
+def test_last_modified(factory_app, logged_in_client):
+    factory_app.extensions["code_stamp"] = ("test", datetime(2024, 1, 1))
+    modified = datetime.utcnow().replace(microsecond=0) - timedelta(seconds=5)
+    set_updated_at(modified + timedelta(microseconds=500))
+    response = logged_in_client.get("/api/transactions")
+    assert response.last_modified.replace(tzinfo=None) == modified
+    not_modified = logged_in_client.get("/api/transactions", headers={
+        "If-Modified-Since": response.headers["Last-Modified"]})
+    assert not_modified.status_code == 304
+    # Ein passender If-Modified-Since zählt nicht, wenn der ETag nicht passt
+    assert logged_in_client.get("/api/transactions", headers={
+        "If-Modified-Since": response.headers["Last-Modified"], "If-None-Match": '"alt"'}).status_code == 200
+
+    # Änderung in der laufenden Sekunde: noch kein Last-Modified, sonst könnte eine zweite Änderung untergehen
+    set_updated_at(datetime.utcnow() + timedelta(seconds=1))
+    assert "Last-Modified" not in logged_in_client.get("/api/transactions").headers
+
+
+def test_last_modified_is_not_older_than_today_or_the_deployment(factory_app, logged_in_client):
+    factory_app.extensions["code_stamp"] = ("test", datetime(2024, 1, 1))
+    # Vorgestern geändert: am Tag danach hätte der Client diesen Zeitpunkt mitgeschickt
+    set_updated_at(datetime.utcnow() - timedelta(days=2))
+    yesterday = http_date(datetime.utcnow() - timedelta(days=1))
+    assert logged_in_client.get("/api/transactions", headers={"If-Modified-Since": yesterday}).status_code == 200
+    response = logged_in_client.get("/api/transactions")
+    assert response.last_modified.replace(tzinfo=None) == start_of_today()
+
+    # Neuer Code nach dem letzten Abruf
+    deployed = datetime.utcnow().replace(microsecond=0) - timedelta(seconds=2)
+    factory_app.extensions["code_stamp"] = ("neu", deployed)
+    response = logged_in_client.get("/api/transactions", headers={"If-Modified-Since": response.headers["Last-Modified"]})
+    assert response.status_code == 200
+    assert response.last_modified.replace(tzinfo=None) == max(deployed, start_of_today())
+
+
+def test_etag_is_per_user(factory_app):
+    db.session.add(User(id=2, username="andere", email="andere@example.com", password="x"))
+    db.session.commit()
+    etags = []
+    for user_id in (1, 2):
+        with factory_app.test_client() as client:
+            with client.session_transaction() as session:
+                session["user_id"] = user_id
+            etags.append(client.get("/api/analytics/categories").headers["ETag"])
+    assert etags[0] != etags[1]
+
+
+def test_deleted_user_is_logged_out(logged_in_client):
+    etag = logged_in_client.get("/dashboard").headers["ETag"]
+    bump_data_version(1)
+    db.session.commit()
+    db.session.execute(db.delete(UserState).where(UserState.user_id == 1))
+    db.session.execute(db.delete(User).where(User.id == 1))
+    db.session.commit()
+
+    # Weder 304 noch ein leeres Dashboard, sondern Abmeldung wie vor den ETags
+    response = logged_in_client.get("/dashboard", headers={"If-None-Match": etag})
+    assert response.status_code == 302 and response.location.endswith("/login")
+    assert "ETag" not in response.headers
+    with logged_in_client.session_transaction() as session:
+        assert "user_id" not in session
@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import text
+
+from app import create_app, db
+from app.engine import engine_options
+from tests.conftest import TestConfig
+
+
+def pragma(name):
+    return db.session.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_sqlite_profile_sets_pragmas(tmp_path):
+    app = create_app(TestConfig, SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'wal.db'}")
+    with app.app_context():
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("busy_timeout") == 5000
+        assert pragma("cache_size") == -64 * 1024
+
+
+def test_none_profile_keeps_defaults(tmp_path):
+    app = create_app(TestConfig, SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'plain.db'}",
+                     DB_PROFILE="none")
+    with app.app_context():
+        assert pragma("journal_mode") == "delete"
+
+
+def test_server_profile_pool_options():
+    config = {key: getattr(TestConfig, key) for key in dir(TestConfig) if key.isupper()}
+    config["SQLALCHEMY_DATABASE_URI"] = "postgresql://moneymap@db/moneymap"
+    options = engine_options(config)
+    assert options["pool_size"] == 10 and options["max_overflow"] == 20
+    assert options["pool_pre_ping"] is True and options["pool_recycle"] == 1800
+
+    config["SQLALCHEMY_ENGINE_OPTIONS"] = {"pool_size": 3}
+    assert engine_options(config)["pool_size"] == 3
+
+    config["DB_PROFILE"] = "turbo"
+    with pytest.raises(ValueError):
+        engine_options(config)
+
+
+@pytest.mark.parametrize("overrides", [
+    {"SQLALCHEMY_DATABASE_URI": "mysql://moneymap@db/moneymap"},
+    {"SHARD_DATABASE_URIS": ["sqlite://", "mssql+pyodbc://moneymap@db/shard1"]},
+])
+def test_unsupported_dialect_fails_at_startup(overrides):
+    with pytest.raises(ValueError, match="nicht unterstützt"):
+        create_app(TestConfig, **overrides)
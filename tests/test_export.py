@@ -0,0 +1,61 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.categories import category_id
+from app.models import Transaction
+from app.money import Money
+
+
+@pytest.fixture
+def transactions(factory_app):
+    db.session.add_all([
+        Transaction(user_id=1, amount=Money.parse("10"), category_id=category_id(1, "Kino"),
+                    transaction_type="expense", frequency="einmalig", date=datetime(2024, 1, 15, 18, 30)),
+        Transaction(user_id=1, amount=Money.parse("2500"), category_id=category_id(1, "Gehalt"),
+                    transaction_type="income", frequency="monatlich", date=datetime(2024, 2, 1)),
+        Transaction(user_id=1, amount=Money.parse("42"), category_id=category_id(1, "Tanken"),
+                    transaction_type="expense", frequency="einmalig", date=datetime(2024, 3, 31, 23, 59)),
+        Transaction(user_id=2, amount=Money.parse("99"), category_id=category_id(2, "Fremd"),
+                    transaction_type="expense", frequency="einmalig", date=datetime(2024, 2, 2)),
+    ])
+    db.session.commit()
+
+
+def test_export_csv_streams_user_rows(logged_in_client, transactions):
+    response = logged_in_client.get("/export_transactions?format=csv")
+    assert response.is_streamed
+    assert response.mimetype == "text/csv"
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [r["category"] for r in rows] == ["Kino", "Gehalt", "Tanken"]
+    assert [(r["amount"], r["currency"]) for r in rows][:2] == [("10.00", "EUR"), ("2500.00", "EUR")]
+
+
+def test_export_ndjson_date_range(logged_in_client, transactions):
+    response = logged_in_client.get("/export_transactions?format=ndjson&start=2024-02-01&end=2024-03-31")
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [r["category"] for r in records] == ["Gehalt", "Tanken"]
+    assert records[1]["date"] == "2024-03-31T23:59:00"
+
+
+def test_export_rejects_bad_parameters(logged_in_client):
+    response = logged_in_client.get("/export_transactions?format=xml", follow_redirects=True)
+    assert "Unbekanntes Exportformat.".encode() in response.data
+    response = logged_in_client.get("/export_transactions?start=gestern", follow_redirects=True)
+    assert "Ungültiger Zeitraum.".encode() in response.data
+
+
+def test_export_cli(factory_app, transactions, tmp_path):
+    target = tmp_path / "export.csv"
+    result = factory_app.test_cli_runner().invoke(
+        args=["export-transactions", "--user", "1", "--end", "2024-01-31", "--output", str(target)]
+    )
+    assert result.exit_code == 0, result.output
+    lines = target.read_text(encoding="utf-8").splitlines()
+    assert lines[0] == "id,date,amount,currency,category,transaction_type,frequency"
+    assert len(lines) == 2 and "Kino" in lines[1]
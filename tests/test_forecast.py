@@ -0,0 +1,87 @@
+import random
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from app import db
+from app.categories import category_id
+from app.forecast import FREQUENCY_CODES, forecast, occurrence_days
+from app.models import RecurringRule, Transaction
+from app.money import Money
+from app.recurring import occurrence_date
+from app.rollups import record_transactions
+
+
+def add_rule(amount, transaction_type, frequency, start, occurrences=1, user_id=1):
+    rule = RecurringRule(
+        user_id=user_id, amount=Money.parse(amount), category_id=category_id(user_id, "Fix"),
+        transaction_type=transaction_type, frequency=frequency, start_date=start, occurrences=occurrences,
+        next_due_at=occurrence_date(start, frequency, occurrences),
+    )
+    db.session.add(rule)
+    db.session.commit()
+    return rule
+
+
+def test_vectorized_dates_match_scheduler():
+    random.seed(7)
+    rules = [
+        (date(2024, 1, 31), "monatlich", 1), (date(2024, 2, 29), "jährlich", 1),
+        *((date(2023, 1, 1) + timedelta(days=random.randrange(700)), random.choice(list(FREQUENCY_CODES)),
+           random.randrange(0, 5)) for _ in range(50)),
+    ]
+    end = date(2027, 3, 15)
+    rule, days = occurrence_days(
+        np.array([r[0] for r in rules], dtype="datetime64[D]"),
+        np.array([FREQUENCY_CODES[r[1]] for r in rules]),
+        np.array([r[2] for r in rules]),
+        end,
+    )
+    expected = []
+    for i, (start, frequency, first) in enumerate(rules):
+        index = first
+        while (day := occurrence_date(start, frequency, index)) <= end:
+            expected.append((i, day))
+            index += 1
+    assert sorted(zip(rule.tolist(), days.astype(object).tolist())) == sorted(expected)
+
+
+def test_forecast_balance(factory_app):
+    salary = Transaction(user_id=1, amount=Money.parse("1000"), category_id=category_id(1, "Gehalt"),
+                         transaction_type="income", date=datetime(2024, 5, 1))
+    db.session.add(salary)
+    record_transactions([salary])
+    db.session.commit()
+    add_rule("2000", "income", "monatlich", datetime(2024, 5, 31))
+    add_rule("100", "expense", "wöchentlich", datetime(2024, 5, 31))
+    # Überfällig seit Mai, zählt am ersten Tag
+    add_rule("50", "expense", "jährlich", datetime(2023, 5, 1))
+
+    data = forecast(1, months=3, today=date(2024, 6, 1))
+    days = {day["date"]: day for day in data["days"]}
+    assert data["start_balance"] == 1000.0
+    assert len(days) == 93 and data["end"] == "2024-09-01"
+    assert days["2024-06-01"]["net"] == -50.0
+    assert days["2024-06-07"]["balance"] == 850.0
+    assert days["2024-06-30"]["net"] == 2000.0
+    # 3 Gehälter, 13 Wochen, eine Jahresgebühr
+    assert data["end_balance"] == 1000.0 + 3 * 2000 - 13 * 100 - 50
+    assert data["lowest"] == {"date": "2024-06-28", "balance": 550.0}
+
+
+def test_forecast_is_memoized_until_data_changes(logged_in_client, max_queries):
+    add_rule("10", "expense", "monatlich", datetime.utcnow())
+    first = logged_in_client.get("/api/analytics/forecast?months=6").get_json()
+    with max_queries(1):  # nur die data_version des Benutzers
+        assert logged_in_client.get("/api/analytics/forecast?months=6").get_json() == first
+
+    logged_in_client.post("/add_transaction", data=dict(
+        amount="500", category="Gehalt", transaction_type="income", frequency="einmalig"))
+    updated = logged_in_client.get("/api/analytics/forecast?months=6").get_json()
+    assert updated["start_balance"] == first["start_balance"] + 500
+
+
+def test_forecast_rejects_invalid_horizon(logged_in_client):
+    assert logged_in_client.get("/api/analytics/forecast?months=2").status_code == 400
+    assert logged_in_client.get("/api/analytics/forecast?months=25").status_code == 400
+    assert logged_in_client.get("/api/analytics/forecast?months=24").status_code == 200
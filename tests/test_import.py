@@ -0,0 +1,135 @@
+import io
+
+from app import db
+from app.categories import find_category_id
+from app.importer import RejectSample, iter_ofx_rows, import_transactions
+from app.jobs import work
+from app.recurring import run_due_rules
+from app.models import RecurringRule, Transaction
+from app.money import Money
+
+CSV_DATA = """date,amount,category,transaction_type
+2024-01-05,"-12,50",Lebensmittel,
+05.01.2024,2500.00,Gehalt,income
+2024-01-06,abc,Kino,expense
+2024-01-07,30,,expense
+2024-01-08,1.234,56,Miete,expense
+"""
+
+OFX_DATA = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240131120000[-5:EST]
+<TRNAMT>-42.10
+<NAME>Tankstelle
+</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT</TRNTYPE><DTPOSTED>20240201</DTPOSTED><TRNAMT>100.00</TRNAMT><MEMO>Erstattung</MEMO></STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+def test_upload_csv(logged_in_client):
+    response = logged_in_client.post(
+        "/import_transactions",
+        data={"file": (io.BytesIO(CSV_DATA.encode()), "auszug.csv")},
+        content_type="multipart/form-data",
+    )
+    # Der Import läuft im Worker, der Request gibt nur den Job zurück
+    assert response.status_code == 202
+    assert Transaction.query.count() == 0
+    assert work("test", burst=True) == 1
+
+    response = logged_in_client.get(response.headers["Location"].replace("/api/jobs/", "/jobs/"))
+    assert "2 Transaktionen importiert.".encode() in response.data
+    assert "3 Zeilen abgelehnt.".encode() in response.data
+
+    rows = Transaction.query.order_by(Transaction.amount_cents.desc()).all()
+    assert [(t.amount, t.category, t.transaction_type) for t in rows] == [
+        (Money(250000), "Gehalt", "income"),
+        (Money(1250), "Lebensmittel", "expense"),
+    ]
+
+
+def test_ofx_rows():
+    rows = list(iter_ofx_rows(io.StringIO(OFX_DATA)))
+    assert rows == [
+        {"date": "20240131120000[-5:EST]", "amount": "-42.10", "category": "Tankstelle"},
+        {"date": "20240201", "amount": "100.00", "category": "Erstattung"},
+    ]
+
+
+def test_amounts_are_exact_cents(factory_app):
+    rows = [
+        {"date": "2024-03-01", "amount": "0.1", "category": "A"},
+        {"date": "2024-03-01", "amount": "0.2", "category": "A"},
+        {"date": "2024-03-01", "amount": "-1.005", "category": "B"},
+        {"date": "2024-03-01", "amount": "5", "category": "C", "currency": "USD"},
+    ]
+    rejects = RejectSample()
+    result = import_transactions(1, iter(rows), reject_writer=rejects)
+    assert result.imported == 3 and result.rejected == 1
+    assert "Währung" in rejects.rows[0]["error"]
+
+    total = sum(t.amount_cents for t in Transaction.query.filter_by(category_id=find_category_id(1, "A")))
+    assert total == 30
+    assert Transaction.query.filter_by(category_id=find_category_id(1, "B")).one().amount == Money(101)
+
+
+def test_oversized_amounts_reject_only_their_row(factory_app):
+    rows = [
+        {"date": "2024-03-01", "amount": "1e30", "category": "A"},
+        {"date": "2024-03-01", "amount": "99999999999999999999", "category": "A"},
+        {"date": "2024-03-01", "amount": "4", "category": "A"},
+    ]
+    rejects = RejectSample()
+    result = import_transactions(1, iter(rows), reject_writer=rejects)
+    assert result.imported == 1 and result.rejected == 2
+    assert all("Betrag" in row["error"] for row in rejects.rows)
+
+
+def test_recurring_rows_are_imported_as_single_bookings(factory_app):
+    # Wie im Export: jede Ausführung des Dauerauftrags steht schon als eigene Zeile da
+    rows = [
+        {"date": "2024-01-01", "amount": "-800", "category": "Miete", "frequency": "monatlich"},
+        {"date": "2024-02-01", "amount": "-800", "category": "Miete", "frequency": "Monatlich"},
+        {"date": "2024-02-01", "amount": "-5", "category": "Kino", "frequency": "täglich"},
+    ]
+    rejects = RejectSample()
+    result = import_transactions(1, iter(rows), reject_writer=rejects)
+    assert result.imported == 2 and result.rejected == 1
+    assert "Wiederholung" in rejects.rows[0]["error"]
+
+    assert {t.frequency for t in Transaction.query} == {"einmalig"}
+    assert RecurringRule.query.count() == 0
+    assert run_due_rules().created == 0
+    assert Transaction.query.count() == 2
+
+
+def test_batches_and_progress(factory_app):
+    rows = ({"date": "2024-03-01", "amount": str(i), "category": "Test"} for i in range(1, 26))
+    seen = []
+    result = import_transactions(1, rows, batch_size=10, on_batch=seen.append)
+
+    assert result.imported == 25
+    assert [s.rows for s in seen] == [10, 10, 5]
+    assert seen[-1].total_rows == 25
+    assert db.session.query(Transaction).count() == 25
+
+
+def test_cli_writes_rejects(factory_app, tmp_path):
+    source = tmp_path / "auszug.csv"
+    source.write_text(CSV_DATA, encoding="utf-8")
+    rejects = tmp_path / "rejects.csv"
+
+    result = factory_app.test_cli_runner().invoke(
+        args=["import-transactions", str(source), "--user", "test@example.com",
+              "--batch-size", "1", "--rejects", str(rejects)]
+    )
+    assert result.exit_code == 0, result.output
+    assert "2 Transaktionen importiert, 3 abgelehnt" in result.output
+    assert result.output.count("Batch ") == 2
+
+    lines = rejects.read_text(encoding="utf-8").splitlines()
+    assert lines[0].startswith("line,error")
+    assert len(lines) == 4
@@ -0,0 +1,146 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import create_app, db
+from app.categories import category_id
+from app.jobs import (HANDLERS, LeaseLost, claim, enqueue, job_handler, progress_reporter, prune_jobs, run_job,
+                      run_worker, spool_path, work)
+from app.models import Job, Transaction, User
+from app.money import Money
+from tests.conftest import TestConfig
+
+
+@pytest.fixture
+def flaky():
+    calls = []
+
+    @job_handler("flaky", max_attempts=2)
+    def run(job, report):
+        calls.append(job.attempts)
+        raise RuntimeError("kaputt")
+
+    yield calls
+    del HANDLERS["flaky"]
+
+
+def test_claim_is_exclusive(factory_app):
+    first = enqueue("rebuild", {"target": "budgets"}).id
+    second = enqueue("rebuild", {"target": "savings"}).id
+    db.session.commit()
+    assert claim("a").id == first
+    assert claim("b").id == second
+    assert claim("c") is None
+    assert {job.locked_by for job in Job.query} == {"a", "b"}
+
+
+def test_expired_lease_is_taken_over(factory_app):
+    enqueue("rebuild", {"target": "budgets"})
+    db.session.commit()
+    stale = claim("alt")
+    later = datetime.utcnow() + timedelta(seconds=factory_app.config["JOB_LEASE_SECONDS"] + 1)
+    assert claim("neu", now=later).attempts == 2
+
+    # Der alte Worker merkt beim nächsten Fortschritt, dass der Job ihm nicht mehr gehört
+    with pytest.raises(LeaseLost):
+        progress_reporter(stale, "alt")(1)
+    run_job(stale, "alt")
+    db.session.expire_all()
+    assert Job.query.one().status == "running" and Job.query.one().locked_by == "neu"
+
+
+def test_failed_job_is_retried_then_given_up(factory_app, flaky):
+    enqueue("flaky")
+    db.session.commit()
+    run_job(claim("w"), "w")
+    job = Job.query.one()
+    assert job.status == "queued" and job.run_after > datetime.utcnow() and "kaputt" in job.error
+    # Backoff: vorher wird der Job nicht wieder geholt
+    assert claim("w") is None
+    run_job(claim("w", now=job.run_after), "w")
+    db.session.expire_all()
+    assert Job.query.one().status == "failed" and flaky == [1, 2]
+
+
+def test_export_runs_in_background(logged_in_client):
+    db.session.add(Transaction(user_id=1, amount=Money.parse("12.5"), category_id=category_id(1, "Kino"),
+                               transaction_type="expense", date=datetime(2024, 1, 2)))
+    db.session.commit()
+    response = logged_in_client.post("/export_transactions", data={"format": "csv"})
+    assert response.status_code == 202
+    status_url = response.headers["Location"]
+    assert logged_in_client.get(status_url).get_json()["status"] == "queued"
+
+    assert work("test", burst=True) == 1
+    job = logged_in_client.get(status_url).get_json()
+    assert job["status"] == "done" and job["attempts"] == 1
+    download = logged_in_client.get(f"/jobs/{job['id']}/download")
+    assert download.status_code == 200
+    assert b"2024-01-02" in download.data and b"12.50" in download.data
+
+
+def test_expired_jobs_are_pruned_with_their_files(factory_app, logged_in_client):
+    status_url = logged_in_client.post("/export_transactions", data={"format": "csv"}).headers["Location"]
+    work("test", burst=True)
+    job = logged_in_client.get(status_url).get_json()
+    path = spool_path(job["result"]["file"])
+    assert os.path.exists(path)
+
+    assert prune_jobs() == 0
+    later = datetime.utcnow() + timedelta(seconds=factory_app.config["JOB_RESULT_TTL"] + 1)
+    assert prune_jobs(now=later) == 1
+    assert not os.path.exists(path)
+    assert logged_in_client.get(f"/jobs/{job['id']}/download").status_code == 404
+
+
+def test_failed_import_removes_upload(factory_app, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("kaputt")
+
+    monkeypatch.setattr("app.importer.import_transactions", broken)
+    path = spool_path("upload-test.csv")
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write("date,amount,category\n")
+    enqueue("import", {"path": path, "format": "csv"}, user_id=1)
+    db.session.commit()
+    work("test", burst=True)
+    assert Job.query.one().status == "failed"
+    assert not os.path.exists(path)
+
+
+def test_jobs_are_private(logged_in_client):
+    db.session.add(User(id=2, username="andere", email="andere@example.com", password="x"))
+    foreign = enqueue("export", {"format": "csv"}, user_id=2).id
+    db.session.commit()
+    assert logged_in_client.get(f"/api/jobs/{foreign}").status_code == 404
+    assert logged_in_client.get(f"/jobs/{foreign}/download").status_code == 404
+    logged_in_client.get("/logout")
+    assert logged_in_client.get(f"/api/jobs/{foreign}").status_code == 401
+
+
+def test_cli_enqueues_and_worker_runs(factory_app):
+    runner = factory_app.test_cli_runner()
+    result = runner.invoke(args=["savings", "rebuild", "--background"])
+    assert result.exit_code == 0 and "Job 1 eingereiht." in result.output
+    result = runner.invoke(args=["worker", "--burst", "--threads", "1"])
+    assert result.exit_code == 0, result.output
+    assert "1 Jobs abgearbeitet." in result.output
+    assert Job.query.one().result == {"target": "savings", "count": 0}
+
+    runner.invoke(args=["savings", "rebuild", "--user", "1", "--background"])
+    assert Job.query.order_by(Job.id.desc()).first().user_id == 1
+
+
+def test_parallel_workers_run_each_job_once(tmp_path):
+    app = create_app(TestConfig, SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'jobs.db'}")
+    with app.app_context():
+        db.create_all()
+        for _ in range(30):
+            enqueue("rebuild", {"target": "search"})
+        db.session.commit()
+
+    assert run_worker(app, threads=4, burst=True, poll_interval=0.01) == 30
+    with app.app_context():
+        assert {(job.status, job.attempts) for job in Job.query} == {("done", 1)}
+        db.engine.dispose()
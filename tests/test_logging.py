@@ -0,0 +1,45 @@
+import io
+import json
+import logging
+
+import pytest
+
+from app import create_app
+from app.log import JsonFormatter, SamplingFilter, stop_listener
+from tests.conftest import TestConfig
+
+
+def make_record(level, msg, *args):
+    return logging.LogRecord("app.test", level, __file__, 1, msg, args, None)
+
+
+def test_json_formatter():
+    entry = json.loads(JsonFormatter().format(make_record(logging.INFO, "Import %s: %d Zeilen", "a.csv", 3)))
+    assert entry["message"] == "Import a.csv: 3 Zeilen"
+    assert entry["level"] == "INFO" and entry["logger"] == "app.test"
+
+
+def test_sampling_keeps_warnings():
+    sampler = SamplingFilter(0.0)
+    assert not sampler.filter(make_record(logging.DEBUG, "x"))
+    assert sampler.filter(make_record(logging.WARNING, "x"))
+
+
+def test_queue_logging_writes_in_background(monkeypatch):
+    stream = io.StringIO()
+    monkeypatch.setattr("sys.stderr", stream)
+    create_app(TestConfig, LOG_LEVEL="DEBUG", LOG_FORMAT="json")
+    create_app(TestConfig, LOG_LEVEL="DEBUG", LOG_FORMAT="json")
+
+    root = logging.getLogger()
+    assert sum(getattr(h, "moneymap", False) for h in root.handlers) == 1
+    logging.getLogger("app.test").debug("Hallo %s", "Welt")
+    stop_listener()  # leert die Queue
+    assert json.loads(stream.getvalue().splitlines()[-1])["message"] == "Hallo Welt"
+
+
+def test_invalid_settings():
+    with pytest.raises(ValueError):
+        create_app(TestConfig, LOG_LEVEL="LAUT")
+    with pytest.raises(ValueError):
+        create_app(TestConfig, LOG_FORMAT="xml")
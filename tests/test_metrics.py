@@ -0,0 +1,36 @@
+import logging
+
+from app.metrics import Histogram
+
+
+def test_histogram_render():
+    histogram = Histogram("x_seconds", "Test", (0.1, 1.0), ("endpoint",))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "a")
+    lines = histogram.render()
+    assert 'x_seconds_bucket{endpoint="a",le="0.1"} 2' in lines
+    assert 'x_seconds_bucket{endpoint="a",le="1.0"} 3' in lines
+    assert 'x_seconds_bucket{endpoint="a",le="+Inf"} 4' in lines
+    assert 'x_seconds_count{endpoint="a"} 4' in lines
+
+
+def test_metrics_records_requests_and_queries(logged_in_client):
+    logged_in_client.get("/api/transactions")
+    text = logged_in_client.get("/metrics").get_data(as_text=True)
+
+    assert 'moneymap_request_duration_seconds_count{endpoint="main.api_transactions",method="GET",status="200"} 1' in text
+    # Die API braucht mindestens eine Abfrage, also ist der Bucket für 0 leer
+    assert 'moneymap_request_queries_bucket{endpoint="main.api_transactions",le="0"} 0' in text
+    assert 'moneymap_request_db_seconds_count{endpoint="main.api_transactions"} 1' in text
+    assert 'moneymap_cache_events_total{event="misses"}' in text
+
+
+def test_slow_logs(factory_app, logged_in_client, caplog):
+    metrics = factory_app.extensions["metrics"]
+    metrics.slow_request = metrics.slow_query = 0
+    with caplog.at_level(logging.WARNING, logger="app.metrics"):
+        logged_in_client.get("/api/transactions")
+    messages = [r.getMessage() for r in caplog.records]
+    assert any(m.startswith("Langsamer Request GET /api/transactions") for m in messages)
+    assert any(m.startswith("Langsame Abfrage") for m in messages)
+    assert metrics.slow_requests >= 1 and metrics.slow_queries >= 1
@@ -0,0 +1,54 @@
+import pickle
+
+import pytest
+
+from app.money import Money, format_cents, parse_cents
+
+
+def test_parse_cents():
+    assert parse_cents("12,34") == 1234
+    assert parse_cents("-1.234,56") == -123456
+    assert parse_cents("0.1") == 10
+    assert parse_cents("1.005") == 101
+    assert parse_cents("2.675") == 268
+    assert parse_cents(" 7 € ") == 700
+    with pytest.raises(ValueError):
+        parse_cents("abc")
+    with pytest.raises(ValueError):
+        parse_cents("NaN")
+
+
+@pytest.mark.parametrize("value", ["1e30", "100000000000000000", "-92233720368547758.09"])
+def test_parse_cents_rejects_amounts_beyond_int64(value):
+    with pytest.raises(ValueError):
+        parse_cents(value)
+
+
+def test_parse_cents_accepts_int64_bounds():
+    assert parse_cents("92233720368547758.07") == 2 ** 63 - 1
+    assert parse_cents("-92233720368547758.08") == -2 ** 63
+
+
+def test_format_cents():
+    assert format_cents(5) == "0.05"
+    assert format_cents(-123456) == "-1234.56"
+
+
+def test_arithmetic_is_exact():
+    total = Money(0)
+    for _ in range(10):
+        total += Money.parse("0.10")
+    assert total == Money.parse("1.00")
+    assert str(Money.parse("0.1") + Money.parse("0.2")) == "0.30"
+    assert -Money(250) < Money(0)
+    assert abs(Money(-250)) == Money(250)
+
+
+def test_currency_mismatch_and_immutability():
+    with pytest.raises(ValueError):
+        Money(100, "EUR") + Money(100, "USD")
+    with pytest.raises(TypeError):
+        Money(100) + 1.0
+    with pytest.raises(AttributeError):
+        Money(100).cents = 5
+    assert pickle.loads(pickle.dumps(Money(99, "USD"))) == Money(99, "USD")
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.categories import category_id
+from app.models import Transaction, bump_data_version
+from app.money import Money
+
+
+def seed_transactions(count, user_id=1):
+    start = datetime(2024, 1, 1)
+    db.session.add_all(
+        Transaction(
+            user_id=user_id,
+            amount=Money(i * 100),
+            category_id=category_id(user_id, "Test"),
+            transaction_type="expense",
+            # Je zwei Transaktionen teilen sich ein Datum, damit die id als Tiebreaker zählt
+            date=start + timedelta(days=i // 2),
+        )
+        for i in range(count)
+    )
+    bump_data_version(user_id)
+    db.session.commit()
+
+
+def collect_pages(client, per_page):
+    seen = []
+    data = client.get(f"/api/transactions?per_page={per_page}").get_json()
+    seen.extend(data["transactions"])
+    assert data["prev_cursor"] is None
+    while data["next_cursor"]:
+        data = client.get(
+            f"/api/transactions?per_page={per_page}&after={data['next_cursor']}"
+        ).get_json()
+        seen.extend(data["transactions"])
+    return seen, data
+
+
+def test_api_requires_login(factory_client):
+    assert factory_client.get("/api/transactions").status_code == 401
+
+
+def test_keyset_pages_cover_all_rows_in_order(logged_in_client):
+    seed_transactions(23)
+    seen, _ = collect_pages(logged_in_client, 5)
+
+    assert len(seen) == 23
+    assert len({t["id"] for t in seen}) == 23
+    keys = [(t["date"], t["id"]) for t in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_previous_cursor_returns_previous_page(logged_in_client):
+    seed_transactions(12)
+    first = logged_in_client.get("/api/transactions?per_page=4").get_json()
+    second = logged_in_client.get(
+        f"/api/transactions?per_page=4&after={first['next_cursor']}"
+    ).get_json()
+    back = logged_in_client.get(
+        f"/api/transactions?per_page=4&before={second['prev_cursor']}"
+    ).get_json()
+
+    assert [t["id"] for t in back["transactions"]] == [t["id"] for t in first["transactions"]]
+    assert back["prev_cursor"] is None
+
+
+def test_invalid_cursor(logged_in_client):
+    response = logged_in_client.get("/api/transactions?after=kaputt")
+    assert response.status_code == 400
+
+    response = logged_in_client.get("/dashboard?after=kaputt", follow_redirects=True)
+    assert "Ungültige Seite.".encode() in response.data
+
+
+def test_dashboard_renders_single_page(factory_app, logged_in_client):
+    factory_app.config["TRANSACTIONS_PER_PAGE"] = 10
+    seed_transactions(25)
+    response = logged_in_client.get("/dashboard")
+
+    assert response.data.count(b"delete_transaction/") == 10
+    assert "Ältere".encode() in response.data
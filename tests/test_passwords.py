@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+from app import db
+from app.models import User
+from app.passwords import HasherBusy, PasswordHasher, hash_method, policy_method
+
+
+def test_policy_method():
+    assert PasswordHasher("pbkdf2:sha256", 1000).method == "pbkdf2:sha256:1000"
+    assert PasswordHasher("pbkdf2", 2000).method == "pbkdf2:sha256:2000"
+    assert PasswordHasher("scrypt", 1000).method == "scrypt:32768:8:1"
+    assert PasswordHasher("pbkdf2:sha512").method == f"pbkdf2:sha512:{DEFAULT_PBKDF2_ITERATIONS}"
+    assert PasswordHasher("pbkdf2:sha256", None).method == f"pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}"
+
+
+@pytest.mark.parametrize("method", ["scrypt", "pbkdf2:sha256"])
+def test_policy_matches_stored_hash(method):
+    hasher = PasswordHasher(method)
+    assert hash_method(generate_password_hash("geheim", method)) == hasher.method
+    assert not hasher.needs_rehash(generate_password_hash("geheim", method))
+
+
+def test_hash_and_verify():
+    hasher = PasswordHasher("pbkdf2:sha256", 1000, workers=1)
+    stored = hasher.hash("geheim")
+    assert hash_method(stored) == "pbkdf2:sha256:1000"
+    assert hasher.verify(stored, "geheim")
+    assert not hasher.verify(stored, "falsch")
+    assert not hasher.needs_rehash(stored)
+    assert hasher.needs_rehash(generate_password_hash("geheim", "pbkdf2:sha256:2000"))
+
+
+def test_rejects_when_queue_is_full():
+    hasher = PasswordHasher("pbkdf2:sha256", 1000, workers=1, queue_size=0, timeout=0.01)
+    started, release = threading.Event(), threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait(5)
+
+    worker = threading.Thread(target=hasher._run, args=(blocking,))
+    worker.start()
+    started.wait(5)
+    try:
+        with pytest.raises(HasherBusy):
+            hasher.hash("geheim")
+    finally:
+        release.set()
+        worker.join()
+    # Nach dem Ende ist der Platz wieder frei
+    assert hasher.verify(hasher.hash("geheim"), "geheim")
+
+
+def test_login_rehashes_on_policy_change(factory_app, factory_client):
+    factory_app.extensions["password_hasher"].method = "pbkdf2:sha256:1500"
+    factory_client.post("/login", data=dict(email="test@example.com", password="password123"))
+
+    stored = db.session.get(User, 1).password
+    assert hash_method(stored) == "pbkdf2:sha256:1500"
+    assert check_password_hash(stored, "password123")
+
+
+def test_second_login_does_not_rehash(factory_app, factory_client):
+    factory_app.extensions["password_hasher"].method = policy_method("scrypt")
+    factory_client.post("/login", data=dict(email="test@example.com", password="password123"))
+    db.session.expire_all()
+    first = db.session.get(User, 1).password
+    assert hash_method(first) == "scrypt:32768:8:1"
+
+    factory_client.get("/logout")
+    factory_client.post("/login", data=dict(email="test@example.com", password="password123"))
+    db.session.expire_all()
+    assert db.session.get(User, 1).password == first
+
+
+def test_wrong_password_keeps_hash(factory_app, factory_client):
+    before = db.session.get(User, 1).password
+    factory_app.extensions["password_hasher"].method = "pbkdf2:sha256:1500"
+    response = factory_client.post("/login", data=dict(email="test@example.com", password="nein"),
+                                    follow_redirects=True)
+    assert "Falsches Passwort.".encode() in response.data
+    db.session.expire_all()
+    assert db.session.get(User, 1).password == before
+
+
+def test_login_returns_503_when_busy(factory_app, factory_client, monkeypatch):
+    def busy(*args):
+        raise HasherBusy()
+
+    monkeypatch.setattr(factory_app.extensions["password_hasher"], "verify", busy)
+    response = factory_client.post("/login", data=dict(email="test@example.com", password="password123"))
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,138 @@
+# Obergrenzen für SQL-Statements pro Route. Jede Route läuft gegen einen kleinen
+# und einen großen Datenbestand; steigt die Zahl mit den Zeilen (N+1), schlägt
+# die Grenze beim großen Bestand an.
+import io
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.categories import category_id
+from app.jobs import claim, run_job
+from app.models import Budget, SavingsGoal, Transaction, bump_data_version
+from app.money import Money
+from app.rollups import record_transactions
+
+IMPORT_CSV = b"date,amount,category\n2024-01-01,-5,A\n2024-01-02,-6,B\n"
+
+
+@pytest.fixture(params=[5, 300], ids=["klein", "gross"])
+def seeded(request, factory_app):
+    rows = request.param
+    transactions = [
+        Transaction(user_id=1, amount=Money(100 + i), category_id=category_id(1, f"Kategorie {i % 7}"),
+                    transaction_type="expense", frequency="einmalig", date=datetime(2024, 1, 1) + timedelta(days=i))
+        for i in range(rows)
+    ]
+    db.session.add_all(transactions)
+    db.session.flush()
+    record_transactions(transactions)
+    db.session.add_all(Budget(user_id=1, category_id=category_id(1, f"Kategorie {i}"), amount=Money(10000),
+                              period="monatlich")
+                       for i in range(rows // 20 + 1))
+    db.session.add_all(SavingsGoal(user_id=1, name=f"Ziel {i}", target_amount=Money(50000))
+                       for i in range(rows // 50 + 1))
+    bump_data_version(1)
+    db.session.commit()
+    return {
+        "transaction": transactions[0].id,
+        "budget": Budget.query.first().id,
+        "goal": SavingsGoal.query.first().id,
+    }
+
+
+def request_within(client, max_queries, limit, method, url, **kwargs):
+    with max_queries(limit, f"{method.upper()} {url}"):
+        response = getattr(client, method)(url, **kwargs)
+        response.get_data()  # gestreamte Antworten vollständig lesen
+    assert response.status_code < 400, response.status_code
+    return response
+
+
+def test_public_routes(factory_client, max_queries, seeded):
+    request_within(factory_client, max_queries, 0, "get", "/")
+    request_within(factory_client, max_queries, 0, "get", "/login")
+    request_within(factory_client, max_queries, 0, "get", "/register")
+    request_within(factory_client, max_queries, 1, "post", "/login",
+                   data=dict(email="test@example.com", password="password123"))
+    request_within(factory_client, max_queries, 0, "get", "/logout")
+    request_within(factory_client, max_queries, 3, "post", "/register",
+                   data=dict(username="neu", email="neu@example.com", password="geheim"))
+
+
+def test_read_routes(logged_in_client, max_queries, seeded):
+    # Benutzer, Transaktionsseite, Budgets samt Rollups, Sparziele
+    request_within(logged_in_client, max_queries, 4, "get", "/dashboard?per_page=500")
+    bump_data_version(1)
+    db.session.commit()
+    request_within(logged_in_client, max_queries, 4, "get", "/dashboard")
+    # Aus dem Cache nur noch der Benutzer
+    request_within(logged_in_client, max_queries, 1, "get", "/dashboard")
+    # Listen und Auswertungen: der Benutzer (für den ETag) und die eigentliche Abfrage
+    request_within(logged_in_client, max_queries, 2, "get", "/api/transactions?per_page=500")
+    # Suche: Kategorie-Vokabular, FTS und Transaktionen in einer Abfrage
+    request_within(logged_in_client, max_queries, 2, "get",
+                   "/api/transactions?q=ki&start=2020-01-01&end=2030-12-31&min=1&type=expense")
+    request_within(logged_in_client, max_queries, 2, "get", "/transactions?q=ki&max=1000")
+    # Export: data_version für den Kategorien-Cache und die Transaktionen
+    request_within(logged_in_client, max_queries, 2, "get", "/export_transactions?format=csv")
+    request_within(logged_in_client, max_queries, 2, "get", "/export_transactions?format=ndjson")
+    for url in ("/api/analytics/cash-flow", "/api/analytics/categories",
+                "/api/analytics/year-over-year?year=2024"):
+        request_within(logged_in_client, max_queries, 2, "get", url)
+    # Das Transaktionsformular bietet die Sparziele zur Auswahl an
+    request_within(logged_in_client, max_queries, 1, "get", "/add_transaction")
+    for url in ("/add_budget", "/add_savings_goal", "/import_transactions"):
+        request_within(logged_in_client, max_queries, 0, "get", url)
+
+
+def test_not_modified_costs_one_lookup(logged_in_client, max_queries, seeded):
+    for url in ("/dashboard", "/transactions", "/api/transactions?per_page=500", "/api/analytics/cash-flow"):
+        etag = logged_in_client.get(url).headers["ETag"]
+        with max_queries(1, f"GET {url} (304)"):
+            response = logged_in_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+
+def test_write_routes(logged_in_client, max_queries, seeded):
+    transaction = dict(amount="12.34", category="Kino", transaction_type="expense", frequency="einmalig")
+    # data_version (prüft den Kategorien-Cache), INSERT, Rollups, Monatssumme, Kategorie-Zähler, data_version
+    request_within(logged_in_client, max_queries, 6, "post", "/add_transaction",
+                   data={**transaction, "category": "Kategorie 1"})
+    # Eine neue Kategorie kostet einmalig Upsert und ID-Abfrage, danach kommt die ID aus dem Cache
+    request_within(logged_in_client, max_queries, 8, "post", "/add_transaction", data=transaction)
+    request_within(logged_in_client, max_queries, 8, "post", "/add_transaction",
+                   data={**transaction, "frequency": "monatlich"})
+    # Löschen: Transaktion laden, Rollups, Monatssummen, Kategorien, Einzahlungen, DELETE, data_version
+    request_within(logged_in_client, max_queries, 7, "post", f"/delete_transaction/{seeded['transaction']}")
+    request_within(logged_in_client, max_queries, 3, "post", "/add_budget",
+                   data=dict(category="Kino", amount="30", period="monatlich"))
+    request_within(logged_in_client, max_queries, 3, "post", f"/delete_budget/{seeded['budget']}")
+    request_within(logged_in_client, max_queries, 2, "post", "/add_savings_goal",
+                   data=dict(name="Urlaub", target_amount="1500"))
+    # Einzahlung: Ziel laden, Ledger-Eintrag, Stand fortschreiben, data_version
+    request_within(logged_in_client, max_queries, 4, "post", f"/savings_goal/{seeded['goal']}/contribute",
+                   data=dict(amount="25"))
+    request_within(logged_in_client, max_queries, 9, "post", "/add_transaction",
+                   data={**transaction, "savings_goal_id": seeded["goal"]})
+    request_within(logged_in_client, max_queries, 4, "post", f"/delete_savings_goal/{seeded['goal']}")
+    # Nur der Job wird angelegt, den Import übernimmt der Worker (siehe test_import_job_within_budget)
+    request_within(logged_in_client, max_queries, 1, "post", "/import_transactions",
+                   data={"file": (io.BytesIO(IMPORT_CSV), "auszug.csv")}, content_type="multipart/form-data")
+
+
+def test_detects_too_many_queries(factory_app, max_queries):
+    with pytest.raises(AssertionError, match="2 statt höchstens 1"):
+        with max_queries(1):
+            Transaction.query.all()
+            Budget.query.all()
+
+
+def test_import_job_within_budget(logged_in_client, max_queries, seeded):
+    logged_in_client.post("/import_transactions", data={"file": (io.BytesIO(IMPORT_CSV), "auszug.csv")},
+                          content_type="multipart/form-data")
+    # Übernahme (Abgelaufene aufräumen, UPDATE ... RETURNING), data_version für den Kategorien-Cache,
+    # ein Batch wie beim direkten Import (7), Fortschritt, Abschluss
+    with max_queries(12, "Import-Job"):
+        run_job(claim("test"), "test")
+    assert Transaction.query.filter_by(category_id=category_id(1, "B")).count() == 1
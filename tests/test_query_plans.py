@@ -0,0 +1,56 @@
+import pytest
+
+from app import db
+from app.categories import category_id
+from app.models import Transaction, Budget, SavingsGoal, bump_data_version
+from app.money import Money
+from tests.query_plan import capture_queries, assert_no_full_scans, full_table_scans
+
+
+@pytest.fixture
+def seeded(factory_app):
+    transaction = Transaction(user_id=1, amount=Money.parse("10"), category_id=category_id(1, "Miete"), transaction_type="expense")
+    older = Transaction(user_id=1, amount=Money.parse("5"), category_id=category_id(1, "Kino"), transaction_type="expense")
+    budget = Budget(user_id=1, category_id=category_id(1, "Miete"), amount=Money.parse("800"), period="monatlich")
+    goal = SavingsGoal(user_id=1, name="Urlaub", target_amount=Money.parse("1500"))
+    db.session.add_all([transaction, older, budget, goal])
+    bump_data_version(1)
+    db.session.commit()
+    return {"transaction": transaction.id, "budget": budget.id, "goal": goal.id}
+
+
+def run_checked(client, method, url, **kwargs):
+    with capture_queries(db.engine) as statements:
+        getattr(client, method)(url, **kwargs)
+    assert any(s.lstrip().upper().startswith("SELECT") for s, _ in statements)
+    assert_no_full_scans(db.engine, statements)
+
+
+def test_detects_full_scan(factory_app):
+    with capture_queries(db.engine) as statements:
+        Transaction.query.filter_by(amount_cents=100).all()
+    assert full_table_scans(db.engine, statements)
+
+
+def test_auth_routes_use_indexes(factory_client):
+    run_checked(factory_client, "post", "/login", data=dict(email="test@example.com", password="password123"))
+    run_checked(
+        factory_client,
+        "post",
+        "/register",
+        data=dict(username="neu", email="neu@example.com", password="geheim"),
+    )
+
+
+def test_read_routes_use_indexes(logged_in_client, seeded):
+    run_checked(logged_in_client, "get", "/dashboard")
+    run_checked(logged_in_client, "get", "/api/transactions?per_page=1")
+    page = logged_in_client.get("/api/transactions?per_page=1").get_json()
+    run_checked(logged_in_client, "get", f"/api/transactions?per_page=1&after={page['next_cursor']}")
+    run_checked(logged_in_client, "get", f"/api/transactions?per_page=1&before={page['next_cursor']}")
+
+
+def test_delete_routes_use_indexes(logged_in_client, seeded):
+    run_checked(logged_in_client, "post", f"/delete_transaction/{seeded['transaction']}")
+    run_checked(logged_in_client, "post", f"/delete_budget/{seeded['budget']}")
+    run_checked(logged_in_client, "post", f"/delete_savings_goal/{seeded['goal']}")
@@ -0,0 +1,96 @@
+from datetime import datetime
+
+from app import db
+from app.categories import category_id, find_category_id
+from app.models import RecurringRule, Transaction
+from app.money import Money
+from app.recurring import run_due_rules, create_rule_for, occurrence_date
+
+
+def add_recurring(amount=Money.parse("800"), frequency="monatlich", date=datetime(2024, 1, 31)):
+    transaction = Transaction(user_id=1, amount=amount, category_id=category_id(1, "Miete"), transaction_type="expense",
+                              frequency=frequency, date=date)
+    db.session.add(transaction)
+    rule = create_rule_for(transaction)
+    db.session.commit()
+    return rule
+
+
+def test_add_transaction_creates_rule(logged_in_client):
+    logged_in_client.post("/add_transaction", data=dict(
+        amount="9.99", category="Streaming", transaction_type="expense", frequency="monatlich"))
+    logged_in_client.post("/add_transaction", data=dict(
+        amount="5", category="Kino", transaction_type="expense", frequency="einmalig"))
+
+    rule = RecurringRule.query.one()
+    source = Transaction.query.filter_by(category_id=find_category_id(1, "Streaming")).one()
+    assert source.recurring_rule_id == rule.id
+    assert rule.next_due_at == occurrence_date(source.date, "monatlich", 1)
+
+
+def test_deleting_the_source_transaction_stops_the_rule(logged_in_client):
+    logged_in_client.post("/add_transaction", data=dict(
+        amount="9.99", category="Streaming", transaction_type="expense", frequency="monatlich"))
+    rule = RecurringRule.query.one()
+    run_due_rules(now=occurrence_date(rule.start_date, "monatlich", 1))
+    occurrence = Transaction.query.filter(Transaction.date > rule.start_date).one()
+
+    # Eine spätere Ausführung zu löschen beendet nichts
+    logged_in_client.post(f"/delete_transaction/{occurrence.id}")
+    assert db.session.get(RecurringRule, rule.id).active
+
+    source = Transaction.query.filter_by(recurring_rule_id=rule.id).one()
+    logged_in_client.post(f"/delete_transaction/{source.id}")
+    assert not db.session.get(RecurringRule, rule.id).active
+    assert run_due_rules(now=occurrence_date(rule.start_date, "monatlich", 6)).created == 0
+
+
+def test_catch_up_keeps_day_of_month(factory_app):
+    rule = add_recurring()
+    result = run_due_rules(now=datetime(2024, 5, 15))
+
+    assert result.created == 3
+    dates = [t.date for t in Transaction.query.filter_by(recurring_rule_id=rule.id).order_by(Transaction.date)]
+    assert dates == [datetime(2024, 1, 31), datetime(2024, 2, 29), datetime(2024, 3, 31), datetime(2024, 4, 30)]
+    db.session.refresh(rule)
+    assert rule.occurrences == 4
+    assert rule.next_due_at == datetime(2024, 5, 31)
+
+
+def test_runs_are_idempotent(factory_app):
+    add_recurring(frequency="wöchentlich", date=datetime(2024, 1, 1))
+    first = run_due_rules(now=datetime(2024, 1, 29))
+    second = run_due_rules(now=datetime(2024, 1, 29))
+
+    assert first.created == 4
+    assert second.created == 0 and second.rules == 0
+    assert Transaction.query.count() == 5
+
+
+def test_duplicate_occurrences_are_skipped(factory_app):
+    rule = add_recurring(frequency="jährlich", date=datetime(2022, 6, 1))
+    # Simuliert einen zweiten Worker, der dieselbe Ausführung schon gebucht hat
+    db.session.add(Transaction(user_id=1, amount=Money.parse("800"), category_id=category_id(1, "Miete"),
+                               transaction_type="expense", frequency="jährlich", date=datetime(2023, 6, 1), recurring_rule_id=rule.id))
+    db.session.commit()
+
+    result = run_due_rules(now=datetime(2024, 7, 1))
+    assert result.created == 1
+    assert Transaction.query.filter_by(recurring_rule_id=rule.id).count() == 3
+
+
+def test_chunks_and_shards(factory_app):
+    for _ in range(5):
+        add_recurring(frequency="wöchentlich", date=datetime(2024, 1, 1))
+    result = run_due_rules(now=datetime(2024, 1, 10), chunk_size=2, shard=1, shards=2)
+    assert result.rules == 5 and result.chunks == 3
+
+    result = run_due_rules(now=datetime(2024, 1, 10), chunk_size=2, shard=0, shards=2)
+    assert result.rules == 0
+
+
+def test_cli(factory_app):
+    add_recurring(date=datetime.utcnow())
+    result = factory_app.test_cli_runner().invoke(args=["recurring", "run"])
+    assert result.exit_code == 0, result.output
+    assert "Shard 0: 0 Daueraufträge" in result.output
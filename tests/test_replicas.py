@@ -0,0 +1,121 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from app import create_app, db
+from app.categories import category_id
+from app.models import Transaction, User, bump_data_version
+from app.money import Money
+from app.replicas import sync_sqlite_replicas
+from tests.conftest import TestConfig
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    app = create_app(
+        TestConfig, SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'primary.db'}",
+        DATABASE_REPLICAS={"main": [f"sqlite:///{tmp_path / 'replica.db'}"]},
+    )
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, username="u1", email="u1@example.com", password="x"))
+        db.session.commit()
+        sync_sqlite_replicas()
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(replica_app):
+    with replica_app.test_client() as client:
+        with client.session_transaction() as session:
+            session["user_id"] = 1
+        yield client
+
+
+def add_elsewhere(amount):
+    # Schreibt wie ein anderer Prozess, ohne den Cookie des Clients zu berühren
+    db.session.add(Transaction(user_id=1, amount=Money.parse(amount), category_id=category_id(1, "Kino"),
+                               transaction_type="expense", date=datetime(2024, 1, 2)))
+    bump_data_version(1)
+    db.session.commit()
+
+
+def amounts(client):
+    return [row["amount"] for row in client.get("/api/transactions").get_json()["transactions"]]
+
+
+def test_read_only_routes_read_from_replica(replica_app, client):
+    add_elsewhere("5")
+    # Das Replikat hinkt hinterher, bis es kopiert wird
+    assert amounts(client) == []
+    sync_sqlite_replicas()
+    assert amounts(client) == ["5.00"]
+
+    stats = replica_app.extensions["replicas"].stats
+    assert stats.replica >= 2 and stats.offload_ratio() > 0.5
+    metrics = client.get("/metrics").get_data(as_text=True)
+    assert 'moneymap_db_reads_total{target="replica"}' in metrics
+    assert "moneymap_db_read_offload_ratio" in metrics
+
+
+def test_own_writes_stick_to_primary(replica_app, client):
+    client.post("/add_transaction", data=dict(
+        amount="7", category="Kino", transaction_type="expense", frequency="einmalig"))
+    client.get("/dashboard")  # Flash-Nachricht abholen
+    # Noch nicht im Replikat, der Benutzer sieht seine Buchung trotzdem
+    assert amounts(client) == ["7.00"]
+
+    with client.session_transaction() as session:
+        assert session["primary_until"] > time.time()
+        session["primary_until"] = time.time() - 1
+    assert amounts(client) == []
+
+
+def test_writes_and_later_reads_go_to_primary(replica_app, client):
+    reads = replica_app.extensions["replicas"].stats
+    before = reads.replica
+    # POST ist nie read_only, auch auf einer Route, die GET vom Replikat liest
+    assert client.post("/export_transactions", data={"format": "csv"}).status_code == 202
+    assert reads.replica == before
+
+
+def test_cli_sync(replica_app):
+    add_elsewhere("9")
+    result = replica_app.test_cli_runner().invoke(args=["replicas", "sync"])
+    assert result.output == "1 Replikate aktualisiert.\n"
+    with db.engines["main-replica0"].connect() as conn:
+        assert conn.execute(db.select(db.func.count()).select_from(Transaction)).scalar() == 1
+
+
+def test_shards_have_their_own_replicas(tmp_path):
+    app = create_app(
+        TestConfig, SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'main.db'}",
+        SHARD_DATABASE_URIS=[f"sqlite:///{tmp_path / 'shard0.db'}"],
+        DATABASE_REPLICAS={"main": [], "shard0": [f"sqlite:///{tmp_path / 'shard0-replica.db'}"]},
+    )
+    with app.app_context():
+        from app.sharding import init_shard_schema, use_shard
+
+        db.create_all()
+        init_shard_schema()
+        db.session.add(User(id=1, username="u1", email="u1@example.com", password="x"))
+        db.session.commit()
+        use_shard(1)
+        add_elsewhere("3")
+        sync_sqlite_replicas()
+        with app.test_client() as client:
+            with client.session_transaction() as session:
+                session["user_id"] = 1
+            assert amounts(client) == ["3.00"]
+        assert app.extensions["replicas"].names == {"shard0": ["shard0-replica0"]}
+        assert app.extensions["replicas"].stats.replica >= 1
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+    with pytest.raises(ValueError):
+        create_app(TestConfig, DATABASE_REPLICAS={"shard7": ["sqlite://"]})
@@ -0,0 +1,118 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import SavingsContribution, SavingsGoal, Transaction, User
+from app.money import Money
+from app.savings import ContributionError, contribute, projected_completion, rebuild_savings
+
+
+@pytest.fixture
+def goal(factory_app):
+    goal = SavingsGoal(user_id=1, name="Urlaub", target_amount=Money.parse("1000"))
+    db.session.add(goal)
+    db.session.commit()
+    return goal
+
+
+def reload(goal):
+    db.session.expire_all()
+    return db.session.get(SavingsGoal, goal.id)
+
+
+def test_contribution_updates_goal_in_same_transaction(logged_in_client, goal):
+    logged_in_client.post(f"/savings_goal/{goal.id}/contribute", data=dict(amount="120,50"))
+    logged_in_client.post(f"/savings_goal/{goal.id}/contribute", data=dict(amount="79.50"))
+    goal = reload(goal)
+    assert goal.current_amount == Money.parse("200")
+    assert goal.first_contribution_at is not None
+    assert [c.amount for c in SavingsContribution.query.order_by(SavingsContribution.id)] == [
+        Money.parse("120.50"), Money.parse("79.50"),
+    ]
+    assert "20 %".encode() in logged_in_client.get("/dashboard").data
+
+
+def test_failed_contribution_changes_nothing(goal):
+    with pytest.raises(ContributionError):
+        contribute(goal, Money.parse("10", "USD"))
+    with pytest.raises(ContributionError):
+        contribute(goal, Money.parse("-5"))
+    db.session.rollback()
+    assert reload(goal).current_cents == 0
+    assert SavingsContribution.query.count() == 0
+
+
+def test_tagged_transaction_counts_until_deleted(logged_in_client, goal):
+    logged_in_client.post("/add_transaction", data=dict(
+        amount="250", category="Sparen", transaction_type="expense", frequency="einmalig", savings_goal_id=goal.id))
+    transaction = Transaction.query.one()
+    assert SavingsContribution.query.one().transaction_id == transaction.id
+    assert reload(goal).current_amount == Money.parse("250")
+
+    logged_in_client.post(f"/delete_transaction/{transaction.id}")
+    assert reload(goal).current_cents == 0
+    assert SavingsContribution.query.count() == 0
+
+
+def test_foreign_goal_is_rejected(logged_in_client, factory_app):
+    db.session.add(User(id=2, username="andere", email="andere@example.com", password="x"))
+    other = SavingsGoal(user_id=2, name="Fremd", target_amount=Money.parse("100"))
+    db.session.add(other)
+    db.session.commit()
+    logged_in_client.post(f"/savings_goal/{other.id}/contribute", data=dict(amount="10"))
+    logged_in_client.post("/add_transaction", data=dict(
+        amount="10", category="Sparen", transaction_type="expense", frequency="einmalig", savings_goal_id=other.id))
+    assert SavingsContribution.query.count() == 0 and Transaction.query.count() == 0
+
+
+def test_failed_goal_creation_is_rolled_back(logged_in_client, monkeypatch):
+    def broken(*user_ids):
+        raise RuntimeError("kaputt")
+
+    monkeypatch.setattr("app.routes.bump_data_version", broken)
+    response = logged_in_client.post("/add_savings_goal", data=dict(name="Urlaub", target_amount="1500"))
+    assert response.status_code == 302
+    # Nichts Halbfertiges bleibt in der Session für den nächsten Request
+    assert not db.session.new and SavingsGoal.query.count() == 0
+
+
+def test_projected_completion_from_contribution_rate(goal):
+    today = date(2024, 6, 30)
+    assert projected_completion(goal, today) is None
+    contribute(goal, Money.parse("300"), datetime(2024, 5, 1))
+    db.session.commit()
+    goal = reload(goal)
+    # 300 € in 60 Tagen = 5 €/Tag, es fehlen 700 €
+    assert projected_completion(goal, today) == today + timedelta(days=140)
+    # Eine einzelne frische Einzahlung zählt wie ein Monat
+    assert projected_completion(goal, date(2024, 5, 2)) == date(2024, 5, 2) + timedelta(days=70)
+
+    contribute(goal, Money.parse("700"), datetime(2024, 6, 1))
+    db.session.commit()
+    assert projected_completion(reload(goal), today) == today
+
+
+def test_rebuild_recomputes_all_goals_in_one_statement(factory_app, goal, max_queries):
+    contribute(goal, Money.parse("40"), datetime(2024, 2, 1))
+    contribute(goal, Money.parse("60"), datetime(2024, 1, 1))
+    empty = SavingsGoal(user_id=1, name="Auto", target_amount=Money.parse("5000"), current_cents=999)
+    db.session.add(empty)
+    db.session.execute(db.update(SavingsGoal).where(SavingsGoal.id == goal.id).values(current_cents=1))
+    db.session.commit()
+
+    with max_queries(2):  # ein UPDATE über alle Ziele, dazu data_version
+        assert rebuild_savings() == 2
+    assert reload(goal).current_amount == Money.parse("100")
+    assert reload(goal).first_contribution_at == datetime(2024, 1, 1)
+    assert reload(empty).current_cents == 0
+
+    result = factory_app.test_cli_runner().invoke(args=["savings", "rebuild", "--user", "1"])
+    assert result.exit_code == 0, result.output
+    assert "2 Sparziele neu berechnet." in result.output
+
+
+def test_delete_goal_removes_ledger(logged_in_client, goal):
+    logged_in_client.post(f"/savings_goal/{goal.id}/contribute", data=dict(amount="10"))
+    logged_in_client.post(f"/delete_savings_goal/{goal.id}")
+    assert SavingsGoal.query.count() == 0 and SavingsContribution.query.count() == 0
@@ -0,0 +1,141 @@
+from datetime import datetime
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from app import db
+from app.categories import category_id
+from app.models import Category, Transaction, User, bump_data_version
+from app.money import Money
+from app.rollups import record_transactions
+from app.search import InvalidFilter, parse_filters, rebuild_search_index
+from tests.query_plan import assert_no_full_scans, capture_queries
+
+ROWS = [
+    # Kategorie, Typ, Betrag, Datum
+    ("Lebensmittel", "expense", "62.40", datetime(2024, 3, 2)),
+    ("Lebensmittel", "expense", "18.99", datetime(2024, 3, 9)),
+    ("Lebensmittel", "expense", "75.00", datetime(2024, 4, 1)),
+    ("Essen gehen", "expense", "54.00", datetime(2024, 3, 15)),
+    ("Bücher", "expense", "24.00", datetime(2024, 3, 20)),
+    ("Gehalt", "income", "2500.00", datetime(2024, 3, 28)),
+]
+
+
+@pytest.fixture
+def seeded(factory_app):
+    db.session.add(User(id=2, username="andere", email="andere@example.com", password="x"))
+    transactions = [
+        Transaction(user_id=1, amount=Money.parse(amount), category_id=category_id(1, category),
+                    transaction_type=kind, date=day)
+        for category, kind, amount, day in ROWS
+    ]
+    # Gleiche Kategorie bei einem anderen Benutzer darf nie auftauchen
+    transactions.append(Transaction(user_id=2, amount=Money.parse("99"), category_id=category_id(2, "Lebensmittel"),
+                                    transaction_type="expense", date=datetime(2024, 3, 5)))
+    db.session.add_all(transactions)
+    db.session.flush()
+    record_transactions(transactions)
+    bump_data_version(1, 2)
+    db.session.commit()
+    return transactions
+
+
+def search(client, query):
+    response = client.get(f"/api/transactions?{query}")
+    assert response.status_code == 200, response.get_json()
+    return [(t["category"], t["amount"]) for t in response.get_json()["transactions"]]
+
+
+def test_parse_filters():
+    filters = parse_filters(MultiDict({"q": " leb ", "start": "2024-03-01", "end": "2024-03-31",
+                                       "min": "50", "max": "1.000,00", "type": "expense"}))
+    assert filters.q == "leb"
+    assert filters.start == datetime(2024, 3, 1)
+    assert (filters.min_cents, filters.max_cents) == (5000, 100000)
+    assert parse_filters(MultiDict()) == parse_filters(MultiDict({"q": "", "type": ""}))
+    for bad in ({"start": "03/2024"}, {"min": "viel"}, {"type": "transfer"}):
+        with pytest.raises(InvalidFilter):
+            parse_filters(MultiDict(bad))
+
+
+def test_groceries_in_march_over_50(logged_in_client, seeded):
+    assert search(logged_in_client, "q=lebensm&start=2024-03-01&end=2024-03-31&min=50") == [
+        ("Lebensmittel", "62.40"),
+    ]
+
+
+def test_fulltext_prefix_case_and_diacritics(logged_in_client, seeded):
+    assert [c for c, _ in search(logged_in_client, "q=LEB")] == ["Lebensmittel"] * 3
+    assert search(logged_in_client, "q=buch") == [("Bücher", "24.00")]
+    assert search(logged_in_client, "q=büch") == [("Bücher", "24.00")]
+    # Jedes Wort einer Kategorie zählt, alle Begriffe müssen passen
+    assert search(logged_in_client, "q=geh") == [("Gehalt", "2500.00"), ("Essen gehen", "54.00")]
+    assert search(logged_in_client, "q=ess+geh") == [("Essen gehen", "54.00")]
+    assert search(logged_in_client, "q=ess+miete") == []
+    # FTS-Syntax aus der Eingabe wird nicht ausgewertet
+    assert search(logged_in_client, 'q="leb*" OR owner') == []
+    assert len(search(logged_in_client, "q=%22%2A")) == len(ROWS)
+
+
+def test_filter_combinations(logged_in_client, seeded):
+    assert search(logged_in_client, "category=Lebensmittel&max=20") == [("Lebensmittel", "18.99")]
+    assert search(logged_in_client, "type=income") == [("Gehalt", "2500.00")]
+    assert len(search(logged_in_client, "type=expense&start=2024-03-09&end=2024-03-20")) == 3
+    assert search(logged_in_client, "min=70&max=100") == [("Lebensmittel", "75.00")]
+    assert logged_in_client.get("/api/transactions?min=viel").status_code == 400
+
+
+def test_filtered_pages_follow_cursor(logged_in_client, seeded):
+    first = logged_in_client.get("/api/transactions?q=leb&per_page=2").get_json()
+    assert [t["amount"] for t in first["transactions"]] == ["75.00", "18.99"]
+    second = logged_in_client.get(f"/api/transactions?q=leb&per_page=2&after={first['next_cursor']}").get_json()
+    assert [t["amount"] for t in second["transactions"]] == ["62.40"]
+    assert second["next_cursor"] is None
+
+
+def test_vocabulary_follows_inserts_and_deletes(logged_in_client, seeded):
+    books = next(t for t in seeded if t.category == "Bücher")
+    logged_in_client.post(f"/delete_transaction/{books.id}")
+    assert search(logged_in_client, "q=buch") == []
+    count = Category.query.filter_by(user_id=1, name="Bücher").one()
+    assert count.transaction_count == 0
+
+    logged_in_client.post("/add_transaction", data=dict(
+        amount="9.99", category="Hörbücher", transaction_type="expense", frequency="einmalig"))
+    assert search(logged_in_client, "q=horb") == [("Hörbücher", "9.99")]
+
+
+def test_search_queries_use_indexes(logged_in_client, seeded):
+    for query in ("q=leb&start=2024-03-01&end=2024-03-31&min=50", "category=Lebensmittel",
+                  "type=income", "min=70&max=100", "start=2024-03-01"):
+        with capture_queries(db.engine) as statements:
+            logged_in_client.get(f"/api/transactions?{query}")
+        assert_no_full_scans(db.engine, statements)
+
+
+def test_transactions_page_filters(logged_in_client, seeded):
+    html = logged_in_client.get("/transactions?q=leb&min=50").get_data(as_text=True)
+    assert html.count("<td>Lebensmittel</td>") == 2
+    assert 'value="leb"' in html and 'value="50.00"' in html
+
+    response = logged_in_client.get("/transactions?start=gestern")
+    assert response.status_code == 302
+    assert "Ungültiger Filter.".encode() in logged_in_client.get(response.headers["Location"]).data
+
+
+def test_rebuild_search_index(factory_app, logged_in_client, seeded):
+    Category.query.update({"transaction_count": 0})
+    db.session.execute(db.text("INSERT INTO category_fts(category_fts) VALUES ('delete-all')"))
+    db.session.commit()
+    assert search(logged_in_client, "q=leb") == []
+    etag = logged_in_client.get("/api/transactions?q=leb").headers["ETag"]
+
+    result = factory_app.test_cli_runner().invoke(args=["search", "rebuild-index"])
+    assert result.exit_code == 0, result.output
+    assert "5 Kategorien indexiert." in result.output
+    assert Category.query.filter_by(user_id=1, name="Lebensmittel").one().transaction_count == 3
+    assert len(search(logged_in_client, "q=leb")) == 3
+    # Der Neuaufbau ändert den ETag, sonst bliebe die leere Trefferliste gültig
+    assert logged_in_client.get("/api/transactions?q=leb", headers={"If-None-Match": etag}).status_code == 200
+    assert rebuild_search_index(user_id=2) == 1
@@ -0,0 +1,200 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from app import create_app, db
+from app.categories import category_id
+from app.jobs import work
+from app.models import (Budget, Category, Job, SavingsContribution, SavingsGoal, Transaction, User, UserState,
+                        bump_data_version)
+from app.money import Money
+from app.rollups import record_transactions
+from app.routing import NoShardSelected
+from app.sharding import MOVING, JobsStillRunning, assignment, init_shard_schema, move_user, set_assignment, use_shard
+from tests.conftest import TestConfig
+
+
+@pytest.fixture
+def sharded_app(tmp_path):
+    app = create_app(
+        TestConfig, SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'main.db'}",
+        SHARD_DATABASE_URIS=[f"sqlite:///{tmp_path / 'shard0.db'}", f"sqlite:///{tmp_path / 'shard1.db'}"],
+    )
+    with app.app_context():
+        db.create_all()
+        init_shard_schema()
+        db.session.add_all(User(id=i, username=f"u{i}", email=f"u{i}@example.com", password="x") for i in (1, 2))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def client_for(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = user_id
+    return client
+
+
+def count(shard, table, user_id):
+    with db.engines[shard].connect() as conn:
+        return conn.execute(select(func.count()).select_from(table).where(table.c.user_id == user_id)).scalar()
+
+
+def test_requests_write_only_to_their_users_shard(sharded_app):
+    for user_id in (1, 2):
+        client_for(sharded_app, user_id).post("/add_transaction", data=dict(
+            amount="5", category=f"Kino{user_id}", transaction_type="expense", frequency="einmalig"))
+
+    transactions = Transaction.__table__
+    # Neue Benutzer per user_id % 2
+    assert assignment(1).shard == "shard1" and assignment(2).shard == "shard0"
+    assert (count("shard1", transactions, 1), count("shard0", transactions, 1)) == (1, 0)
+    assert (count("shard0", transactions, 2), count("shard1", transactions, 2)) == (1, 0)
+    # Gleiche IDs in beiden Shards stören weder die Kategorien noch die Seiten
+    data = client_for(sharded_app, 2).get("/api/transactions").get_json()
+    assert [row["category"] for row in data["transactions"]] == ["Kino2"]
+
+
+def test_user_data_needs_a_shard(sharded_app):
+    with pytest.raises(NoShardSelected):
+        db.session.execute(select(Transaction)).all()
+    # Globale Tabellen gehen immer an die Haupt-Datenbank
+    assert db.session.execute(select(func.count()).select_from(User)).scalar() == 2
+
+
+def test_move_user_copies_and_remaps(sharded_app):
+    use_shard(1)
+    kino = category_id(1, "Kino")
+    goal = SavingsGoal(user_id=1, name="Urlaub", target_amount=Money.parse("100"))
+    transaction = Transaction(user_id=1, amount=Money.parse("12.5"), category_id=kino,
+                              transaction_type="expense", date=datetime(2024, 1, 2))
+    db.session.add_all([goal, transaction, Budget(user_id=1, category_id=kino, amount=Money.parse("50"),
+                                                  period="monatlich")])
+    db.session.flush()
+    db.session.add(SavingsContribution(goal_id=goal.id, user_id=1, amount=Money.parse("12.5"),
+                                       transaction_id=transaction.id))
+    record_transactions([transaction])
+    bump_data_version(1)
+    db.session.commit()
+    # Im Ziel gibt es schon Zeilen eines anderen Benutzers, die IDs müssen neu vergeben werden
+    client_for(sharded_app, 2).post("/add_transaction", data=dict(
+        amount="1", category="Miete", transaction_type="expense", frequency="einmalig"))
+
+    counts = move_user(1, "shard0", wait=0)
+    assert counts["transaction"] == counts["monthly_total"] == counts["savings_contribution"] == 1
+    assert assignment(1) == ("shard0", "active")
+    for table in (Transaction.__table__, Category.__table__, UserState.__table__):
+        assert count("shard1", table, 1) == 0
+
+    use_shard(1)
+    moved = db.session.execute(select(Transaction).where(Transaction.user_id == 1)).scalar_one()
+    contribution = db.session.execute(select(SavingsContribution)).scalar_one()
+    assert moved.category == "Kino" and contribution.transaction_id == moved.id
+    assert db.session.get(SavingsGoal, contribution.goal_id).name == "Urlaub"
+    assert db.session.get(UserState, 1).data_version == 2
+    # Der Suchindex folgt über die Trigger
+    data = client_for(sharded_app, 1).get("/api/transactions?q=kin").get_json()
+    assert [row["amount"] for row in data["transactions"]] == ["12.50"]
+
+
+def test_source_rows_outlive_other_processes_cache(sharded_app, monkeypatch):
+    client_for(sharded_app, 1).post("/add_transaction", data=dict(
+        amount="5", category="Kino", transaction_type="expense", frequency="einmalig"))
+    seen = []
+    # Statt zu schlafen festhalten, was andere Prozesse in der Wartezeit vorfinden würden
+    monkeypatch.setattr("app.sharding.time.sleep", lambda seconds: seen.append(
+        (seconds, assignment(1).shard, count("shard1", Transaction.__table__, 1))))
+
+    move_user(1, "shard0")
+    ttl = sharded_app.config["SHARD_MAP_TTL"]
+    # Nach dem Umstellen liegen die Zeilen noch eine TTL lang in der Quelle
+    assert seen == [(ttl, "shard1", 1), (ttl, "shard0", 1)]
+    assert count("shard1", Transaction.__table__, 1) == 0
+
+
+def test_categories_stay_valid_after_moving_there_and_back(sharded_app):
+    # Ein zweiter Prozess mit eigenem Kategorien-Cache auf denselben Dateien
+    other = create_app(TestConfig, **{key: sharded_app.config[key] for key in (
+        "SQLALCHEMY_DATABASE_URI", "SHARD_DATABASE_URIS")})
+    post = dict(amount="5", category="Kino", transaction_type="expense", frequency="einmalig")
+    for app in (sharded_app, other):
+        client_for(app, 1).post("/add_transaction", data=post)
+    db.session.add(User(id=3, username="u3", email="u3@example.com", password="x"))
+    db.session.commit()
+
+    move_user(1, "shard0", wait=0)
+    # Die frei gewordene ID von "Kino" in shard1 bekommt eine Kategorie von Benutzer 3
+    client_for(sharded_app, 3).post("/add_transaction", data=dict(post, category="Miete"))
+    move_user(1, "shard1", wait=0)
+    for app in (sharded_app, other):
+        assert client_for(app, 1).post("/add_transaction", data=post).status_code == 302
+
+    categories, transactions = Category.__table__, Transaction.__table__
+    with db.engines["shard1"].connect() as conn:
+        names = conn.execute(
+            select(categories.c.name).select_from(transactions.outerjoin(
+                categories, categories.c.id == transactions.c.category_id)).where(transactions.c.user_id == 1)
+        ).scalars().all()
+    assert names == ["Kino"] * 4
+    with other.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_move_waits_for_running_jobs(sharded_app):
+    client_for(sharded_app, 1).post("/add_transaction", data=dict(
+        amount="5", category="Kino", transaction_type="expense", frequency="einmalig"))
+    # Ein Import, der vor dem Umzug gestartet ist, schreibt noch in die Quelle
+    job = Job(kind="import", payload={}, user_id=1, status="running", locked_by="w")
+    db.session.add(job)
+    db.session.commit()
+    with pytest.raises(JobsStillRunning):
+        move_user(1, "shard0", wait=0, jobs_timeout=0)
+    assert assignment(1) == ("shard1", "active")
+    assert count("shard0", Transaction.__table__, 1) == 0
+
+    job.status = "done"
+    db.session.commit()
+    assert move_user(1, "shard0", wait=0, jobs_timeout=0)["transaction"] == 1
+
+
+def test_writes_wait_while_user_moves(sharded_app):
+    client = client_for(sharded_app, 1)
+    set_assignment(1, assignment(1).shard, MOVING)
+    response = client.post("/add_transaction", data=dict(
+        amount="5", category="Kino", transaction_type="expense", frequency="einmalig"))
+    assert response.status_code == 503 and "Retry-After" in response.headers
+    assert client.get("/api/transactions").status_code == 200
+
+
+def test_cli_init_status_and_move(sharded_app):
+    runner = sharded_app.test_cli_runner()
+    assert runner.invoke(args=["shards", "init"]).output == "2 Shards eingerichtet: shard0, shard1\n"
+    client_for(sharded_app, 1).post("/add_transaction", data=dict(
+        amount="5", category="Kino", transaction_type="expense", frequency="einmalig"))
+
+    result = runner.invoke(args=["shards", "move", "--user", "1", "--to", "shard0", "--wait", "0"])
+    assert result.exit_code == 0, result.output
+    assert "von shard1 nach shard0 verschoben" in result.output
+    assert runner.invoke(args=["shards", "status"]).output == "shard0: 1 Benutzer\nshard1: 0 Benutzer\n"
+    assert runner.invoke(args=["shards", "move", "--user", "1", "--to", "shard9"]).exit_code != 0
+
+    # Neuaufbau ohne Benutzer läuft über alle Shards
+    result = runner.invoke(args=["analytics", "rebuild"])
+    assert result.output == "1 Monatssummen neu berechnet.\n"
+
+
+def test_worker_runs_jobs_on_the_users_shard(sharded_app):
+    client = client_for(sharded_app, 1)
+    client.post("/add_transaction", data=dict(
+        amount="7", category="Kino", transaction_type="expense", frequency="einmalig"))
+    response = client.post("/export_transactions", data={"format": "csv"})
+    db.session.info.pop("shard")  # Der Worker wählt den Shard selbst
+    assert work("test", burst=True) == 1
+    job = client.get(response.headers["Location"]).get_json()
+    assert job["status"] == "done"
+    assert b"7.00" in client.get(f"/jobs/{job['id']}/download").data
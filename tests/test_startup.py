@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+
+import click
+
+from app import create_app
+from tests.conftest import TestConfig
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Obergrenze für "from app import create_app; create_app()" in einem frischen Interpreter.
+# Gemessen ~0,45 s auf einer CPU; mit NumPy und Alembic beim Start waren es ~0,8 s.
+IMPORT_BUDGET_SECONDS = 1.5
+
+# Module, die erst bei Bedarf geladen werden dürfen
+LAZY_MODULES = ("numpy", "flask_migrate", "alembic", "app.analytics")
+
+
+def import_times(code):
+    """Führt ``code`` mit ``-X importtime`` aus und liefert {Modul: kumulierte Sekunden}."""
+    env = dict(os.environ, DATABASE_URL="sqlite:///:memory:", METRICS_ENABLED="0")
+    env.pop("MIGRATIONS_ENABLED", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nur Top-Level-Importe, eingerückte sind in deren Summe schon enthalten
+        if not name.startswith("  "):
+            times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def test_create_app_import_budget():
+    times = import_times("from app import create_app; create_app()")
+    total = sum(times.values())
+    assert total < IMPORT_BUDGET_SECONDS, sorted(times.items(), key=lambda item: -item[1])[:10]
+
+
+def test_optional_subsystems_load_lazily():
+    times = import_times(
+        "import sys; from app import create_app; create_app()\n"
+        f"loaded = [m for m in {LAZY_MODULES!r} if m in sys.modules]\n"
+        "assert not loaded, loaded"
+    )
+    assert "app" in times
+
+
+def test_migrations_registered_under_cli():
+    assert "migrate" not in create_app(TestConfig).extensions
+    with click.Context(click.Command("db")):
+        app = create_app(TestConfig)
+    assert "migrate" in app.extensions
+
+
+def test_analytics_loaded_on_first_request(logged_in_client):
+    response = logged_in_client.get("/api/analytics/cash-flow")
+    assert response.status_code == 200
+    assert "app.analytics" in sys.modules
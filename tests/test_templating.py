@@ -0,0 +1,70 @@
+import glob
+
+from app import create_app
+from tests.conftest import TestConfig
+from tests.test_pagination import seed_transactions
+
+
+def test_dashboard_is_streamed(logged_in_client):
+    response = logged_in_client.get("/dashboard")
+    assert response.status_code == 200
+    # Gestreamte Antworten haben keine vorab bekannte Länge
+    assert "Content-Length" not in response.headers
+    assert "Deine Transaktionen".encode() in response.data
+
+
+def test_render_template_without_streaming(factory_app, logged_in_client):
+    factory_app.config["STREAM_TEMPLATES"] = False
+    response = logged_in_client.get("/dashboard")
+    assert "Content-Length" in response.headers
+    assert "Deine Budgets".encode() in response.data
+
+
+def test_flash_shown_once_when_streaming(factory_client):
+    response = factory_client.post(
+        "/login", data=dict(email="test@example.com", password="password123"), follow_redirects=True
+    )
+    assert "Erfolgreich eingeloggt!".encode() in response.data
+    # Die Nachricht wurde vor dem Streamen aus der Session genommen und kommt nicht wieder
+    assert "Erfolgreich eingeloggt!".encode() not in factory_client.get("/dashboard").data
+
+
+def test_transactions_page_lists_all_newest_first(factory_app, logged_in_client):
+    seed_transactions(120)
+    factory_app.config["EXPORT_CHUNK_SIZE"] = 25
+    html = logged_in_client.get("/transactions").get_data(as_text=True)
+    assert html.count("<tr>") == 121  # Kopfzeile + alle Transaktionen, keine Seitenaufteilung
+    assert html.index(">119.00<") < html.index(">118.00<") < html.index(">0.00<")
+
+
+def test_transactions_page_sends_head_before_query(factory_app, logged_in_client, max_queries):
+    seed_transactions(10)
+    factory_app.config["STREAM_BUFFER_SIZE"] = 1
+    response = logged_in_client.get("/transactions")
+    chunks = iter(response.response)
+    with max_queries(0, "erster Block"):
+        first = next(chunks)
+    assert first.startswith(b"<!-- app/templates/transactions.html -->")
+    rest = b"".join(chunks)
+    assert rest.count(b"<tr>") == 11
+    response.close()
+
+
+def test_transactions_page_requires_login(factory_client):
+    response = factory_client.get("/transactions")
+    assert response.status_code == 302
+
+
+def test_bytecode_cache_written_to_directory(tmp_path):
+    class CachedConfig(TestConfig):
+        TEMPLATE_CACHE_DIR = str(tmp_path / "jinja")
+
+    app = create_app(CachedConfig)
+    with app.test_request_context():
+        app.jinja_env.get_template("login.html")
+    assert glob.glob(str(tmp_path / "jinja" / "__jinja2_*.cache"))
+
+
+def test_bytecode_cache_can_be_disabled():
+    app = create_app(TestConfig, TEMPLATE_BYTECODE_CACHE=False)
+    assert app.jinja_env.bytecode_cache is None